@@ -0,0 +1,176 @@
+"""Vectorized backtests of target position signals over kline DataFrames.
+
+A signal gives, at the close of every candle, the position wanted from then on: 1 fully long, -1 fully short,
+0 flat, or any fraction in between. It is acted upon at the open of the next candle, so a signal computed from a
+closed candle never trades at a price it has already seen. A position change only trades the difference between
+the units held and the units of the new position, so scaling from 1 to 0.5 sells half the holding, and a trade
+lasts from leaving flat to returning flat or reversing. The units and cash only change at position changes, in
+one compiled pass over them, and the equity of every candle follows from them in a handful of array operations.
+
+Costs are a fee on the notional of every fill and a slippage moving every fill price against the trade. size
+scales the signal into the fraction of equity put at risk: the units of a position are size * signal times the
+equity marked at the open of its first candle, and are held until the position changes.
+
+Usage:
+    df = load_klines(csv_filepath)
+    equity, trades = backtest(df, macd_crossover(Indicators(df)), fee=0.001, slippage=0.0005)
+    summary(equity, trades)
+"""
+
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+from numba import njit
+
+from indicators import Indicators
+
+
+FEE = 0.001  # Binance spot taker fee
+
+
+def sma_crossover(indicators: Indicators, window_fast: int = 12, window_slow: int = 26) -> np.ndarray:
+    """Long while the fast SMA is above the slow one, short while below."""
+    return _crossing(indicators.sma(window_fast).to_numpy(), indicators.sma(window_slow).to_numpy())
+
+
+def ema_crossover(indicators: Indicators, window_fast: int = 12, window_slow: int = 26) -> np.ndarray:
+    """Long while the fast EMA is above the slow one, short while below."""
+    return _crossing(indicators.ema(window_fast).to_numpy(), indicators.ema(window_slow).to_numpy())
+
+
+def macd_crossover(indicators: Indicators, window_fast: int = 12, window_slow: int = 26, window_sign: int = 9) -> np.ndarray:
+    """Long while the MACD line is above its signal line, short while below."""
+    macd = indicators.macd(window_fast, window_slow, window_sign)
+    return _crossing(macd["macd"].to_numpy(), macd["signal"].to_numpy())
+
+
+def psar_trend(indicators: Indicators, step: float = 0.02, max_step: float = 0.2) -> np.ndarray:
+    """Long in PSAR up trends, short in down trends."""
+    psar = indicators.psar(step, max_step)
+    return np.where(psar["up"].notna(), 1.0, np.where(psar["down"].notna(), -1.0, 0.0))
+
+
+STRATEGIES: dict[str, Callable[[Indicators], np.ndarray]] = {
+    "sma_crossover": sma_crossover,
+    "ema_crossover": ema_crossover,
+    "macd_crossover": macd_crossover,
+    "psar_trend": psar_trend,
+}
+
+
+def backtest(
+    df: pd.DataFrame,
+    signal: np.ndarray | pd.Series,
+    fee: float = FEE,
+    slippage: float = 0.0,
+    size: float = 1.0,
+    allow_short: bool = False,
+    initial_equity: float = 1.0,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Run a target position signal over the candles of df. Returns (equity, trades).
+
+    equity has a row per candle with the position held during it, the equity marked at its close and the drawdown
+    from the running maximum. trades has a row per trade, from a position change out of flat or reversing the
+    direction to the next one going flat or reversing, with its entry and exit open times and fill prices, the
+    position at entry, the number of candles held, the return on the equity at entry and the profit. Resizing a
+    position within a trade is part of it. A trade still open at the last candle has no exit time and is marked at
+    the last close.
+
+    df : DataFrame - Klines with Open and Close columns, as returned by load_klines.
+    signal : array - Target position at the close of each candle, NaN for flat.
+    fee : float - Fee rate on the notional of every fill.
+    slippage : float - Fraction of the price every fill loses to the spread and market impact.
+    size : float - Fraction of equity committed by a signal of 1.
+    allow_short : bool - Trade negative signals instead of staying flat.
+    initial_equity : float - Equity before the first candle.
+    """
+    open_, close = df["Open"].to_numpy(dtype=np.float64), df["Close"].to_numpy(dtype=np.float64)
+    target = np.nan_to_num(np.asarray(signal, dtype=np.float64), nan=0.0)
+    if not len(close):
+        raise ValueError("No candles to backtest")
+    if len(target) != len(close):
+        raise ValueError(f"Signal has {len(target)} values for {len(close)} candles")
+    if not allow_short:
+        target = np.maximum(target, 0.0)
+    position = np.concatenate(([0.0], target[:-1])) * size
+
+    # runs of candles holding the same position, the first one opening at the first candle
+    starts = np.concatenate(([0], np.flatnonzero(position[1:] != position[:-1]) + 1))
+    ends = np.append(starts[1:], len(close))
+    run = np.repeat(np.arange(len(starts)), ends - starts)
+    held = position[starts]
+    cash, units, marked, closing_cost = _rebalance(open_[starts], held, fee, slippage, initial_equity)
+    equity = cash[run] + units[run] * close
+
+    equity_df = pd.DataFrame({"position": position, "equity": equity, "drawdown": equity / np.maximum.accumulate(equity) - 1}, index=df.index)
+
+    # trades open at the runs leaving flat or reversing and close at the next run going flat or reversing
+    direction = np.sign(held)
+    previous = np.concatenate(([0.0], direction[:-1]))
+    entries = np.flatnonzero((direction != 0) & (direction != previous))
+    exits = np.append(np.flatnonzero((direction[1:] != direction[:-1]) & (direction[:-1] != 0)) + 1, len(starts))[: len(entries)]
+    is_open = exits == len(starts)
+    closed_exits = np.minimum(exits, len(starts) - 1)
+    equity_at_entry = marked[entries] - closing_cost[entries]
+    equity_at_exit = np.where(is_open, equity[-1], marked[closed_exits] - closing_cost[closed_exits])
+    exit_times = np.append(starts, len(close) - 1)[exits]
+    trades_df = pd.DataFrame(
+        {
+            "entry_time": df.index[starts[entries]],
+            "exit_time": df.index[exit_times].where(~is_open),
+            "position": held[entries],
+            "entry_price": open_[starts[entries]] * (1 + slippage * direction[entries]),
+            "exit_price": np.where(is_open, close[-1], open_[starts[closed_exits]] * (1 - slippage * direction[entries])),
+            "candles": np.append(starts, len(close))[exits] - starts[entries],
+            "return": equity_at_exit / equity_at_entry - 1,
+            "profit": equity_at_exit - equity_at_entry,
+        }
+    )
+    return equity_df, trades_df
+
+
+@njit(cache=True)
+def _rebalance(prices: np.ndarray, positions: np.ndarray, fee: float, slippage: float, initial_equity: float):
+    """Cash and units held from each position change on, with the equity marked at its price before the fill and
+    the part of its costs closing the units of the previous direction."""
+    n = len(prices)
+    cash, units, marked, closing_cost = np.empty(n), np.empty(n), np.empty(n), np.zeros(n)
+    held_cash, held_units = initial_equity, 0.0
+    for i in range(n):
+        price = prices[i]
+        equity = held_cash + held_units * price
+        new_units = positions[i] * equity / price
+        traded = new_units - held_units
+        if traded != 0:
+            fill = price * (1 + slippage * np.sign(traded))
+            cost = abs(traded) * (fill - price) * np.sign(traded) + fee * abs(traded) * fill
+            held_cash -= traded * fill + fee * abs(traded) * fill
+            # a fill crossing zero first closes the units held, its costs are shared in proportion
+            if held_units != 0 and np.sign(new_units) != np.sign(held_units):
+                closing_cost[i] = cost * abs(held_units) / abs(traded)
+        held_units = new_units
+        cash[i], units[i], marked[i] = held_cash, held_units, equity
+    return cash, units, marked, closing_cost
+
+
+def summary(equity: pd.DataFrame, trades: pd.DataFrame) -> dict:
+    """Total return, maximum drawdown, number of trades, share of profitable trades and average trade return."""
+    return {
+        "total_return": float(equity["equity"].iloc[-1] / equity["equity"].iloc[0] - 1),
+        "max_drawdown": float(equity["drawdown"].min()),
+        "trades": len(trades),
+        "win_rate": float((trades["profit"] > 0).mean()) if len(trades) else np.nan,
+        "average_return": float(trades["return"].mean()) if len(trades) else np.nan,
+    }
+
+
+def backtest_strategies(df: pd.DataFrame, strategies: dict[str, Callable[[Indicators], np.ndarray]] = STRATEGIES, **kwargs) -> pd.DataFrame:
+    """summary of every strategy over df, one row per strategy. kwargs are passed to backtest."""
+    indicators = Indicators(df)
+    rows = {name: summary(*backtest(df, strategy(indicators), **kwargs)) for name, strategy in strategies.items()}
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+def _crossing(fast: np.ndarray, slow: np.ndarray) -> np.ndarray:
+    return np.where(fast > slow, 1.0, np.where(fast < slow, -1.0, 0.0))
@@ -0,0 +1,125 @@
+import os
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from backtest import STRATEGIES, backtest, backtest_strategies, macd_crossover, psar_trend, summary
+from binance import load_klines
+from indicators import Indicators
+from kline_store import HISTORICAL_DIR
+
+
+@pytest.fixture(scope="module")
+def klines():
+    return load_klines(os.path.join(HISTORICAL_DIR, "BTCUSDT-2023-1h.csv"))
+
+
+def _candles(opens, closes):
+    index = pd.date_range("2024-01-01", periods=len(opens), freq="1h", tz="UTC", name="Open Time")
+    return pd.DataFrame({"Open": opens, "Close": closes}, index=index, dtype=float)
+
+
+def _reference_backtest(df, signal, fee, slippage, size, allow_short):
+    """Cash and units simulated one candle at a time."""
+    cash, units, held, equity, trades = 1.0, 0.0, 0.0, [], []
+    target = np.nan_to_num(np.asarray(signal, dtype=float))
+    if not allow_short:
+        target = np.maximum(target, 0.0)
+    for i, (open_, close) in enumerate(zip(df["Open"], df["Close"])):
+        position = target[i - 1] * size if i else 0.0
+        if position != held:
+            marked = cash + units * open_
+            if units and np.sign(position) != np.sign(units):
+                # close the trade, then open the next one with what is left
+                price = open_ * (1 - slippage * np.sign(units))
+                cash += units * price - fee * abs(units) * price
+                trades[-1]["exit_price"] = price
+                trades[-1]["profit"] = cash - trades[-1]["equity"]
+                units = 0.0
+            new_units = position * marked / open_
+            if new_units != units:
+                price = open_ * (1 + slippage * np.sign(new_units - units))
+                if not units:
+                    trades.append({"entry_price": price, "equity": cash})
+                cash -= (new_units - units) * price + fee * abs(new_units - units) * price
+            units, held = new_units, position
+        equity.append(cash + units * close)
+    return np.array(equity), trades
+
+
+@pytest.mark.parametrize("fee, slippage, size, allow_short", [(0.0, 0.0, 1.0, False), (0.001, 0.0005, 1.0, True), (0.001, 0.001, 0.5, True)])
+def test_backtest_matches_reference(klines, fee, slippage, size, allow_short):
+    df = klines.iloc[:2000]
+    rng = np.random.default_rng(0)
+    # held for a random number of candles, long, short, flat or partial
+    signal = np.repeat(rng.choice([-1.0, -0.5, 0.0, 0.5, 1.0, np.nan], 400), rng.integers(1, 10, 400))[: len(df)]
+    equity, trades = backtest(df, signal, fee=fee, slippage=slippage, size=size, allow_short=allow_short)
+    expected_equity, expected_trades = _reference_backtest(df, signal, fee, slippage, size, allow_short)
+    np.testing.assert_allclose(equity["equity"], expected_equity, rtol=1e-10)
+    assert len(trades) == len(expected_trades)
+    np.testing.assert_allclose(trades["entry_price"], [trade["entry_price"] for trade in expected_trades], rtol=1e-12)
+    closed = trades.iloc[:-1] if trades["exit_time"].isna().iloc[-1] else trades
+    np.testing.assert_allclose(closed["profit"], [trade["profit"] for trade in expected_trades[: len(closed)]], rtol=1e-9, atol=1e-12)
+
+
+def test_signal_trades_at_the_next_open():
+    df = _candles([10, 11, 12, 14, 13], [11, 12, 14, 13, 15])
+    equity, trades = backtest(df, [1, 1, 0, 0, 0], fee=0.0)
+    assert equity["position"].tolist() == [0.0, 1.0, 1.0, 0.0, 0.0]
+    # bought at the open of the second candle, sold at the open of the fourth
+    assert equity["equity"].tolist() == pytest.approx([1.0, 12 / 11, 14 / 11, 14 / 11, 14 / 11])
+    assert trades.loc[0, ["entry_price", "exit_price", "candles"]].tolist() == [11.0, 14.0, 2]
+    assert trades.loc[0, "entry_time"] == df.index[1]
+    assert trades.loc[0, "exit_time"] == df.index[3]
+    assert trades.loc[0, "return"] == pytest.approx(3 / 11)
+
+
+def test_resizing_trades_the_difference():
+    df = _candles([100, 100, 100, 100], [100, 100, 100, 100])
+    equity, trades = backtest(df, [1.0, 0.5, 0.0, 0.0], fee=0.01)
+    # buying 1, then selling 0.505 down to half of the marked equity and the 0.495 left pays 1% on 2 of notional, not on 3
+    assert equity["equity"].tolist() == pytest.approx([1.0, 0.99, 0.98495, 0.98])
+    assert len(trades) == 1
+    assert trades.loc[0, ["position", "candles", "profit"]].tolist() == pytest.approx([1.0, 2, -0.02])
+
+
+def test_reversal_splits_the_fill_between_two_trades():
+    df = _candles([100, 100, 100, 100], [100, 100, 100, 100])
+    equity, trades = backtest(df, [1, -1, -1, -1], fee=0.01, allow_short=True)
+    assert trades["position"].tolist() == [1.0, -1.0]
+    assert trades["exit_time"].isna().tolist() == [False, True]
+    # the reversal sells 1.99 at once: 1.0 closes the long, 0.99 opens a short of the equity marked at 0.99
+    assert trades["profit"].tolist() == pytest.approx([-0.02, -0.0099])
+    assert equity["equity"].iloc[-1] == pytest.approx(1 - 0.01 - 0.0199)
+
+
+def test_costs_and_open_trade():
+    df = _candles([100, 100, 100], [100, 100, 110])
+    equity, trades = backtest(df, [-1, -1, -1], fee=0.01, slippage=0.01, allow_short=True)
+    # short of the equity at 100 sold at 99 after a 1% fee, marked at the last close without exit costs
+    assert equity["equity"].iloc[-1] == pytest.approx(1 - 0.01 - 0.01 * 0.99 - (110 / 100 - 1))
+    assert trades["exit_time"].isna().tolist() == [True]
+    assert trades["exit_price"].tolist() == [110.0]
+    assert backtest(df, [-1, -1, -1])[0]["position"].tolist() == [0.0, 0.0, 0.0]
+
+
+def test_invalid_signal():
+    df = _candles([1, 2], [2, 3])
+    with pytest.raises(ValueError):
+        backtest(df, [1.0])
+    with pytest.raises(ValueError):
+        backtest(df.iloc[:0], [])
+
+
+def test_strategies(klines):
+    indicators = Indicators(klines)
+    signal = macd_crossover(indicators)
+    macd = indicators.macd()
+    assert signal[100] == (1.0 if macd["macd"].iloc[100] > macd["signal"].iloc[100] else -1.0)
+    assert set(np.unique(psar_trend(indicators))) == {-1.0, 0.0, 1.0}
+    df = backtest_strategies(klines, slippage=0.0005)
+    assert df.index.tolist() == list(STRATEGIES)
+    equity, trades = backtest(klines, signal, slippage=0.0005)
+    assert df.loc["macd_crossover"].to_dict() == summary(equity, trades)
+    assert summary(equity, trades)["total_return"] == pytest.approx(equity["equity"].iloc[-1] - 1)
@@ -0,0 +1,243 @@
+"""Time, tick, volume and dollar bars built from trades.
+
+Trades are appended to a preallocated TRADE_DTYPE buffer and turned into bars in batches with vectorised NumPy
+reductions, so the same BarBuilder.process code path serves a live trade stream and a stored trade array.
+
+A time bar holds the trades of one period of threshold milliseconds, aligned to the epoch; periods without
+trades have no bar. A trade of a period whose bar has already been completed, e.g. by flush(now) before the
+trade arrived, is dropped and counted in late_trades, so no two time bars share an open time.
+
+Tick, volume and dollar bars close on the trade that makes the cumulative trade count, base volume or quote
+volume reach the next multiple of threshold. The part of that trade's quantity above the threshold counts for
+the following bar, so bars average exactly threshold over time.
+"""
+
+import time
+import asyncio
+from typing import AsyncIterator
+
+import numpy as np
+
+from binance_stream import TRADE_DECODER, StreamMultiplexer, shared_multiplexer, stream_name
+
+
+TRADE_DTYPE = np.dtype([("trade_time", np.int64), ("price", np.float64), ("quantity", np.float64), ("buyer_is_maker", np.bool_)])
+BAR_DTYPE = np.dtype(
+    [
+        ("open_time", np.int64),
+        ("close_time", np.int64),
+        ("open", np.float64),
+        ("high", np.float64),
+        ("low", np.float64),
+        ("close", np.float64),
+        ("volume", np.float64),
+        ("quote_volume", np.float64),
+        ("number_of_trades", np.int64),
+        ("taker_buy_volume", np.float64),
+    ]
+)
+BAR_KINDS = ("time", "tick", "volume", "dollar")
+
+
+class BarBuilder:
+    """Turns trades into bars of one kind.
+
+    kind : string - One of BAR_KINDS.
+    threshold : float - Bar length in milliseconds for time bars, else the trade count, base volume or quote volume of a bar.
+    buffer_size : integer - Trades buffered by add before they are processed.
+    history_size : integer - Completed bars kept in the history ring buffer.
+
+    Usage:
+        builder = BarBuilder("dollar", 1_000_000)
+        for trade in trades:
+            builder.add(trade)
+        bars = builder.flush()
+    """
+
+    def __init__(self, kind: str, threshold: float, buffer_size: int = 65536, history_size: int = 4096):
+        if kind not in BAR_KINDS:
+            raise ValueError(f"Invalid bar kind: {kind}. Supported kinds: {BAR_KINDS}")
+        if threshold <= 0:
+            raise ValueError(f"Invalid threshold: {threshold}. The threshold must be positive")
+        self.kind = kind
+        self.threshold = int(threshold) if kind == "time" else threshold
+        self._buffer = np.empty(buffer_size, dtype=TRADE_DTYPE)
+        self._buffered = 0
+        self._completed: list[np.ndarray] = []
+        self._history = np.empty(history_size, dtype=BAR_DTYPE)
+        self._history_count = 0
+        self._partial: np.ndarray | None = None
+        self._partial_id = 0
+        self._carry = 0.0
+        self._completed_until = -1
+        self.late_trades = 0
+
+    def add(self, trade) -> bool:
+        """Buffer a trade (any object with trade_time, price, quantity and buyer_is_maker attributes, e.g. binance_stream.Trade).
+        The buffer is processed when full. Returns True if completed bars are waiting to be flushed."""
+        self._buffer[self._buffered] = (trade.trade_time, trade.price, trade.quantity, trade.buyer_is_maker)
+        self._buffered += 1
+        if self._buffered == len(self._buffer):
+            self._process_buffer()
+        return bool(self._completed)
+
+    def flush(self, now: int | None = None) -> np.ndarray:
+        """Process the buffered trades and return the bars completed since the last flush.
+        For time bars, now (epoch milliseconds) also closes the current bar if its period has ended. Trades of
+        that period added afterwards are dropped and counted in late_trades."""
+        self._process_buffer()
+        if now is not None and self.kind == "time" and self._partial is not None and self._partial[0]["close_time"] < now:
+            self._complete(self._partial)
+            self._partial = None
+        completed, self._completed = self._completed, []
+        return np.concatenate(completed) if completed else np.empty(0, dtype=BAR_DTYPE)
+
+    def partial(self) -> np.ndarray:
+        """The current, uncompleted bar after processing the buffered trades, as an array of zero or one bar."""
+        self._process_buffer()
+        return np.empty(0, dtype=BAR_DTYPE) if self._partial is None else self._partial.copy()
+
+    def history(self) -> np.ndarray:
+        """The last history_size completed bars, oldest first."""
+        size = len(self._history)
+        if self._history_count <= size:
+            return self._history[: self._history_count].copy()
+        start = self._history_count % size
+        return np.concatenate((self._history[start:], self._history[:start]))
+
+    def process(self, trades: np.ndarray) -> np.ndarray:
+        """Add a TRADE_DTYPE array of trades, sorted by trade time, and return the bars they complete."""
+        self._process_buffer()
+        self._process(trades)
+        completed, self._completed = self._completed, []
+        return np.concatenate(completed) if completed else np.empty(0, dtype=BAR_DTYPE)
+
+    def _process_buffer(self):
+        if self._buffered:
+            self._process(self._buffer[: self._buffered])
+            self._buffered = 0
+
+    def _process(self, trades: np.ndarray):
+        if self.kind == "time" and len(trades) and trades["trade_time"][0] <= self._completed_until:
+            late = trades["trade_time"] <= self._completed_until
+            self.late_trades += int(late.sum())
+            trades = trades[~late]
+        if not len(trades):
+            return
+        if self.kind == "time":
+            ids = trades["trade_time"] // self.threshold
+        else:
+            measure = self._measure(trades)
+            cumulative = self._carry + np.cumsum(measure)
+            ids = ((cumulative - measure) // self.threshold).astype(np.int64)
+        bars, starts = _aggregate(trades, ids)
+        if self.kind == "time":
+            bars["open_time"] = ids[starts] * self.threshold
+            bars["close_time"] = bars["open_time"] + self.threshold - 1
+
+        if self._partial is not None:
+            if ids[0] == self._partial_id:
+                _merge_into(bars, self._partial[0])
+            else:
+                self._complete(self._partial)
+
+        if self.kind == "time":
+            last_complete = False
+        else:
+            crossed = int(cumulative[-1] // self.threshold)
+            last_complete = crossed > ids[-1]
+            self._carry = float(cumulative[-1] - crossed * self.threshold)
+        if last_complete:
+            self._complete(bars)
+            self._partial = None
+        else:
+            self._complete(bars[:-1])
+            self._partial = bars[-1:].copy()
+            self._partial_id = ids[-1] if self.kind == "time" else 0
+
+    def _measure(self, trades: np.ndarray) -> np.ndarray:
+        if self.kind == "tick":
+            return np.ones(len(trades))
+        if self.kind == "volume":
+            return trades["quantity"]
+        return trades["price"] * trades["quantity"]
+
+    def _complete(self, bars: np.ndarray):
+        if not len(bars):
+            return
+        self._completed.append(bars)
+        self._completed_until = bars["close_time"][-1]
+        size = len(self._history)
+        self._history_count += len(bars) - len(bars[-size:])
+        bars = bars[-size:]
+        self._history[(self._history_count + np.arange(len(bars))) % size] = bars
+        self._history_count += len(bars)
+
+
+def _aggregate(trades: np.ndarray, ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """One bar per run of equal ids, and the index of the first trade of each run."""
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(ids)) + 1))
+    ends = np.concatenate((starts[1:], [len(ids)])) - 1
+    price, quantity = trades["price"], trades["quantity"]
+    bars = np.empty(len(starts), dtype=BAR_DTYPE)
+    bars["open_time"] = trades["trade_time"][starts]
+    bars["close_time"] = trades["trade_time"][ends]
+    bars["open"] = price[starts]
+    bars["high"] = np.maximum.reduceat(price, starts)
+    bars["low"] = np.minimum.reduceat(price, starts)
+    bars["close"] = price[ends]
+    bars["volume"] = np.add.reduceat(quantity, starts)
+    bars["quote_volume"] = np.add.reduceat(price * quantity, starts)
+    bars["number_of_trades"] = ends - starts + 1
+    bars["taker_buy_volume"] = np.add.reduceat(np.where(trades["buyer_is_maker"], 0.0, quantity), starts)
+    return bars, starts
+
+
+def _merge_into(bars: np.ndarray, partial: np.ndarray):
+    """Prepend the trades summarised by partial to the first bar of bars."""
+    bar = bars[0]
+    bar["open_time"] = partial["open_time"]
+    bar["open"] = partial["open"]
+    bar["high"] = max(bar["high"], partial["high"])
+    bar["low"] = min(bar["low"], partial["low"])
+    for name in ("volume", "quote_volume", "number_of_trades", "taker_buy_volume"):
+        bar[name] += partial[name]
+
+
+def build_bars(trades: np.ndarray, kind: str, threshold: float) -> np.ndarray:
+    """Bars of a TRADE_DTYPE array of trades sorted by trade time. The last bar is included even if it is not complete."""
+    builder = BarBuilder(kind, threshold, buffer_size=1)
+    bars = builder.process(trades)
+    return np.concatenate((bars, builder.partial()))
+
+
+async def trade_bars(
+    symbol: str,
+    kind: str,
+    threshold: float,
+    flush_interval: float = 1.0,
+    multiplexer: StreamMultiplexer | None = None,
+) -> AsyncIterator[np.ndarray]:
+    """Yield the BAR_DTYPE bars completed by the live trades of a symbol, in batches every flush_interval seconds.
+
+    Usage:
+        async for bars in trade_bars("BTCUSDT", "volume", 10):
+            print(bars["close"])
+    """
+    builder = BarBuilder(kind, threshold)
+    if multiplexer is None:
+        multiplexer = shared_multiplexer()
+    streams = [stream_name(symbol, "trade")]
+
+    def handler(stream, trade):
+        builder.add(trade)
+
+    try:
+        await multiplexer.subscribe(streams, handler, TRADE_DECODER)
+        while True:
+            await asyncio.sleep(flush_interval)
+            bars = builder.flush(now=int(time.time() * 1000))
+            if len(bars):
+                yield bars
+    finally:
+        await multiplexer.unsubscribe(streams, handler)
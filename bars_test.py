@@ -0,0 +1,146 @@
+import asyncio
+
+import pytest
+import numpy as np
+
+from bars import BAR_DTYPE, TRADE_DTYPE, BarBuilder, build_bars, trade_bars
+from binance_stream import StreamMultiplexer, Trade
+from testing import TRADE, run_with_fake_binance, until
+
+
+def _trades(n, seed=0):
+    """Random trades with prices and quantities exact in binary, so chunked and whole-array sums agree."""
+    rng = np.random.default_rng(seed)
+    trades = np.empty(n, dtype=TRADE_DTYPE)
+    trades["trade_time"] = 1672515780000 + np.cumsum(rng.integers(0, 2000, n))
+    trades["price"] = 100 + np.cumsum(rng.integers(-2, 3, n)) / 4
+    trades["quantity"] = rng.integers(1, 40, n) / 8
+    trades["buyer_is_maker"] = rng.random(n) < 0.5
+    return trades
+
+
+def _reference_bars(trades, kind, threshold):
+    """Bars built one trade at a time with plain Python."""
+    bars, current, cumulative = [], None, 0.0
+    for trade_time, price, quantity, buyer_is_maker in trades.tolist():
+        if kind == "time":
+            bar_id = trade_time // threshold
+        else:
+            bar_id = int(cumulative // threshold)
+            cumulative += {"tick": 1.0, "volume": quantity, "dollar": price * quantity}[kind]
+        if current is None or current[0] != bar_id:
+            current = [bar_id, trade_time, trade_time, price, price, price, price, 0.0, 0.0, 0, 0.0]
+            bars.append(current)
+        current[2] = trade_time
+        current[4] = max(current[4], price)
+        current[5] = min(current[5], price)
+        current[6] = price
+        current[7] += quantity
+        current[8] += price * quantity
+        current[9] += 1
+        current[10] += 0.0 if buyer_is_maker else quantity
+    if kind == "time":
+        for bar in bars:
+            bar[1], bar[2] = bar[0] * threshold, bar[0] * threshold + threshold - 1
+    return np.array([tuple(bar[1:]) for bar in bars], dtype=BAR_DTYPE)
+
+
+@pytest.mark.parametrize("kind, threshold", [("time", 60000), ("tick", 50), ("volume", 100.0), ("dollar", 10000.0)])
+def test_build_bars_matches_reference(kind, threshold):
+    trades = _trades(5000)
+    bars = build_bars(trades, kind, threshold)
+    expected = _reference_bars(trades, kind, threshold)
+    assert len(bars) > 10
+    for name in BAR_DTYPE.names:
+        np.testing.assert_allclose(bars[name], expected[name], rtol=1e-12, err_msg=name)
+
+
+@pytest.mark.parametrize("kind, threshold", [("time", 60000), ("tick", 50), ("volume", 100.0), ("dollar", 10000.0)])
+def test_streaming_matches_offline(kind, threshold):
+    trades = _trades(5000)
+    builder = BarBuilder(kind, threshold, buffer_size=97)
+    batches = []
+    for trade_time, price, quantity, buyer_is_maker in trades.tolist():
+        builder.add(Trade(0, "BNBBTC", 0, price, quantity, trade_time, buyer_is_maker))
+        if np.random.default_rng(trade_time).random() < 0.01:
+            batches.append(builder.flush())
+    batches.append(builder.flush())
+    bars = np.concatenate(batches + [builder.partial()])
+    assert bars.tolist() == build_bars(trades, kind, threshold).tolist()
+
+
+def test_threshold_bar_closes_on_the_crossing_trade():
+    trades = np.array([(1, 10.0, 1.0, False), (2, 11.0, 2.0, True), (3, 9.0, 4.0, False), (4, 12.0, 1.0, False)], dtype=TRADE_DTYPE)
+    builder = BarBuilder("volume", 3.0)
+    bars = builder.process(trades[:2])
+    assert bars[["open_time", "close_time", "open", "high", "low", "close", "volume", "number_of_trades", "taker_buy_volume"]].tolist() == [(1, 2, 10.0, 11.0, 10.0, 11.0, 3.0, 2, 1.0)]
+    assert not len(builder.partial())
+    # the 4.0 of the third trade reaches 6.0, the 1.0 above closes the next bar together with the fourth trade
+    bars = builder.process(trades[2:])
+    assert bars[["open", "close", "volume"]].tolist() == [(9.0, 9.0, 4.0)]
+    assert builder.partial()[["open", "volume"]].tolist() == [(12.0, 1.0)]
+
+
+def test_time_bars_are_aligned_and_closed_by_flush():
+    trades = np.array([(60500, 10.0, 1.0, False), (61000, 11.0, 1.0, False), (185000, 12.0, 1.0, False)], dtype=TRADE_DTYPE)
+    builder = BarBuilder("time", 60000)
+    bars = builder.process(trades)
+    assert bars[["open_time", "close_time", "close", "number_of_trades"]].tolist() == [(60000, 119999, 11.0, 2)]
+    assert not len(builder.flush(now=185500))
+    assert builder.flush(now=240000)[["open_time", "close_time"]].tolist() == [(180000, 239999)]
+    assert not len(builder.partial())
+
+
+def test_late_trades_of_a_flushed_time_bar_are_dropped():
+    builder = BarBuilder("time", 60000)
+    builder.process(np.array([(185000, 12.0, 1.0, False)], dtype=TRADE_DTYPE))
+    assert builder.flush(now=240000)["open_time"].tolist() == [180000]
+    late = np.array([(230000, 13.0, 1.0, False), (239999, 14.0, 1.0, False), (250000, 15.0, 2.0, False)], dtype=TRADE_DTYPE)
+    assert not len(builder.process(late))
+    assert builder.late_trades == 2
+    assert builder.partial()[["open_time", "open", "volume"]].tolist() == [(240000, 15.0, 2.0)]
+    assert builder.flush(now=300000)["open_time"].tolist() == [240000]
+    assert builder.history()["open_time"].tolist() == [180000, 240000]
+
+
+def test_history_keeps_the_last_bars():
+    trades = _trades(1000)
+    builder = BarBuilder("tick", 10, history_size=16)
+    builder.process(trades[:95])
+    assert builder.history()["number_of_trades"].tolist() == [10] * 9
+    bars = builder.process(trades[95:])
+    history = builder.history()
+    assert len(history) == 16
+    assert history.tolist() == bars[-16:].tolist()
+
+
+def test_add_returns_whether_bars_are_waiting():
+    builder = BarBuilder("tick", 2, buffer_size=1)
+    trade = Trade(0, "BNBBTC", 0, 1.0, 1.0, 0, False)
+    assert not builder.add(trade)
+    assert builder.add(trade)
+    assert len(builder.flush()) == 1
+    assert not builder.add(trade)
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        BarBuilder("renko", 10)
+    with pytest.raises(ValueError):
+        BarBuilder("tick", 0)
+
+
+def test_trade_bars():
+    async def test(binance, uri):
+        async with StreamMultiplexer(uri, control_messages_per_second=100) as multiplexer:
+            stream = trade_bars("BNBBTC", "tick", 2, flush_interval=0.05, multiplexer=multiplexer)
+            first = asyncio.ensure_future(anext(stream))
+            await until(lambda: binance.connections and any(binance.connections.values()))
+            for i, price in enumerate(["0.001", "0.003", "0.002"]):
+                await binance.push("bnbbtc@trade", {**TRADE, "t": i, "p": price, "T": TRADE["T"] + i})
+            bars = await first
+            assert bars[["open", "high", "low", "close", "number_of_trades"]].tolist() == [(0.001, 0.003, 0.001, 0.003, 2)]
+            await stream.aclose()
+            assert multiplexer.streams == []
+
+    run_with_fake_binance(test)
@@ -0,0 +1,329 @@
+"""Benchmarks for the data paths of this repo, run against the cached historical klines.
+
+Usage: python benchmark.py [name ...]
+"""
+
+import os
+import sys
+import json
+import timeit
+import asyncio
+import tempfile
+
+import msgspec
+import numpy as np
+import pandas as pd
+from ta.trend import SMAIndicator, EMAIndicator, MACD, PSARIndicator
+from ta.momentum import RSIIndicator, TSIIndicator
+
+import kline_store
+import binance_stream
+from backtest import STRATEGIES, backtest, sma_crossover
+from bars import TRADE_DTYPE, BarBuilder, build_bars
+from stream_log import StreamRecorder, ReplayMultiplexer
+from metrics import MetricsRegistry
+from indicators import Indicators, StreamingEMA, StreamingMACD, StreamingPSAR, StreamingRSI, StreamingSMA, StreamingTSI
+from order_book import OrderBookSide
+from screener import screen, screener_path
+from sweep import parameter_grid, sweep
+from binance import KLINE_COLUMNS, klines_to_df, load_klines, find_gaps
+from kline_store import HISTORICAL_DIR
+
+
+def _report(name: str, func, number: int = 5, repeat: int = 5) -> float:
+    best = min(timeit.repeat(func, number=number, repeat=repeat)) / number
+    print(f"{name:<45} {best * 1000:10.3f} ms")
+    return best
+
+
+def _load_raw_klines(csv_filename: str) -> list[list]:
+    """Rebuild the raw REST payload (list of lists, prices as strings) from a cached csv file."""
+    df = load_klines(os.path.join(HISTORICAL_DIR, csv_filename))
+    open_times = df.index.as_unit("ms").asi8
+    close_times = pd.to_datetime(df["Close Time"]).dt.as_unit("ms").astype("int64").to_numpy()
+    return [
+        [int(open_time), f"{row[0]:.8f}", f"{row[1]:.8f}", f"{row[2]:.8f}", f"{row[3]:.8f}", f"{row[4]:.8f}", int(close_time), f"{row[6]:.8f}", int(row[7]), f"{row[8]:.8f}", f"{row[9]:.8f}", "0"]
+        for open_time, close_time, row in zip(open_times, close_times, df.itertuples(index=False))
+    ]
+
+
+def _klines_to_df_reference(klines: list[list]) -> pd.DataFrame:
+    """klines_to_df as it was before the single-pass parser."""
+    df = pd.DataFrame(klines)
+    df.columns = KLINE_COLUMNS
+    df.drop(df.columns[-1], axis=1, inplace=True)
+    df["Open Time"] = pd.to_datetime(df["Open Time"], unit="ms", utc=True)
+    df["Close Time"] = pd.to_datetime(df["Close Time"], unit="ms", utc=True)
+    df["Open"] = pd.to_numeric(df["Open"])
+    df["High"] = pd.to_numeric(df["High"])
+    df["Low"] = pd.to_numeric(df["Low"])
+    df["Close"] = pd.to_numeric(df["Close"])
+    df["Volume"] = pd.to_numeric(df["Volume"])
+    df["Quote Asset Volume"] = pd.to_numeric(df["Quote Asset Volume"])
+    df["Number of Trades"] = pd.to_numeric(df["Number of Trades"])
+    df["Taker Buy Base Asset Volume"] = pd.to_numeric(df["Taker Buy Base Asset Volume"])
+    df["Taker Buy Quote Asset Volume"] = pd.to_numeric(df["Taker Buy Quote Asset Volume"])
+    df.set_index("Open Time", inplace=True)
+    return df
+
+
+def bench_klines_to_df():
+    klines = _load_raw_klines("BTCUSDT-2024-1h.csv")
+    pd.testing.assert_frame_equal(klines_to_df(klines), _klines_to_df_reference(klines))
+    print(f"klines_to_df on BTCUSDT-2024-1h ({len(klines)} rows)")
+    reference = _report("  reference (pd.to_numeric per column)", lambda: _klines_to_df_reference(klines))
+    current = _report("  klines_to_df", lambda: klines_to_df(klines))
+    print(f"  speedup: {reference / current:.1f}x")
+
+
+def _synthetic_klines(year: int, interval: str = "1min") -> pd.DataFrame:
+    """A year of random walk candles, used where the cache has no data at the wanted resolution."""
+    index = pd.date_range(f"{year}-01-01", f"{year + 1}-01-01", freq=interval, tz="UTC", inclusive="left", name="Open Time").as_unit("ms")
+    rng = np.random.default_rng(year)
+    close = 40000 + np.cumsum(rng.normal(0, 10, len(index)))
+    volume = rng.exponential(5, len(index))
+    return pd.DataFrame(
+        {
+            "Open": np.concatenate(([close[0]], close[:-1])),
+            "High": close + 5,
+            "Low": close - 5,
+            "Close": close,
+            "Volume": volume,
+            "Close Time": index + (index[1] - index[0]) - pd.Timedelta(milliseconds=1),
+            "Quote Asset Volume": volume * close,
+            "Number of Trades": rng.integers(1, 1000, len(index)),
+            "Taker Buy Base Asset Volume": volume / 2,
+            "Taker Buy Quote Asset Volume": volume * close / 2,
+        },
+        index=index,
+    )
+
+
+def bench_kline_store():
+    with tempfile.TemporaryDirectory() as root:
+        kline_store.migrate_csv_cache(root=root)
+        print("load BTCUSDT-2024-1h")
+        _report("  load_klines (csv)", lambda: load_klines(os.path.join(HISTORICAL_DIR, "BTCUSDT-2024-1h.csv")))
+        _report("  kline_store.read_partition", lambda: kline_store.read_partition("BTCUSDT", "1h", 2024, root=root))
+        _report("  kline_store.read_partition (Close only)", lambda: kline_store.read_partition("BTCUSDT", "1h", 2024, ["Close"], root=root))
+
+        df = _synthetic_klines(2024)
+        csv_filepath = os.path.join(root, "SYNTHETIC-2024-1m.csv")
+        df.to_csv(csv_filepath, index_label="Open Time")
+        kline_store.write_klines(df, "SYNTHETIC", "1m", root)
+        print(f"load a year of 1m candles ({len(df)} rows, synthetic)")
+        _report("  load_klines (csv)", lambda: load_klines(csv_filepath), number=1, repeat=3)
+        _report("  kline_store.read_partition", lambda: kline_store.read_partition("SYNTHETIC", "1m", 2024, root=root))
+        _report("  kline_store.read_partition (Close only)", lambda: kline_store.read_partition("SYNTHETIC", "1m", 2024, ["Close"], root=root))
+        kline_store.write_array(df, "SYNTHETIC", "1m", 2024, root)
+        _report("  kline_store.load_array (memmap)", lambda: kline_store.load_array("SYNTHETIC", "1m", 2024, root=root))
+        _report("  kline_store.open_array (Close sum)", lambda: kline_store.open_array("SYNTHETIC", "1m", 2024, root)["Close"].sum())
+
+        hourly = _synthetic_klines(2024, "1h")
+        kline_store.write_klines(hourly, "SYNTHETIC", "1h", root)
+        last_week = hourly.index[-1] - pd.Timedelta(weeks=1)
+        print("last week of a year of 1h candles (synthetic)")
+        _report("  read_partition + slice", lambda: kline_store.read_partition("SYNTHETIC", "1h", 2024, root=root).loc[last_week:])
+        _report("  kline_store.read_klines", lambda: kline_store.read_klines("SYNTHETIC", "1h", last_week, root=root))
+
+
+def bench_find_gaps():
+    index = _synthetic_klines(2024).index.delete(np.s_[1000:1100]).delete(np.s_[200000:200005])
+    print(f"gaps in a year of 1m candles ({len(index)} rows, synthetic)")
+    _report("  pd.date_range + difference", lambda: pd.date_range(index.min(), index.max(), freq="1min").difference(index))
+    _report("  find_gaps", lambda: find_gaps(index, "1m"))
+
+
+def bench_stream_decode():
+    trade = {"e": "trade", "E": 1672515782136, "s": "BTCUSDT", "t": 12345, "p": "42000.01000000", "q": "0.00100000", "T": 1672515782136, "m": True, "M": True}
+    messages = [json.dumps({"stream": "btcusdt@trade", "data": {**trade, "t": i}}).encode() for i in range(100_000)]
+
+    def reference():
+        for message in messages:
+            data = json.loads(message)["data"]
+            data["p"], data["q"] = float(data["p"]), float(data["q"])
+
+    def typed():
+        decode_message, decode_trade = binance_stream._MESSAGE_DECODER.decode, binance_stream.TRADE_DECODER.decode
+        for message in messages:
+            decode_trade(decode_message(message).data)
+
+    print(f"decode {len(messages)} combined-stream trade messages")
+    reference_time = _report("  json.loads + float", reference, number=1)
+    typed_time = _report("  msgspec Trade", typed, number=1)
+    print(f"  {len(messages) / typed_time:,.0f} trades/s, speedup: {reference_time / typed_time:.1f}x")
+
+
+def bench_stream_dispatch():
+    trade = {"e": "trade", "E": 1672515782136, "s": "BTCUSDT", "t": 12345, "p": "42000.01000000", "q": "0.00100000", "T": 1672515782136, "m": True, "M": True}
+    payloads = [msgspec.Raw(json.dumps({**trade, "t": i}).encode()) for i in range(100_000)]
+
+    def dispatch(metrics):
+        multiplexer = binance_stream.StreamMultiplexer(metrics=metrics)
+        multiplexer._handlers["btcusdt@trade"] = [(lambda stream, event: None, binance_stream.TRADE_DECODER, None)]
+        return lambda: [multiplexer._dispatch("btcusdt@trade", payload, 1672515782.2) for payload in payloads]
+
+    print(f"dispatch {len(payloads)} trade messages to one handler")
+    without = _report("  without metrics", dispatch(None), number=1)
+    with_metrics = _report("  with metrics", dispatch(MetricsRegistry()), number=1)
+    print(f"  metrics overhead: {(with_metrics - without) / len(payloads) * 1e6:.2f} us per message")
+
+
+def bench_order_book():
+    rng = np.random.default_rng(0)
+    ticks = np.round(np.arange(40000, 40500, 0.01), 2)
+    side = OrderBookSide(descending=False)
+    side.set(np.column_stack((ticks[::10], rng.integers(1, 100, len(ticks[::10])).astype(float))))
+    updates = [np.column_stack((rng.choice(ticks, 20, replace=False), np.where(rng.random(20) < 0.3, 0.0, 1.0))) for _ in range(1000)]
+    print(f"order book side with {len(side)} levels")
+    update_time = _report("  update (20 levels, 1000 diffs)", lambda: [side.update(levels) for levels in updates], number=1)
+    print(f"  {update_time / len(updates) * 1e6:.1f} us per diff update")
+    _report("  best + cumulative_quantity + price_for_quantity", lambda: (side.best(), side.cumulative_quantity(40100.0), side.price_for_quantity(500.0)), number=1000)
+
+
+def bench_bars():
+    rng = np.random.default_rng(0)
+    trades = np.empty(1_000_000, dtype=TRADE_DTYPE)
+    trades["trade_time"] = 1704067200000 + np.cumsum(rng.integers(0, 50, len(trades)))
+    trades["price"] = 40000 + np.cumsum(rng.normal(0, 1, len(trades)))
+    trades["quantity"] = rng.exponential(0.05, len(trades))
+    trades["buyer_is_maker"] = rng.random(len(trades)) < 0.5
+    df = pd.DataFrame({"Price": trades["price"], "Quantity": trades["quantity"]}, index=pd.to_datetime(trades["trade_time"], unit="ms"))
+
+    def reference():
+        resampled = df.resample("1min")
+        return pd.concat([resampled["Price"].ohlc(), resampled["Quantity"].sum()], axis=1).dropna()
+
+    print(f"bars from {len(trades)} trades (synthetic)")
+    _report("  pandas resample 1min", reference, number=1)
+    _report("  build_bars time 1min", lambda: build_bars(trades, "time", 60000), number=1)
+    _report("  build_bars volume", lambda: build_bars(trades, "volume", 100.0), number=1)
+    _report("  build_bars dollar", lambda: build_bars(trades, "dollar", 1_000_000.0), number=1)
+    records = [binance_stream.Trade(0, "BTCUSDT", 0, *trade[1:3], trade[0], trade[3]) for trade in trades[:100_000].tolist()]
+
+    def stream():
+        builder = BarBuilder("volume", 100.0)
+        for trade in records:
+            builder.add(trade)
+        builder.flush()
+
+    stream_time = _report("  BarBuilder.add + flush (100000 trades)", stream, number=1)
+    print(f"  {len(records) / stream_time:,.0f} trades/s")
+
+
+def bench_stream_replay():
+    trade = {"e": "trade", "E": 1672515782136, "s": "BTCUSDT", "t": 12345, "p": "42000.01000000", "q": "0.00100000", "T": 1672515782136, "m": True, "M": True}
+    count = 100_000
+
+    async def consume(path):
+        async with ReplayMultiplexer(path, speed=None) as replay:
+            stream = binance_stream.trades("BTCUSDT", replay)
+            for _ in range(count):
+                await anext(stream)
+            await stream.aclose()
+
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "trades.log.gz")
+        with StreamRecorder(path) as recorder:
+            for i in range(count):
+                recorder.record("btcusdt@trade", json.dumps({**trade, "t": i}), i)
+        print(f"replay {count} recorded trade messages at max speed, log size {os.path.getsize(path) / 1e6:.1f} MB")
+        replay_time = _report("  ReplayMultiplexer + trades()", lambda: asyncio.run(consume(path)), number=1, repeat=3)
+        print(f"  {count / replay_time:,.0f} trades/s")
+
+
+def _ta_indicators(df: pd.DataFrame) -> pd.DataFrame:
+    """The btcusdt notebook indicators computed one ta call at a time."""
+    close = df["Close"]
+    macd = MACD(close, window_slow=26, window_fast=12, window_sign=9)
+    psar = PSARIndicator(df["High"], df["Low"], close, step=0.02, max_step=0.2)
+    rsi = RSIIndicator(close, window=14)
+    tsi = TSIIndicator(close, window_slow=25, window_fast=13)
+    columns = {
+        "sma_12": SMAIndicator(close, window=12).sma_indicator(),
+        "sma_26": SMAIndicator(close, window=26).sma_indicator(),
+        "ema_12": EMAIndicator(close, window=12).ema_indicator(),
+        "ema_26": EMAIndicator(close, window=26).ema_indicator(),
+        "macd": macd.macd(),
+        "macd_signal": macd.macd_signal(),
+        "macd_diff": macd.macd_diff(),
+        "psar": psar.psar(),
+        "psar_up": psar.psar_up(),
+        "psar_down": psar.psar_down(),
+        "rsi_14": rsi.rsi(),
+        "tsi_25_13": tsi.tsi(),
+    }
+    return pd.DataFrame({name: series.to_numpy() for name, series in columns.items()}, index=df.index)
+
+
+def bench_indicators():
+    for csv_filename in ("BTCUSDT-2023-1h.csv", "BTCUSDT-2024-1h.csv"):
+        # ta's PSAR assigns by label in one branch, which is only positional on a RangeIndex
+        df = load_klines(os.path.join(HISTORICAL_DIR, csv_filename)).reset_index(drop=True)
+        pd.testing.assert_frame_equal(Indicators(df).frame(), _ta_indicators(df), check_exact=False, rtol=1e-9)
+        print(f"notebook indicators on {csv_filename[:-4]} ({len(df)} rows)")
+        reference = _report("  ta, one indicator at a time", lambda: _ta_indicators(df), number=1, repeat=3)
+        current = _report("  Indicators.frame", lambda: Indicators(df).frame())
+        print(f"  speedup: {reference / current:.1f}x")
+    streaming = [StreamingSMA(12), StreamingSMA(26), StreamingEMA(12), StreamingEMA(26), StreamingMACD(), StreamingPSAR(), StreamingRSI(), StreamingTSI()]
+    df = load_klines(os.path.join(HISTORICAL_DIR, "BTCUSDT-2024-1h.csv"))
+    for indicator in streaming:
+        indicator.seed(df)
+    candle = (indicator.open_time + 3_600_000, *df[["High", "Low", "Close"]].iloc[-1].tolist())
+    print("streaming notebook indicators, one live candle update")
+    update_time = _report("  update", lambda: [indicator.update(*candle) for indicator in streaming], number=1000)
+    print(f"  {update_time * 1e6:.1f} us per candle for {len(streaming)} indicators")
+
+
+def bench_screener():
+    count = 400
+    sources = [load_klines(os.path.join(HISTORICAL_DIR, name)).iloc[-1000:] for name in ("BTCUSDT-2023-1h.csv", "BTCUSDT-2024-1h.csv", "ETHUSDT-2023-1h.csv")]
+    with tempfile.TemporaryDirectory() as root:
+        paths = {f"SYMBOL{i}USDT": screener_path(f"SYMBOL{i}USDT", "1h", root) for i in range(count)}
+        for i, path in enumerate(paths.values()):
+            sources[i % len(sources)].to_csv(path, index_label="Open Time")
+        print(f"screen {count} cached symbols of 1000 1h candles, {os.cpu_count()} cores")
+        serial = _report("  one process", lambda: screen(paths, processes=1), number=1, repeat=3)
+        parallel = _report("  process pool", lambda: screen(paths), number=1, repeat=3)
+        print(f"  speedup: {serial / parallel:.1f}x")
+
+
+def bench_backtest():
+    df = _synthetic_klines(2024)
+    indicators = Indicators(df)
+    signals = {name: strategy(indicators) for name, strategy in STRATEGIES.items()}
+    print(f"backtest on a year of 1m candles ({len(df)} rows, synthetic)")
+    for name, signal in signals.items():
+        trades = len(backtest(df, signal, slippage=0.0005)[1])
+        _report(f"  {name} ({trades} trades)", lambda: backtest(df, signal, slippage=0.0005), number=1)
+    _report("  indicators + signals of all strategies", lambda: [strategy(Indicators(df)) for strategy in STRATEGIES.values()], number=1)
+
+
+def bench_sweep():
+    df = _synthetic_klines(2024)
+    grid = parameter_grid(window_fast=[5, 10, 15, 20], window_slow=[30, 60, 90, 120, 150, 180])
+    print(f"sweep {len(grid)} sma_crossover parameters over a year of 1m candles ({len(df)} rows, synthetic), {os.cpu_count()} cores")
+    serial = _report("  one process", lambda: list(sweep(df, sma_crossover, grid, processes=1)), number=1, repeat=3)
+    parallel = _report("  process pool", lambda: list(sweep(df, sma_crossover, grid)), number=1, repeat=3)
+    print(f"  {len(grid) / parallel:,.1f} backtests/s, speedup: {serial / parallel:.1f}x")
+
+
+BENCHMARKS = {
+    "klines_to_df": bench_klines_to_df,
+    "kline_store": bench_kline_store,
+    "find_gaps": bench_find_gaps,
+    "stream_decode": bench_stream_decode,
+    "stream_dispatch": bench_stream_dispatch,
+    "order_book": bench_order_book,
+    "bars": bench_bars,
+    "stream_replay": bench_stream_replay,
+    "indicators": bench_indicators,
+    "screener": bench_screener,
+    "backtest": bench_backtest,
+    "sweep": bench_sweep,
+}
+
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or BENCHMARKS:
+        BENCHMARKS[name]()
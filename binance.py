@@ -1,198 +1,237 @@
+import os
 import json
+import asyncio
 import logging
 import warnings
-from time import sleep
+import threading
+from time import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
 
 import hmac
 import hashlib
 from urllib.parse import urlencode
 
-import requests
 import websockets
 import numpy as np
 import pandas as pd
 
+from http_client import HttpClient, AsyncHttpClient
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    import msvcrt
+
+    fcntl = None
+
 
 BASE_URL = "https://api.binance.com/api/v3/"
 BASE_URI = "wss://stream.binance.com:9443/ws/"
 HEADERS = {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/56.0.2924.87 Safari/537.36", "Accept": "application/json"}
 KLINE_INTERVALS = ("1s", "1m", "3m", "5m", "15m", "30m", "1h", "2h", "4h", "6h", "8h", "12h", "1d", "3d", "1w", "1M")
 KLINE_COLUMNS = ("Open Time", "Open", "High", "Low", "Close", "Volume", "Close Time", "Quote Asset Volume", "Number of Trades", "Taker Buy Base Asset Volume", "Taker Buy Quote Asset Volume", "Ignore")
+REQUEST_WEIGHT_LIMIT = 6000
+JOURNAL_SUFFIX = ".journal"
+LOCK_SUFFIX = ".lock"
+KLINE_DTYPES = {
+    "Open Time": np.int64,
+    "Open": np.float64,
+    "High": np.float64,
+    "Low": np.float64,
+    "Close": np.float64,
+    "Volume": np.float64,
+    "Close Time": np.int64,
+    "Quote Asset Volume": np.float64,
+    "Number of Trades": np.int64,
+    "Taker Buy Base Asset Volume": np.float64,
+    "Taker Buy Quote Asset Volume": np.float64,
+}
+
+
+class WeightRateLimiter:
+    """Request weight rate limiter for the Binance REST API.
+
+    Tracks the weight used in the current minute, both from the weight reserved locally and from the
+    X-MBX-USED-WEIGHT-1M header returned with every response, and only delays requests that would
+    push the usage above max_usage * weight_limit. A Retry-After header on a 418/429 response blocks
+    all requests until it expires.
+
+    weight_limit : integer - Request weight allowed per minute.
+    max_usage : float - Fraction of weight_limit that may be used before requests are delayed.
+    """
+
+    def __init__(self, weight_limit: int = REQUEST_WEIGHT_LIMIT, max_usage: float = 0.95):
+        self.weight_limit = weight_limit
+        self.max_usage = max_usage
+        self.used_weight = 0
+        self.window_start = 0.0
+        self.retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, weight: int = 1) -> float:
+        """Reserve weight for a request. Returns 0 if it may be sent now, otherwise the seconds to wait before trying again."""
+        with self._lock:
+            now = time()
+            self._roll_window(now)
+            if now < self.retry_at:
+                return self.retry_at - now
+            if self.used_weight and self.used_weight + weight > self.weight_limit * self.max_usage:
+                return self.window_start + 60 - now
+            self.used_weight += weight
+            return 0
+
+    def update(self, status_code: int, headers):
+        """Synchronise the limiter with the rate limit headers of a response."""
+        with self._lock:
+            now = time()
+            self._roll_window(now)
+            used_weight = headers.get("X-MBX-USED-WEIGHT-1M")
+            if used_weight is not None:
+                self.used_weight = max(self.used_weight, int(used_weight))
+            if status_code in (418, 429):
+                retry_after = headers.get("Retry-After")
+                self.retry_at = max(self.retry_at, now + (int(retry_after) if retry_after is not None else 60))
+
+    def reset(self):
+        with self._lock:
+            self.used_weight = 0
+            self.window_start = 0.0
+            self.retry_at = 0.0
+
+    def _roll_window(self, now: float):
+        window_start = now - now % 60
+        if window_start > self.window_start:
+            self.window_start = window_start
+            self.used_weight = 0
+
+
+RATE_LIMITER = WeightRateLimiter()
+CLIENT = HttpClient(BASE_URL, HEADERS, rate_limiter=RATE_LIMITER)
+ASYNC_CLIENT = AsyncHttpClient(BASE_URL, HEADERS, rate_limiter=RATE_LIMITER)
 
 
 def ping() -> dict:
     """Test connectivity to the Rest API."""
-    response = requests.get(url=BASE_URL + "ping", headers=HEADERS, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    return CLIENT.get("ping").json()
 
 
 def get_server_time() -> dict[str, int]:
     """Test connectivity to the Rest API and get the current server time."""
-    response = requests.get(url=BASE_URL + "time", headers=HEADERS, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    return CLIENT.get("time").json()
 
 
 def get_average_price(symbol: str) -> dict:
     """Get the current average price for a symbol."""
-    response = requests.get(url=BASE_URL + "avgPrice", headers=HEADERS, params={"symbol": symbol}, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    return CLIENT.get("avgPrice", params={"symbol": symbol}, weight=2).json()
 
 
 def get_latest_price(symbol: str) -> dict[str, str]:
     """Get the latest price for a symbol."""
-    response = requests.get(url=BASE_URL + "ticker/price", headers=HEADERS, params={"symbol": symbol}, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    return CLIENT.get("ticker/price", params={"symbol": symbol}, weight=2).json()
 
 
 def get_exchange_info() -> dict:
     """Get current exchange trading rules and symbol information."""
-    response = requests.get(url=BASE_URL + "exchangeInfo", headers=HEADERS, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    return CLIENT.get("exchangeInfo", weight=20).json()
 
 
 def get_exchange_info_for_symbol(symbol: str) -> dict:
     """Get current exchange trading rules and information for symbol."""
-    response = requests.get(url=BASE_URL + "exchangeInfo", headers=HEADERS, params={"symbol": symbol}, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    return CLIENT.get("exchangeInfo", params={"symbol": symbol}, weight=20).json()
 
 
 def get_exchange_info_for_symbols(symbols: list[str]) -> dict:
     """Get current exchange trading rules and information for symbols."""
-    params = {"symbols": f"[{','.join(f'\"{i}\"' for i in symbols)}]"}
+    params = {"symbols": _symbols_param(symbols)}
     params = urlencode(params).replace("%2C", ",")
-    response = requests.get(url=BASE_URL + "exchangeInfo", headers=HEADERS, params=params, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    return CLIENT.get("exchangeInfo", params=params, weight=20).json()
 
 
 def get_24hr_ticker(request_type: str = "MINI") -> list[dict]:
     """24 hour rolling window price change statistics."""
-    if request_type not in ("FULL", "MINI"):
-        raise ValueError(f"Invalid type: '{request_type}'. Supported types: FULL, MINI")
-    response = requests.get(url=BASE_URL + "ticker/24hr", headers=HEADERS, params={"type": request_type}, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    _check_request_type(request_type)
+    return CLIENT.get("ticker/24hr", params={"type": request_type}, weight=80).json()
 
 
 def get_24hr_ticker_for_symbol(symbol: str, request_type: str = "MINI") -> dict:
     """24 hour rolling window price change statistics for symbol."""
-    if request_type not in ("FULL", "MINI"):
-        raise ValueError(f"Invalid type: '{request_type}'. Supported types: FULL, MINI")
-    response = requests.get(url=BASE_URL + "ticker/24hr", headers=HEADERS, params={"type": request_type, "symbol": symbol}, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    _check_request_type(request_type)
+    return CLIENT.get("ticker/24hr", params={"type": request_type, "symbol": symbol}, weight=2).json()
 
 
 def get_24hr_ticker_for_symbols(symbols: list[str], request_type: str = "MINI") -> list[dict]:
     """24 hour rolling window price change statistics for symbols."""
-    if request_type not in ("FULL", "MINI"):
-        raise ValueError(f"Invalid type: '{request_type}'. Supported types: FULL, MINI")
-    params = {"type": request_type, "symbols": f"[{','.join(f'\"{i}\"' for i in symbols)}]"}
+    _check_request_type(request_type)
+    params = {"type": request_type, "symbols": _symbols_param(symbols)}
     params = urlencode(params).replace("%2C", ",")
-    response = requests.get(url=BASE_URL + "ticker/24hr", headers=HEADERS, params=params, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    return CLIENT.get("ticker/24hr", params=params, weight=_ticker_24hr_weight(len(symbols))).json()
 
 
 def get_trading_day_ticker_for_symbol(symbol: str, request_type: str = "MINI") -> dict:
     """Price change statistics for a trading day for symbol."""
-    if request_type not in ("FULL", "MINI"):
-        raise ValueError(f"Invalid type: '{request_type}'. Supported types: FULL, MINI")
-    response = requests.get(url=BASE_URL + "ticker/tradingDay", headers=HEADERS, params={"type": request_type, "symbol": symbol}, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    _check_request_type(request_type)
+    return CLIENT.get("ticker/tradingDay", params={"type": request_type, "symbol": symbol}, weight=4).json()
 
 
 def get_trading_day_ticker_for_symbols(symbols: list[str], request_type: str = "MINI") -> list[dict]:
     """Price change statistics for a trading day for symbols."""
-    if request_type not in ("FULL", "MINI"):
-        raise ValueError(f"Invalid type: '{request_type}'. Supported types: FULL, MINI")
-    params = {"type": request_type, "symbols": f"[{','.join(f'\"{i}\"' for i in symbols)}]"}
+    _check_request_type(request_type)
+    params = {"type": request_type, "symbols": _symbols_param(symbols)}
     params = urlencode(params).replace("%2C", ",")
-    response = requests.get(url=BASE_URL + "ticker/tradingDay", headers=HEADERS, params=params, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    return CLIENT.get("ticker/tradingDay", params=params, weight=min(4 * len(symbols), 200)).json()
 
 
 def get_price_ticker_for_symbol(symbol: str) -> dict:
     """Latest price for symbol."""
-    response = requests.get(url=BASE_URL + "ticker/price", headers=HEADERS, params={"symbol": symbol}, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    return CLIENT.get("ticker/price", params={"symbol": symbol}, weight=2).json()
 
 
 def get_price_ticker_for_symbols(symbols: list[str]) -> list[dict]:
     """Latest price for symbols."""
-    params = {"symbols": f"[{','.join(f'\"{i}\"' for i in symbols)}]"}
+    params = {"symbols": _symbols_param(symbols)}
     params = urlencode(params).replace("%2C", ",")
-    response = requests.get(url=BASE_URL + "ticker/price", headers=HEADERS, params=params, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    return CLIENT.get("ticker/price", params=params, weight=4).json()
 
 
 def get_order_book_ticker_for_symbol(symbol: str) -> dict:
     """Best price/qty on the order book for symbol."""
-    response = requests.get(url=BASE_URL + "ticker/bookTicker", headers=HEADERS, params={"symbol": symbol}, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    return CLIENT.get("ticker/bookTicker", params={"symbol": symbol}, weight=2).json()
 
 
 def get_order_book_ticker_for_symbols(symbols: list[str]) -> list[dict]:
     """Best price/qty on the order book for symbols."""
-    params = {"symbols": f"[{','.join(f'\"{i}\"' for i in symbols)}]"}
+    params = {"symbols": _symbols_param(symbols)}
     params = urlencode(params).replace("%2C", ",")
-    response = requests.get(url=BASE_URL + "ticker/bookTicker", headers=HEADERS, params=params, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    return CLIENT.get("ticker/bookTicker", params=params, weight=4).json()
 
 
 def get_rolling_ticker_for_symbol(symbol: str, window_size: str = "1d", request_type: str = "MINI") -> dict:
     """Rolling window price change statistics for symbol."""
-    if request_type not in ("FULL", "MINI"):
-        raise ValueError(f"Invalid type: '{request_type}'. Supported types: FULL, MINI")
-    win_sizes = [f"{i}m" for i in range(1, 60)] + [f"{i}h" for i in range(1, 24)] + [f"{i}d" for i in range(1, 8)]
-    if window_size not in win_sizes:
-        raise ValueError(f"Invalid window size: '{window_size}'")
-    response = requests.get(
-        url=BASE_URL + "ticker",
-        headers=HEADERS,
-        params={"type": request_type, "symbol": symbol, "windowSize": window_size},
-        timeout=10,
-    )
-    response.raise_for_status()
-    return response.json()
+    _check_request_type(request_type)
+    _check_window_size(window_size)
+    return CLIENT.get("ticker", params={"type": request_type, "symbol": symbol, "windowSize": window_size}, weight=4).json()
 
 
 def get_rolling_ticker_for_symbols(symbols: list[str], window_size: str = "1d", request_type: str = "MINI") -> list[dict]:
     """Rolling window price change statistics for symbols."""
-    if request_type not in ("FULL", "MINI"):
-        raise ValueError(f"Invalid type: '{request_type}'. Supported types: FULL, MINI")
-    win_sizes = [f"{i}m" for i in range(1, 60)] + [f"{i}h" for i in range(1, 24)] + [f"{i}d" for i in range(1, 8)]
-    if window_size not in win_sizes:
-        raise ValueError(f"Invalid window size: '{window_size}'")
-    params = {"type": request_type, "symbols": f"[{','.join(f'\"{i}\"' for i in symbols)}]", "windowSize": window_size}
+    _check_request_type(request_type)
+    _check_window_size(window_size)
+    params = {"type": request_type, "symbols": _symbols_param(symbols), "windowSize": window_size}
     params = urlencode(params).replace("%2C", ",")
-    response = requests.get(url=BASE_URL + "ticker", headers=HEADERS, params=params, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    return CLIENT.get("ticker", params=params, weight=min(4 * len(symbols), 200)).json()
 
 
 def get_account_info(api_key: str, api_secret: str, omit_zero_balances: bool = True) -> dict:
     """Get current account information."""
-    headers = HEADERS.copy()
-    headers["X-MBX-APIKEY"] = api_key
-    params = {"omitZeroBalances": str(omit_zero_balances).lower(), "timestamp": int(datetime.now().timestamp() * 1000)}
-    params["signature"] = _generate_signature(api_secret, params)
-    response = requests.get(url=BASE_URL + "account", headers=headers, params=params, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    headers = {"X-MBX-APIKEY": api_key}
+    return CLIENT.get("account", params=_account_params(api_secret, omit_zero_balances), headers=headers, weight=20).json()
+
+
+def get_order_book(symbol: str, limit: int = 100) -> dict:
+    """Get the order book of a symbol, up to limit levels (max 5000) per side."""
+    return CLIENT.get("depth", params=_order_book_params(symbol, limit), weight=_order_book_weight(limit)).json()
 
 
 def get_klines(
@@ -204,61 +243,211 @@ def get_klines(
     endpoint: str = "klines",
 ) -> list[list]:
     """Get Kline/candlestick bars for a symbol. Klines are uniquely identified by their open time."""
+    params = _klines_params(symbol, interval, start_time, end_time, limit, endpoint)
+    return CLIENT.get(endpoint, params=params, weight=2).json()
 
-    if interval not in KLINE_INTERVALS:
-        raise ValueError(f"Invalid interval: {interval}. Supported intervals: {KLINE_INTERVALS}")
 
-    if endpoint not in ("klines", "uiKlines"):
-        raise ValueError(f"Invalid endpoint: {endpoint}. Supported endpoints: klines, uiKlines")
+def get_klines_for_year(symbol: str, year: int, interval: str = "1d", max_workers: int = 1) -> list[list]:
+    """Get historical kline/candlestick bars for a symbol for a year.
+    max_workers : integer - Number of pages downloaded concurrently. Pages are always returned in order.
+    """
+    time_frames = _generate_timeframes(f"{year}-01-01 00:00:00", f"{year}-12-31 23:00:00", interval, 500)
+    return _get_klines_for_timeframes(symbol, interval, time_frames, max_workers)
 
-    if limit not in range(1, 1001):
-        raise ValueError(f"Invalid limit: {limit}. Supported limits: 1-1000")
 
-    params = {"symbol": symbol, "interval": interval, "limit": limit}
+async def ping_async() -> dict:
+    """Test connectivity to the Rest API."""
+    return await ASYNC_CLIENT.get_json("ping")
 
-    if start_time:
-        params["startTime"] = _datetime_str_to_utc_milliseconds(start_time)
 
-    if end_time:
-        params["endTime"] = _datetime_str_to_utc_milliseconds(end_time)
+async def get_server_time_async() -> dict[str, int]:
+    """Test connectivity to the Rest API and get the current server time."""
+    return await ASYNC_CLIENT.get_json("time")
+
+
+async def get_average_price_async(symbol: str) -> dict:
+    """Get the current average price for a symbol."""
+    return await ASYNC_CLIENT.get_json("avgPrice", params={"symbol": symbol}, weight=2)
+
+
+async def get_latest_price_async(symbol: str) -> dict[str, str]:
+    """Get the latest price for a symbol."""
+    return await ASYNC_CLIENT.get_json("ticker/price", params={"symbol": symbol}, weight=2)
+
+
+async def get_exchange_info_async() -> dict:
+    """Get current exchange trading rules and symbol information."""
+    return await ASYNC_CLIENT.get_json("exchangeInfo", weight=20)
+
+
+async def get_exchange_info_for_symbol_async(symbol: str) -> dict:
+    """Get current exchange trading rules and information for symbol."""
+    return await ASYNC_CLIENT.get_json("exchangeInfo", params={"symbol": symbol}, weight=20)
+
+
+async def get_exchange_info_for_symbols_async(symbols: list[str]) -> dict:
+    """Get current exchange trading rules and information for symbols."""
+    return await ASYNC_CLIENT.get_json("exchangeInfo", params={"symbols": _symbols_param(symbols)}, weight=20)
+
+
+async def get_24hr_ticker_async(request_type: str = "MINI") -> list[dict]:
+    """24 hour rolling window price change statistics."""
+    _check_request_type(request_type)
+    return await ASYNC_CLIENT.get_json("ticker/24hr", params={"type": request_type}, weight=80)
+
+
+async def get_24hr_ticker_for_symbol_async(symbol: str, request_type: str = "MINI") -> dict:
+    """24 hour rolling window price change statistics for symbol."""
+    _check_request_type(request_type)
+    return await ASYNC_CLIENT.get_json("ticker/24hr", params={"type": request_type, "symbol": symbol}, weight=2)
+
+
+async def get_24hr_ticker_for_symbols_async(symbols: list[str], request_type: str = "MINI") -> list[dict]:
+    """24 hour rolling window price change statistics for symbols."""
+    _check_request_type(request_type)
+    return await ASYNC_CLIENT.get_json("ticker/24hr", params={"type": request_type, "symbols": _symbols_param(symbols)}, weight=_ticker_24hr_weight(len(symbols)))
+
+
+async def get_trading_day_ticker_for_symbol_async(symbol: str, request_type: str = "MINI") -> dict:
+    """Price change statistics for a trading day for symbol."""
+    _check_request_type(request_type)
+    return await ASYNC_CLIENT.get_json("ticker/tradingDay", params={"type": request_type, "symbol": symbol}, weight=4)
+
+
+async def get_trading_day_ticker_for_symbols_async(symbols: list[str], request_type: str = "MINI") -> list[dict]:
+    """Price change statistics for a trading day for symbols."""
+    _check_request_type(request_type)
+    return await ASYNC_CLIENT.get_json("ticker/tradingDay", params={"type": request_type, "symbols": _symbols_param(symbols)}, weight=min(4 * len(symbols), 200))
+
+
+async def get_price_ticker_for_symbol_async(symbol: str) -> dict:
+    """Latest price for symbol."""
+    return await ASYNC_CLIENT.get_json("ticker/price", params={"symbol": symbol}, weight=2)
+
 
-    response = requests.get(url=BASE_URL + endpoint, headers=HEADERS, params=params, timeout=10)
-    response.raise_for_status()
+async def get_price_ticker_for_symbols_async(symbols: list[str]) -> list[dict]:
+    """Latest price for symbols."""
+    return await ASYNC_CLIENT.get_json("ticker/price", params={"symbols": _symbols_param(symbols)}, weight=4)
+
+
+async def get_order_book_ticker_for_symbol_async(symbol: str) -> dict:
+    """Best price/qty on the order book for symbol."""
+    return await ASYNC_CLIENT.get_json("ticker/bookTicker", params={"symbol": symbol}, weight=2)
+
+
+async def get_order_book_ticker_for_symbols_async(symbols: list[str]) -> list[dict]:
+    """Best price/qty on the order book for symbols."""
+    return await ASYNC_CLIENT.get_json("ticker/bookTicker", params={"symbols": _symbols_param(symbols)}, weight=4)
+
+
+async def get_rolling_ticker_for_symbol_async(symbol: str, window_size: str = "1d", request_type: str = "MINI") -> dict:
+    """Rolling window price change statistics for symbol."""
+    _check_request_type(request_type)
+    _check_window_size(window_size)
+    return await ASYNC_CLIENT.get_json("ticker", params={"type": request_type, "symbol": symbol, "windowSize": window_size}, weight=4)
 
-    return response.json()
+
+async def get_rolling_ticker_for_symbols_async(symbols: list[str], window_size: str = "1d", request_type: str = "MINI") -> list[dict]:
+    """Rolling window price change statistics for symbols."""
+    _check_request_type(request_type)
+    _check_window_size(window_size)
+    params = {"type": request_type, "symbols": _symbols_param(symbols), "windowSize": window_size}
+    return await ASYNC_CLIENT.get_json("ticker", params=params, weight=min(4 * len(symbols), 200))
+
+
+async def get_account_info_async(api_key: str, api_secret: str, omit_zero_balances: bool = True) -> dict:
+    """Get current account information."""
+    headers = {"X-MBX-APIKEY": api_key}
+    return await ASYNC_CLIENT.get_json("account", params=_account_params(api_secret, omit_zero_balances), headers=headers, weight=20)
+
+
+async def get_order_book_async(symbol: str, limit: int = 100) -> dict:
+    """Get the order book of a symbol, up to limit levels (max 5000) per side."""
+    return await ASYNC_CLIENT.get_json("depth", params=_order_book_params(symbol, limit), weight=_order_book_weight(limit))
+
+
+async def get_klines_async(
+    symbol: str,
+    interval: str = "1h",
+    start_time: str | None = None,
+    end_time: str | None = None,
+    limit: int = 500,
+    endpoint: str = "klines",
+) -> list[list]:
+    """Get Kline/candlestick bars for a symbol. Klines are uniquely identified by their open time."""
+    params = _klines_params(symbol, interval, start_time, end_time, limit, endpoint)
+    return await ASYNC_CLIENT.get_json(endpoint, params=params, weight=2)
 
 
-def get_klines_for_year(symbol: str, year: int, interval: str = "1d") -> list[list]:
-    """Get historical kline/candlestick bars for a symbol for a year."""
-    klines = []
+async def get_klines_for_year_async(symbol: str, year: int, interval: str = "1d") -> list[list]:
+    """Get historical kline/candlestick bars for a symbol for a year. All pages are requested concurrently."""
     time_frames = _generate_timeframes(f"{year}-01-01 00:00:00", f"{year}-12-31 23:00:00", interval, 500)
-    for start_time, end_time in time_frames:
-        klines += get_klines(symbol, interval, start_time, end_time)
-        sleep(1)
-    return klines
+    pages = await asyncio.gather(*(get_klines_async(symbol, interval, start_time, end_time) for start_time, end_time in time_frames))
+    return [kline for page in pages for kline in page]
 
 
 def klines_to_df(klines: list[list]) -> pd.DataFrame:
-    df = pd.DataFrame(klines)
-    df.columns = KLINE_COLUMNS
-    df.drop(df.columns[-1], axis=1, inplace=True)
-    df["Open Time"] = pd.to_datetime(df["Open Time"], unit="ms", utc=True)
-    df["Close Time"] = pd.to_datetime(df["Close Time"], unit="ms", utc=True)
-    df["Open"] = pd.to_numeric(df["Open"])
-    df["High"] = pd.to_numeric(df["High"])
-    df["Low"] = pd.to_numeric(df["Low"])
-    df["Close"] = pd.to_numeric(df["Close"])
-    df["Volume"] = pd.to_numeric(df["Volume"])
-    df["Quote Asset Volume"] = pd.to_numeric(df["Quote Asset Volume"])
-    df["Number of Trades"] = pd.to_numeric(df["Number of Trades"])
-    df["Taker Buy Base Asset Volume"] = pd.to_numeric(df["Taker Buy Base Asset Volume"])
-    df["Taker Buy Quote Asset Volume"] = pd.to_numeric(df["Taker Buy Quote Asset Volume"])
-    df.set_index("Open Time", inplace=True)
-    return df
+    """Convert raw klines into a DataFrame indexed by open time.
+    Each field is parsed in a single pass straight into a typed NumPy column and the DataFrame is built around those columns without copying them.
+    """
+    fields = zip(*klines) if klines else [()] * len(KLINE_DTYPES)
+    columns = {name: np.array(values, dtype=dtype) for (name, dtype), values in zip(KLINE_DTYPES.items(), fields)}
+    index = pd.DatetimeIndex(columns.pop("Open Time").view("datetime64[ms]"), name="Open Time").tz_localize("UTC")
+    columns["Close Time"] = pd.DatetimeIndex(columns["Close Time"].view("datetime64[ms]")).tz_localize("UTC")
+    return pd.DataFrame(columns, index=index, copy=False)
 
 
 def load_klines(csv_filepath: str) -> pd.DataFrame:
-    return pd.read_csv(csv_filepath, index_col=0, parse_dates=True)
+    _recover_interrupted_append(csv_filepath)
+    with _cache_lock(csv_filepath, shared=True):
+        return pd.read_csv(csv_filepath, index_col=0, parse_dates=True)
+
+
+def append_klines(csv_filepath: str, df: pd.DataFrame):
+    """Append klines to a csv kline cache written by update_klines or to_csv(index_label="Open Time").
+    Stored rows with an open time at or after the first new row are replaced. Only the tail of the file is read and rewritten.
+
+    The new tail is journaled next to the cache before the file is touched, so an interrupted append is completed
+    on the next access instead of leaving a torn file. The whole append holds the exclusive lock of the cache, so
+    readers never see a half written tail and never complete a journal the append is still applying.
+    """
+    if df.empty:
+        return
+    with _cache_lock(csv_filepath):
+        _recover_append(csv_filepath)
+        offset = _tail_offset(csv_filepath, df.index[0])
+        journal_filepath = csv_filepath + JOURNAL_SUFFIX
+        with open(journal_filepath + ".tmp", "wb") as f:
+            f.write(offset.to_bytes(8, "little") + df.to_csv(header=False).encode())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(journal_filepath + ".tmp", journal_filepath)
+        _apply_journal(csv_filepath, journal_filepath)
+
+
+def write_new_cache(csv_filepath: str, df: pd.DataFrame):
+    """Write klines to a new csv kline cache, creating its directory. The file is written and synced under
+    another name, then moved in place, so the cache either does not exist or holds every row.
+    """
+    os.makedirs(os.path.dirname(csv_filepath) or ".", exist_ok=True)
+    with _cache_lock(csv_filepath):
+        _replace_cache(csv_filepath, df)
+
+
+def _replace_cache(csv_filepath: str, df: pd.DataFrame):
+    """Atomically replace the content of a csv kline cache. The caller holds its exclusive lock."""
+    tmp_filepath = csv_filepath + ".tmp"
+    df.to_csv(tmp_filepath, index_label="Open Time")
+    with open(tmp_filepath, "rb+") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_filepath, csv_filepath)
+    # the rename itself is only durable once the directory is synced
+    if os.name == "posix":
+        directory = os.open(os.path.dirname(csv_filepath) or ".", os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
 
 
 def klines_df_check(df: pd.DataFrame):
@@ -274,47 +463,278 @@ def klines_df_check(df: pd.DataFrame):
         warnings.warn(f"The dataframe contains duplicate rows. {df.index[df.duplicated()]}")
 
     # check for missing timestamps
-    date_range = pd.date_range(
-        start=df.index.min(),
-        end=df.index.max(),
-        freq=_timedelta_to_interval_str(df.index[1] - df.index[0], pandas_friendly=True),
-    )
-    missing_dates = date_range.difference(df.index)
-    if not missing_dates.empty:
-        warnings.warn(f"The DataFrame is missing entries. {missing_dates}")
+    index = df.index if df.index.is_monotonic_increasing else df.index.sort_values()
+    gaps = find_gaps(index, df.index[1] - df.index[0])
+    if gaps:
+        warnings.warn(f"The DataFrame is missing entries. {', '.join(f'{start} to {end}' for start, end in gaps)}")
 
 
-def update_klines(csv_filepath: str, symbol: str, interval: str) -> pd.DataFrame:
+def find_gaps(index: pd.DatetimeIndex, interval: str | timedelta) -> list[tuple[pd.Timestamp, pd.Timestamp]]:
+    """Find the missing candles of a sorted kline index in a single pass over the open time differences.
+    Returns one (first missing open time, last missing open time) pair per gap.
+    """
+    step = _interval_str_to_timedelta(interval) if isinstance(interval, str) else interval
+    step_ms = int(pd.Timedelta(step).total_seconds() * 1000)
+    open_times = pd.DatetimeIndex(index).as_unit("ms").asi8
+    breaks = np.flatnonzero(np.diff(open_times) > step_ms)
+    starts = pd.to_datetime(open_times[breaks] + step_ms, unit="ms", utc=True)
+    ends = pd.to_datetime(open_times[breaks + 1] - step_ms, unit="ms", utc=True)
+    return list(zip(starts, ends))
+
+
+def get_klines_for_gaps(symbol: str, interval: str, gaps: list[tuple], max_workers: int = 1) -> pd.DataFrame:
+    """Download exactly the candles of the gaps returned by find_gaps."""
+    step = _interval_str_to_timedelta(interval)
+    time_frames = [
+        time_frame
+        for start, end in gaps
+        for time_frame in _generate_timeframes(start.strftime("%Y-%m-%d %H:%M:%S"), (end + step).strftime("%Y-%m-%d %H:%M:%S"), interval, limit=500)
+    ]
+    df = klines_to_df(_get_klines_for_timeframes(symbol, interval, time_frames, max_workers))
+    in_gaps = np.zeros(len(df), dtype=bool)
+    for start, end in gaps:
+        in_gaps |= (df.index >= start) & (df.index <= end)
+    return df[in_gaps]
+
+
+def repair_klines(csv_filepath: str, symbol: str, interval: str, max_workers: int = 1) -> pd.DataFrame:
+    """Fill the gaps of a csv kline cache with the missing candles and return its content.
+    Gaps the exchange has no data for (e.g. during maintenance) are logged and left as they are.
+    """
     df = load_klines(csv_filepath)
-    last_entry_date = df.index[-1]
+    gaps = find_gaps(df.index, interval)
+    if not gaps:
+        return df
+
+    logging.info("Repairing %s gaps in %s %s data...", len(gaps), symbol, interval)
+    new_data = get_klines_for_gaps(symbol, interval, gaps, max_workers)
+    # the file is read again under the lock, so candles appended during the download are kept
+    with _cache_lock(csv_filepath):
+        _recover_append(csv_filepath)
+        df = pd.read_csv(csv_filepath, index_col=0, parse_dates=True)
+        df = pd.concat([df, new_data[~new_data.index.isin(df.index)]]).sort_index()
+        _replace_cache(csv_filepath, df)
+
+    remaining_gaps = find_gaps(df.index, interval)
+    if remaining_gaps:
+        logging.warning("No data available for %s %s gaps: %s", symbol, interval, remaining_gaps)
+    return load_klines(csv_filepath)
+
+
+def update_klines(csv_filepath: str, symbol: str, interval: str, max_workers: int = 1) -> pd.DataFrame:
+    """Bring a csv kline cache up to date and return the candles written, as klines_to_df returns them.
+    The last stored candle, which may have been incomplete, is replaced and the newer candles are appended,
+    so the file is never rewritten as a whole, nor read back: use load_klines for the whole content.
+    """
+    last_entry_date = read_last_open_time(csv_filepath)
     datetime_now = datetime.now(timezone.utc)
 
     if not datetime_now - last_entry_date > _interval_str_to_timedelta(interval):
         logging.info("data is up to date")
+        return klines_to_df([])
+
+    logging.info("Updating %s %s data...", symbol, interval)
+
+    time_frames = _generate_timeframes(
+        start_time=f"{last_entry_date.strftime('%Y-%m-%d %H:%M:%S')}",
+        end_time=f"{datetime_now.strftime('%Y-%m-%d %H:%M:%S')}",
+        interval=interval,
+        limit=500,
+    )
 
+    new_data = klines_to_df(_get_klines_for_timeframes(symbol, interval, time_frames, max_workers))
+    new_data = new_data[new_data.index >= last_entry_date]
+    append_klines(csv_filepath, new_data)
+    return new_data
+
+
+def read_last_open_time(csv_filepath: str) -> pd.Timestamp:
+    """Open time of the last candle of a csv kline cache, read from the end of the file.
+    An interrupted append is completed first.
+    """
+    _recover_interrupted_append(csv_filepath)
+    with _cache_lock(csv_filepath, shared=True):
+        return _read_last_open_time(csv_filepath)
+
+
+def _get_klines_for_timeframes(symbol: str, interval: str, time_frames: list[tuple], max_workers: int = 1) -> list[list]:
+
+    def download(time_frame: tuple) -> list[list]:
+        start_time, end_time = time_frame
+        logging.info("Downloading %s %s data from %s to %s...", symbol, interval, start_time, end_time)
+        return get_klines(symbol, interval, start_time, end_time)
+
+    if max_workers <= 1:
+        pages = map(download, time_frames)
+        return [kline for page in pages for kline in page]
+
+    # more threads than pooled connections would open connections that the pool then discards
+    with ThreadPoolExecutor(max_workers=min(max_workers, CLIENT.pool_maxsize)) as executor:
+        pages = executor.map(download, time_frames)
+        return [kline for page in pages for kline in page]
+
+
+def _iter_lines_reversed(filepath: str, block_size: int = 1 << 16):
+    """Yield (offset, line) for every non empty line of a file, starting from the end and reading it in blocks."""
+    with open(filepath, "rb") as f:
+        position = f.seek(0, os.SEEK_END)
+        remainder = b""
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            lines = (f.read(read_size) + remainder).split(b"\n")
+            remainder = lines.pop(0)
+            offset = position + len(remainder) + 1
+            offsets = []
+            for line in lines:
+                offsets.append(offset)
+                offset += len(line) + 1
+            for offset, line in zip(reversed(offsets), reversed(lines)):
+                if line:
+                    yield offset, line
+        if remainder:
+            yield 0, remainder
+
+
+def _read_last_open_time(csv_filepath: str) -> pd.Timestamp:
+    for _, line in _iter_lines_reversed(csv_filepath):
+        return pd.Timestamp(line.split(b",", 1)[0].decode())
+    raise ValueError(f"No klines found in {csv_filepath}")
+
+
+def _tail_offset(csv_filepath: str, open_time: pd.Timestamp) -> int:
+    """Byte offset right after the last row (or the header) that opens before open_time."""
+    for offset, line in _iter_lines_reversed(csv_filepath):
+        first_field = line.split(b",", 1)[0].decode()
+        if first_field == "Open Time" or pd.Timestamp(first_field) < open_time:
+            return offset + len(line) + 1
+    return 0
+
+
+@contextmanager
+def _cache_lock(csv_filepath: str, shared: bool = False):
+    """Hold the advisory lock of a csv kline cache: exclusive to write it or complete its journal, shared to read it.
+    The lock is taken on a file next to the cache, since the cache itself is replaced when it is rewritten.
+    Only writers create the lock file: a cache without one has never been written here and is read unlocked,
+    so reading needs no write access to the cache directory.
+    """
+    lock_filepath = csv_filepath + LOCK_SUFFIX
+    if shared:
+        try:
+            f = open(lock_filepath, "rb")
+        except FileNotFoundError:
+            yield
+            return
     else:
-        logging.info("Updating %s %s data...", symbol, interval)
-
-        new_data = []
-        time_frames = _generate_timeframes(
-            start_time=f"{last_entry_date.strftime('%Y-%m-%d %H:%M:%S')}",
-            end_time=f"{datetime_now.strftime('%Y-%m-%d %H:%M:%S')}",
-            interval=interval,
-            limit=500,
-        )
+        f = open(lock_filepath, "ab")
+    with f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        else:
+            # msvcrt has no shared locks and gives up after 10 attempts, readers lock exclusively and retry
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass
+        yield
+
+
+def _recover_interrupted_append(csv_filepath: str):
+    """Complete an interrupted append before a read. The exclusive lock is only taken if a journal is left."""
+    if os.path.exists(csv_filepath + JOURNAL_SUFFIX):
+        with _cache_lock(csv_filepath):
+            _recover_append(csv_filepath)
+
+
+def _apply_journal(csv_filepath: str, journal_filepath: str):
+    with open(journal_filepath, "rb") as f:
+        offset = int.from_bytes(f.read(8), "little")
+        data = f.read()
+    with open(csv_filepath, "r+b") as f:
+        f.truncate(offset)
+        f.seek(offset)
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.remove(journal_filepath)
+
+
+def _recover_append(csv_filepath: str):
+    """Complete an append that was interrupted after its journal was written. The caller holds the exclusive lock."""
+    journal_filepath = csv_filepath + JOURNAL_SUFFIX
+    if os.path.exists(journal_filepath):
+        logging.warning("Completing an interrupted append to %s", csv_filepath)
+        _apply_journal(csv_filepath, journal_filepath)
+
+
+def _check_request_type(request_type: str):
+    if request_type not in ("FULL", "MINI"):
+        raise ValueError(f"Invalid type: '{request_type}'. Supported types: FULL, MINI")
+
+
+def _ticker_24hr_weight(num_symbols: int) -> int:
+    if num_symbols <= 20:
+        return 2
+    if num_symbols <= 100:
+        return 40
+    return 80
+
 
-        for start_time, end_time in time_frames:
-            logging.info("Downloading %s %s data from %s to %s...", symbol, interval, start_time, end_time)
-            new_data += get_klines(symbol, interval, start_time, end_time)
-            sleep(1)
+def _check_window_size(window_size: str):
+    win_sizes = [f"{i}m" for i in range(1, 60)] + [f"{i}h" for i in range(1, 24)] + [f"{i}d" for i in range(1, 8)]
+    if window_size not in win_sizes:
+        raise ValueError(f"Invalid window size: '{window_size}'")
+
+
+def _order_book_params(symbol: str, limit: int) -> dict:
+    if limit not in range(1, 5001):
+        raise ValueError(f"Invalid limit: {limit}. Supported limits: 1-5000")
+    return {"symbol": symbol, "limit": limit}
 
-        new_data = klines_to_df(new_data)
 
-        df = pd.concat([df, new_data])
-        df = df[~df.index.duplicated(keep="last")]
-        df.to_csv(csv_filepath, index_label="Open Time")
+def _order_book_weight(limit: int) -> int:
+    if limit <= 100:
+        return 5
+    if limit <= 500:
+        return 25
+    if limit <= 1000:
+        return 50
+    return 250
+
+
+def _symbols_param(symbols: list[str]) -> str:
+    return f"[{','.join(f'\"{i}\"' for i in symbols)}]"
+
+
+def _account_params(api_secret: str, omit_zero_balances: bool) -> dict:
+    params = {"omitZeroBalances": str(omit_zero_balances).lower(), "timestamp": int(datetime.now().timestamp() * 1000)}
+    params["signature"] = _generate_signature(api_secret, params)
+    return params
+
+
+def _klines_params(symbol: str, interval: str, start_time: str | None, end_time: str | None, limit: int, endpoint: str) -> dict:
+    if interval not in KLINE_INTERVALS:
+        raise ValueError(f"Invalid interval: {interval}. Supported intervals: {KLINE_INTERVALS}")
+
+    if endpoint not in ("klines", "uiKlines"):
+        raise ValueError(f"Invalid endpoint: {endpoint}. Supported endpoints: klines, uiKlines")
+
+    if limit not in range(1, 1001):
+        raise ValueError(f"Invalid limit: {limit}. Supported limits: 1-1000")
+
+    params = {"symbol": symbol, "interval": interval, "limit": limit}
+
+    if start_time:
+        params["startTime"] = _datetime_str_to_utc_milliseconds(start_time)
+
+    if end_time:
+        params["endTime"] = _datetime_str_to_utc_milliseconds(end_time)
 
-    return df
+    return params
 
 
 def _generate_signature(api_secret: str, params: dict) -> str:
@@ -373,7 +793,7 @@ def _timedelta_to_interval_str(timedelta_obj: timedelta, pandas_friendly: bool =
     return f"{seconds // (60 * 60 * 24 * 7)}W" if pandas_friendly else f"{seconds // (60 * 60 * 24 * 7)}w"
 
 
-async def listen_to_average_price(symbol_pair: str = "btcusdt"):
+async def listen_to_average_price(symbol_pair: str = "btcusdt", recorder=None):
     """Listen to average price for a symbol pair.
     Average price streams push changes in the average price over a fixed time interval.
 
@@ -397,11 +817,13 @@ async def listen_to_average_price(symbol_pair: str = "btcusdt"):
         print(f"Connected to Binance WebSocket for {symbol_pair} avgPrice.")
         while True:
             message = await websocket.recv()
+            if recorder is not None:
+                recorder.record(f"{symbol_pair}@avgPrice", message)
             data = json.loads(message)
             print(f"avgPrice: {data}")
 
 
-async def listen_to_trades(symbol_pair: str = "btcusdt"):
+async def listen_to_trades(symbol_pair: str = "btcusdt", recorder=None):
     """Listen to trades for a symbol pair.
     The Trade Streams push raw trade information; each trade has a unique buyer and seller.
 
@@ -428,11 +850,13 @@ async def listen_to_trades(symbol_pair: str = "btcusdt"):
         print(f"Connected to Binance WebSocket for {symbol_pair} trades.")
         while True:
             message = await websocket.recv()
+            if recorder is not None:
+                recorder.record(f"{symbol_pair}@trade", message)
             data = json.loads(message)
             print(f"Trade: {data}")
 
 
-async def listen_to_klines(symbol_pair: str = "btcusdt", interval: str = "1m"):
+async def listen_to_klines(symbol_pair: str = "btcusdt", interval: str = "1m", recorder=None):
     """Listen to klines for a symbol pair.
     The Kline/Candlestick Stream push updates to the current klines/candlestick every second in UTC+0 timezone
 
@@ -476,6 +900,8 @@ async def listen_to_klines(symbol_pair: str = "btcusdt", interval: str = "1m"):
         print(f"Connected to Binance WebSocket for {symbol_pair} {interval} klines.")
         while True:
             message = await websocket.recv()
+            if recorder is not None:
+                recorder.record(f"{symbol_pair}@kline_{interval}", message)
             data = json.loads(message)
             print(f"Klines: {data}")
 
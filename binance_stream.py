@@ -0,0 +1,747 @@
+"""Binance websocket market streams multiplexed over combined-stream connections.
+
+Every connection carries up to MAX_STREAMS_PER_CONNECTION streams, added and removed with SUBSCRIBE/UNSUBSCRIBE
+control messages, so watching hundreds of symbols takes a handful of sockets instead of one per stream.
+Messages arrive wrapped as {"stream": <stream name>, "data": <payload>} and are routed by stream name.
+
+Payloads are decoded with msgspec straight into the type each handler asks for: the trades, klines and
+average_prices async generators yield Trade, Kline and AvgPrice structs with prices already parsed as floats,
+without building an intermediate dict per message.
+
+When no multiplexer is given, the stream generators share the multiplexer of the running event loop, so every
+consumer of a stream in the process is served by one upstream subscription. Each generator reads from its own
+bounded Subscription queue whose overflow policy decides what a slow consumer costs: losing the oldest messages
+(the default), only seeing the latest message of each stream, or, on request, holding back the socket reader and
+with it every other consumer of the connection.
+
+Every multiplexer records per-stream metrics in a MetricsRegistry, REGISTRY by default: a message counter and
+latency histograms in milliseconds for three stages, exchange_to_socket (event time E to receipt, including clock
+offset), socket_to_decoded and decoded_to_handled, so network lag can be told apart from local processing lag.
+Latencies are measured on one message in LATENCY_SAMPLE_INTERVAL of each stream, which keeps the clock reads and
+histogram updates off most messages, and the event time is read from the payload decoded for the handlers.
+Subscription queues report their depth as queue_depth gauges. The series of a stream are removed from the registry
+once its last handler unsubscribes, so a process rotating through symbols keeps only those of its current streams.
+
+Dropped connections are reopened with exponential backoff and their streams subscribed again.
+continuous_klines builds on that to deliver the closed candles of a symbol without gaps, filling the candles
+that closed while disconnected from the REST API before resuming live delivery.
+"""
+
+import json
+import asyncio
+import logging
+import weakref
+from time import time, monotonic
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+import aiohttp
+import msgspec
+import websockets
+
+from binance import KLINE_INTERVALS, get_klines_async, _interval_str_to_timedelta
+from http_client import RATE_LIMITED_STATUS_CODES
+from metrics import REGISTRY, MetricsRegistry
+
+
+COMBINED_STREAM_URI = "wss://stream.binance.com:9443/stream"
+MAX_STREAMS_PER_CONNECTION = 1024
+MAX_CONTROL_MESSAGES_PER_SECOND = 5
+RECONNECT_DELAY = 1
+MAX_RECONNECT_DELAY = 60
+BACKFILL_RETRIES = 5
+QUEUE_SIZE = 10_000
+LATENCY_SAMPLE_INTERVAL = 16
+LATENCY_STAGES = ("exchange_to_socket", "socket_to_decoded", "decoded_to_handled")
+OVERFLOW_POLICIES = ("block", "drop_oldest", "conflate")
+
+# a handler may return an awaitable to hold back the connection reader until it completes
+Handler = Callable[[str, Any], Awaitable | None]
+
+
+class Trade(msgspec.Struct, frozen=True, gc=False):
+    """Stream Name: <symbol>@trade"""
+
+    event_time: int = msgspec.field(name="E")
+    symbol: str = msgspec.field(name="s")
+    trade_id: int = msgspec.field(name="t")
+    price: float = msgspec.field(name="p")
+    quantity: float = msgspec.field(name="q")
+    trade_time: int = msgspec.field(name="T")
+    buyer_is_maker: bool = msgspec.field(name="m")
+
+
+class Kline(msgspec.Struct, frozen=True, gc=False):
+    """Stream Name: <symbol>@kline_<interval>. is_closed is False while the candle is still being updated."""
+
+    open_time: int = msgspec.field(name="t")
+    close_time: int = msgspec.field(name="T")
+    symbol: str = msgspec.field(name="s")
+    interval: str = msgspec.field(name="i")
+    first_trade_id: int = msgspec.field(name="f")
+    last_trade_id: int = msgspec.field(name="L")
+    open: float = msgspec.field(name="o")
+    high: float = msgspec.field(name="h")
+    low: float = msgspec.field(name="l")
+    close: float = msgspec.field(name="c")
+    volume: float = msgspec.field(name="v")
+    number_of_trades: int = msgspec.field(name="n")
+    is_closed: bool = msgspec.field(name="x")
+    quote_asset_volume: float = msgspec.field(name="q")
+    taker_buy_base_asset_volume: float = msgspec.field(name="V")
+    taker_buy_quote_asset_volume: float = msgspec.field(name="Q")
+
+
+class AvgPrice(msgspec.Struct, frozen=True, gc=False):
+    """Stream Name: <symbol>@avgPrice"""
+
+    event_time: int = msgspec.field(name="E")
+    symbol: str = msgspec.field(name="s")
+    interval: str = msgspec.field(name="i")
+    price: float = msgspec.field(name="w")
+    last_trade_time: int = msgspec.field(name="T")
+
+
+class _KlineEvent(msgspec.Struct, gc=False):
+    kline: Kline = msgspec.field(name="k")
+    event_time: int = msgspec.field(name="E", default=0)
+
+
+class _Message(msgspec.Struct, gc=False):
+    """A combined-stream message, or the answer to a control message. data is left undecoded."""
+
+    stream: str | None = None
+    data: msgspec.Raw = msgspec.Raw()
+    id: int | None = None
+    result: Any = None
+    error: dict | None = None
+
+
+# strict=False lets prices sent as JSON strings decode straight into floats
+TRADE_DECODER = msgspec.json.Decoder(Trade, strict=False)
+KLINE_DECODER = msgspec.json.Decoder(_KlineEvent, strict=False)
+AVG_PRICE_DECODER = msgspec.json.Decoder(AvgPrice, strict=False)
+DICT_DECODER = msgspec.json.Decoder()
+_MESSAGE_DECODER = msgspec.json.Decoder(_Message)
+
+
+def stream_name(symbol: str, stream: str) -> str:
+    """Name of a stream of a symbol, e.g. stream_name("BTCUSDT", "kline_1m") returns "btcusdt@kline_1m"."""
+    return f"{symbol.lower()}@{stream}"
+
+
+class StreamError(Exception):
+    """Error returned by the server in answer to a control message."""
+
+
+class _Connection:
+    """One combined-stream websocket and the streams subscribed on it."""
+
+    def __init__(
+        self,
+        websocket,
+        on_message: Callable[[str, msgspec.Raw, float], Awaitable | None],
+        on_close: Callable[["_Connection"], None],
+        control_interval: float,
+        timeout: float,
+    ):
+        self.websocket = websocket
+        self.streams: set[str] = set()
+        # set once the websocket is closed, by either side
+        self.closed = False
+        self._on_message = on_message
+        self._on_close = on_close
+        self._closing = False
+        self._control_interval = control_interval
+        self._timeout = timeout
+        self._control_lock = asyncio.Lock()
+        self._last_control = float("-inf")
+        self._next_id = 1
+        self._pending: dict[int, asyncio.Future] = {}
+        self.reader = asyncio.create_task(self._read())
+
+    async def send_control(self, method: str, params: list[str]):
+        """Send a control message and wait for its answer. Messages are spaced to stay within the server's rate limit."""
+        async with self._control_lock:
+            delay = self._last_control + self._control_interval - monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._last_control = monotonic()
+            request_id = self._next_id
+            self._next_id += 1
+            future = asyncio.get_running_loop().create_future()
+            self._pending[request_id] = future
+            await self.websocket.send(json.dumps({"method": method, "params": params, "id": request_id}))
+        try:
+            return await asyncio.wait_for(future, self._timeout)
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def close(self):
+        self._closing = True
+        self.reader.cancel()
+        await self.websocket.close()
+
+    async def _read(self):
+        try:
+            async for message in self.websocket:
+                received = time()
+                payload = _MESSAGE_DECODER.decode(message)
+                if payload.stream is not None:
+                    waiting = self._on_message(payload.stream, payload.data, received)
+                    if waiting is not None:
+                        await waiting
+                elif payload.id in self._pending:
+                    future = self._pending[payload.id]
+                    if payload.error is not None:
+                        future.set_exception(StreamError(payload.error))
+                    else:
+                        future.set_result(payload.result)
+        except websockets.ConnectionClosed as e:
+            logging.warning("Binance stream connection closed: %s", e)
+        finally:
+            self.closed = True
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Binance stream connection closed"))
+            if not self._closing:
+                self._on_close(self)
+
+
+class StreamMultiplexer:
+    """Subscribes to many Binance streams over as few combined-stream connections as possible.
+
+    Handlers are called with (stream name, payload) for every message of the streams they are subscribed to.
+    Each handler is subscribed with a msgspec decoder for its payloads, by default DICT_DECODER; a payload is
+    decoded once per distinct decoder.
+    A new connection is opened only when every open one already carries max_streams_per_connection streams,
+    and a connection is closed once its last stream is unsubscribed. A connection dropped by the server or the
+    network is reopened after reconnect_delay seconds, doubled after every failed attempt up to max_reconnect_delay,
+    and its streams are subscribed again; the on_reconnect callbacks of their subscriptions are then called.
+
+    uri : string - Combined-stream endpoint.
+    max_streams_per_connection : integer - Maximum number of streams subscribed on one connection.
+    control_messages_per_second : float - Maximum rate of SUBSCRIBE/UNSUBSCRIBE messages per connection.
+    timeout : float - Seconds to wait for the answer to a control message.
+    reconnect_delay : float - Seconds to wait before reopening a dropped connection.
+    max_reconnect_delay : float - Upper bound of the delay between reconnection attempts.
+    metrics : MetricsRegistry (optional) - Registry of the stream metrics, None to record none.
+    latency_sample_interval : integer - Latencies are measured on one message in latency_sample_interval of a stream.
+
+    Usage:
+        async with StreamMultiplexer() as multiplexer:
+            await multiplexer.subscribe([stream_name(symbol, "trade") for symbol in symbols], handler)
+            await asyncio.sleep(60)
+    """
+
+    def __init__(
+        self,
+        uri: str = COMBINED_STREAM_URI,
+        max_streams_per_connection: int = MAX_STREAMS_PER_CONNECTION,
+        control_messages_per_second: float = MAX_CONTROL_MESSAGES_PER_SECOND,
+        timeout: float = 10,
+        reconnect_delay: float = RECONNECT_DELAY,
+        max_reconnect_delay: float = MAX_RECONNECT_DELAY,
+        metrics: MetricsRegistry | None = REGISTRY,
+        latency_sample_interval: int = LATENCY_SAMPLE_INTERVAL,
+    ):
+        self.uri = uri
+        self.max_streams_per_connection = max_streams_per_connection
+        self.control_interval = 1 / control_messages_per_second
+        self.timeout = timeout
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.metrics = metrics
+        self.latency_sample_interval = latency_sample_interval
+        self._stream_metrics: dict[str, _StreamMetrics] = {}
+        self._handlers: dict[str, list[tuple[Handler, msgspec.json.Decoder, Callable[[], None] | None]]] = {}
+        self._connections: list[_Connection] = []
+        self._reconnections: set[asyncio.Task] = set()
+        self._lock = asyncio.Lock()
+
+    @property
+    def streams(self) -> list[str]:
+        return list(self._handlers)
+
+    @property
+    def num_connections(self) -> int:
+        return len(self._connections)
+
+    async def subscribe(
+        self,
+        streams: list[str],
+        handler: Handler,
+        decoder: msgspec.json.Decoder = DICT_DECODER,
+        on_reconnect: Callable[[], None] | None = None,
+    ):
+        """Route the messages of streams, decoded with decoder, to handler. Streams no other handler listens to yet are subscribed.
+        on_reconnect is called once the streams have been subscribed again after their connection dropped."""
+        async with self._lock:
+            new_streams = [stream for stream in dict.fromkeys(streams) if stream not in self._handlers]
+            added = []
+            for stream in dict.fromkeys(streams):
+                handlers = self._handlers.setdefault(stream, [])
+                if all(subscribed is not handler for subscribed, _, _ in handlers):
+                    handlers.append((handler, decoder, on_reconnect))
+                    added.append(stream)
+            try:
+                await self._subscribe(new_streams)
+            except BaseException:
+                for stream in added:
+                    self._handlers[stream] = [subscription for subscription in self._handlers[stream] if subscription[0] is not handler]
+                    if not self._handlers[stream]:
+                        del self._handlers[stream]
+                        self._remove_stream_metrics(stream)
+                # the batches subscribed before the failure no longer count against their connections
+                for connection in list(self._connections):
+                    connection.streams.difference_update(new_streams)
+                    if not connection.streams:
+                        self._connections.remove(connection)
+                        await connection.close()
+                raise
+
+    async def unsubscribe(self, streams: list[str], handler: Handler | None = None):
+        """Stop routing the messages of streams to handler, or to every handler if it is None.
+        Streams left without handlers are unsubscribed."""
+        async with self._lock:
+            removed_streams = []
+            for stream in dict.fromkeys(streams):
+                handlers = self._handlers.get(stream)
+                if handlers is None:
+                    continue
+                if handler is not None:
+                    handlers[:] = [subscription for subscription in handlers if subscription[0] is not handler]
+                if handler is None or not handlers:
+                    del self._handlers[stream]
+                    self._remove_stream_metrics(stream)
+                    removed_streams.append(stream)
+            await self._unsubscribe(removed_streams)
+
+    async def close(self):
+        async with self._lock:
+            for task in self._reconnections:
+                task.cancel()
+            connections, self._connections = self._connections, []
+            for stream in list(self._stream_metrics):
+                self._remove_stream_metrics(stream)
+            self._handlers.clear()
+            await asyncio.gather(*(connection.close() for connection in connections), return_exceptions=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _subscribe(self, streams: list[str]):
+        for connection in self._connections:
+            if not streams:
+                return
+            streams = await self._subscribe_on(connection, streams)
+        while streams:
+            connection = await self._connect()
+            self._connections.append(connection)
+            streams = await self._subscribe_on(connection, streams)
+
+    async def _connect(self) -> _Connection:
+        return _Connection(await websockets.connect(self.uri), self._dispatch, self._on_connection_closed, self.control_interval, self.timeout)
+
+    def _on_connection_closed(self, connection: _Connection):
+        task = asyncio.get_running_loop().create_task(self._reconnect(connection))
+        self._reconnections.add(task)
+        task.add_done_callback(self._reconnections.discard)
+
+    async def _reconnect(self, dropped: _Connection):
+        """Reopen a dropped connection. The lock is only held to read and update the state, not while connecting,
+        so the other connections can be subscribed to meanwhile."""
+        delay = self.reconnect_delay
+        while True:
+            await asyncio.sleep(delay)
+            async with self._lock:
+                if dropped not in self._connections:
+                    return
+                streams = [stream for stream in dropped.streams if stream in self._handlers]
+                if not streams:
+                    self._connections.remove(dropped)
+                    return
+            connection = None
+            try:
+                connection = await self._connect()
+                await connection.send_control("SUBSCRIBE", streams)
+            except (OSError, asyncio.TimeoutError, websockets.WebSocketException, StreamError) as e:
+                if connection is not None:
+                    await connection.close()
+                logging.warning("Reconnecting to %s failed, retrying in %s s: %s", self.uri, min(delay * 2, self.max_reconnect_delay), e)
+                delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+            except BaseException:
+                if connection is not None:
+                    await connection.close()
+                raise
+            try:
+                async with self._lock:
+                    # the streams may have been unsubscribed, or the multiplexer closed, while connecting
+                    current = [stream for stream in streams if stream in dropped.streams and stream in self._handlers]
+                    if dropped not in self._connections or not current:
+                        if dropped in self._connections:
+                            self._connections.remove(dropped)
+                        await connection.close()
+                        return
+                    connection.streams.update(current)
+                    self._connections[self._connections.index(dropped)] = connection
+                    callbacks = {id(on_reconnect): on_reconnect for stream in current for _, _, on_reconnect in self._handlers[stream] if on_reconnect is not None}
+            except BaseException:
+                await connection.close()
+                raise
+            if len(current) < len(streams):
+                try:
+                    await connection.send_control("UNSUBSCRIBE", [stream for stream in streams if stream not in current])
+                except (OSError, asyncio.TimeoutError, websockets.WebSocketException, StreamError) as e:
+                    logging.warning("Unsubscribing from %s failed: %s", self.uri, e)
+            logging.info("Reconnected to %s with %s streams", self.uri, len(current))
+            for on_reconnect in callbacks.values():
+                on_reconnect()
+            return
+
+    async def _subscribe_on(self, connection: _Connection, streams: list[str]) -> list[str]:
+        """Subscribe as many streams as fit on connection and return the others."""
+        free = self.max_streams_per_connection - len(connection.streams)
+        # a dropped connection is only subscribed to again by _reconnect
+        if free <= 0 or connection.closed:
+            return streams
+        batch, streams = streams[:free], streams[free:]
+        await connection.send_control("SUBSCRIBE", batch)
+        connection.streams.update(batch)
+        return streams
+
+    async def _unsubscribe(self, streams: list[str]):
+        for connection in list(self._connections):
+            batch = [stream for stream in streams if stream in connection.streams]
+            if not batch:
+                continue
+            connection.streams.difference_update(batch)
+            if connection.streams:
+                if not connection.closed:
+                    await connection.send_control("UNSUBSCRIBE", batch)
+            else:
+                self._connections.remove(connection)
+                await connection.close()
+
+    def _remove_stream_metrics(self, stream: str):
+        stream_metrics = self._stream_metrics.pop(stream, None)
+        if stream_metrics is not None:
+            stream_metrics.remove()
+
+    def _dispatch(self, stream: str, data: msgspec.Raw, received: float | None = None) -> Awaitable | None:
+        """Pass a message to the handlers of its stream. Returns an awaitable if some handlers asked to be waited for.
+        received is the time the message was read from the socket, None for a message that did not come from one."""
+        handlers = self._handlers.get(stream)
+        # a message still in flight after its stream was unsubscribed must not bring its metrics back
+        if not handlers:
+            return None
+        # the metrics of the stream if the latencies of this message are measured
+        sampled = None
+        from_socket = received is not None
+        if self.metrics is not None:
+            stream_metrics = self._stream_metrics.get(stream)
+            if stream_metrics is None:
+                stream_metrics = self._stream_metrics[stream] = _StreamMetrics(self.metrics, stream)
+            stream_metrics.messages.inc()
+            stream_metrics.until_sample -= 1
+            if stream_metrics.until_sample <= 0:
+                stream_metrics.until_sample = self.latency_sample_interval
+                sampled = stream_metrics
+                if received is None:
+                    received = time()
+        decoded = {}
+        waiting = []
+        for handler, decoder, _ in tuple(handlers):
+            try:
+                if decoder not in decoded:
+                    event = decoder.decode(data)
+                    decoded[decoder] = event, (time() if sampled is not None else 0.0)
+                    if sampled is not None:
+                        sampled.socket_to_decoded.observe((decoded[decoder][1] - received) * 1000)
+                        event_time = _event_time(event) if from_socket and len(decoded) == 1 else 0
+                        if event_time:
+                            sampled.exchange_to_socket.observe(received * 1000 - event_time)
+                event, decoded_at = decoded[decoder]
+                result = handler(stream, event)
+                if sampled is not None:
+                    sampled.decoded_to_handled.observe((time() - decoded_at) * 1000)
+            except Exception:
+                logging.exception("Handler of stream %s failed", stream)
+                continue
+            if result is not None:
+                waiting.append(result)
+        return asyncio.gather(*waiting) if waiting else None
+
+
+class _StreamMetrics:
+    """The metrics of one stream, looked up once instead of per message."""
+
+    __slots__ = ("registry", "stream", "messages", "exchange_to_socket", "socket_to_decoded", "decoded_to_handled", "until_sample")
+
+    def __init__(self, registry: MetricsRegistry, stream: str):
+        self.registry = registry
+        self.stream = stream
+        self.until_sample = 1
+        self.messages = registry.counter("stream_messages", stream=stream)
+        self.exchange_to_socket = registry.histogram("stream_latency_ms", stream=stream, stage="exchange_to_socket")
+        self.socket_to_decoded = registry.histogram("stream_latency_ms", stream=stream, stage="socket_to_decoded")
+        self.decoded_to_handled = registry.histogram("stream_latency_ms", stream=stream, stage="decoded_to_handled")
+
+    def remove(self):
+        """Drop the series of the stream from the registry."""
+        self.registry.remove("stream_messages", stream=self.stream)
+        for stage in LATENCY_STAGES:
+            self.registry.remove("stream_latency_ms", stream=self.stream, stage=stage)
+
+
+def _event_time(event) -> int:
+    """Event time E of a decoded payload, 0 if it has none."""
+    if isinstance(event, dict):
+        event_time = event.get("E")
+        return event_time if isinstance(event_time, int) else 0
+    return getattr(event, "event_time", 0)
+
+
+_SHARED_MULTIPLEXERS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, StreamMultiplexer]" = weakref.WeakKeyDictionary()
+
+
+def shared_multiplexer() -> StreamMultiplexer:
+    """The multiplexer of the running event loop, used by the stream generators when none is given."""
+    loop = asyncio.get_running_loop()
+    multiplexer = _SHARED_MULTIPLEXERS.get(loop)
+    if multiplexer is None:
+        multiplexer = _SHARED_MULTIPLEXERS[loop] = StreamMultiplexer()
+    return multiplexer
+
+
+class Subscription:
+    """Bounded queue of the messages of one consumer.
+
+    overflow decides what happens to a message put while maxsize messages are waiting:
+        "drop_oldest" discards the oldest waiting message.
+        "conflate" keeps only the latest waiting message of each stream, whatever maxsize is.
+        "block" holds back the connection reader, and with it every stream of that connection, until there is room.
+        With a shared multiplexer this lets one slow consumer stall every other consumer of the connection.
+    dropped counts the discarded messages.
+    """
+
+    def __init__(self, maxsize: int = QUEUE_SIZE, overflow: str = "drop_oldest"):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Invalid overflow policy: {overflow}. Supported policies: {OVERFLOW_POLICIES}")
+        if maxsize < 1:
+            raise ValueError(f"Invalid maxsize: {maxsize}. The queue must hold at least one message")
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.dropped = 0
+        self._queue = asyncio.Queue(0 if overflow == "conflate" else maxsize)
+        self._latest: dict[str, Any] = {}
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def put(self, stream: str, message) -> Awaitable | None:
+        """Queue a message. Returns an awaitable to wait for if the message has to wait for room."""
+        if self.overflow == "conflate":
+            if stream in self._latest:
+                self.dropped += 1
+            else:
+                self._queue.put_nowait(stream)
+            self._latest[stream] = message
+            return None
+        if self._queue.full():
+            if self.overflow == "block":
+                return self._queue.put(message)
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(message)
+        return None
+
+    async def get(self):
+        message = await self._queue.get()
+        return self._latest.pop(message) if self.overflow == "conflate" else message
+
+
+async def subscribe_events(
+    streams: list[str],
+    decoder: msgspec.json.Decoder = DICT_DECODER,
+    multiplexer: StreamMultiplexer | None = None,
+    unwrap: Callable[[Any], Any] | None = None,
+    maxsize: int = QUEUE_SIZE,
+    overflow: str = "drop_oldest",
+) -> AsyncIterator:
+    """Yield the decoded messages of streams as they arrive, through a Subscription queue of maxsize messages with
+    the overflow policy. The shared multiplexer is used if none is given. The streams are unsubscribed when the
+    generator is closed."""
+    subscription = Subscription(maxsize, overflow)
+    if multiplexer is None:
+        multiplexer = shared_multiplexer()
+    put = subscription.put
+    gauge_labels = {"streams": ",".join(streams), "subscription": f"{id(subscription):x}"}
+    if multiplexer.metrics is not None:
+        multiplexer.metrics.gauge("queue_depth", subscription.qsize, **gauge_labels)
+
+    def handler(stream, event):
+        return put(stream, event if unwrap is None else unwrap(event))
+
+    try:
+        await multiplexer.subscribe(streams, handler, decoder)
+        while True:
+            yield await subscription.get()
+    finally:
+        if multiplexer.metrics is not None:
+            multiplexer.metrics.remove("queue_depth", **gauge_labels)
+        await multiplexer.unsubscribe(streams, handler)
+
+
+def trades(symbols: str | list[str], multiplexer: StreamMultiplexer | None = None, **subscription) -> AsyncIterator[Trade]:
+    """Yield the trades of one or more symbols. maxsize and overflow set the Subscription queue.
+
+    Usage:
+        async for trade in trades(["BTCUSDT", "ETHUSDT"]):
+            print(trade.symbol, trade.price, trade.quantity)
+    """
+    return subscribe_events([stream_name(symbol, "trade") for symbol in _as_list(symbols)], TRADE_DECODER, multiplexer, **subscription)
+
+
+def klines(symbols: str | list[str], interval: str = "1m", multiplexer: StreamMultiplexer | None = None, **subscription) -> AsyncIterator[Kline]:
+    """Yield the kline updates of one or more symbols, about every 2 seconds per symbol (every second for 1s klines)."""
+    streams = [stream_name(symbol, f"kline_{interval}") for symbol in _as_list(symbols)]
+    return subscribe_events(streams, KLINE_DECODER, multiplexer, unwrap=lambda event: event.kline, **subscription)
+
+
+def average_prices(symbols: str | list[str], multiplexer: StreamMultiplexer | None = None, **subscription) -> AsyncIterator[AvgPrice]:
+    """Yield the average price updates of one or more symbols, every second."""
+    return subscribe_events([stream_name(symbol, "avgPrice") for symbol in _as_list(symbols)], AVG_PRICE_DECODER, multiplexer, **subscription)
+
+
+async def continuous_klines(
+    symbol: str,
+    interval: str = "1m",
+    start_time: int | None = None,
+    multiplexer: StreamMultiplexer | None = None,
+    maxsize: int = QUEUE_SIZE,
+) -> AsyncIterator[Kline]:
+    """Yield the closed klines of a symbol as one continuous sequence, ordered and without duplicates.
+
+    Candles that closed while the stream was disconnected, or whose close was otherwise missed, are fetched with
+    get_klines_async before the next live candle is delivered. Backfilled klines have no trade ids (-1).
+    Closed klines wait in a "drop_oldest" Subscription of maxsize: a consumer too slow to keep up never holds
+    back the connection, the klines it lost are backfilled like any other missed candle.
+    start_time (epoch milliseconds) is the open time of the first kline to yield; by default the sequence
+    starts with the first candle that closes after subscribing.
+
+    Usage:
+        async for kline in continuous_klines("BTCUSDT", "1m", start_time=last_cached_open_time + 60_000):
+            ...
+    """
+    # months have no fixed length to find the missed candles with
+    if interval not in KLINE_INTERVALS or interval == "1M":
+        raise ValueError(f"Invalid interval: {interval}. Supported intervals: {KLINE_INTERVALS[:-1]}")
+
+    step = int(_interval_str_to_timedelta(interval).total_seconds() * 1000)
+    subscription = Subscription(maxsize, "drop_oldest")
+    if multiplexer is None:
+        multiplexer = shared_multiplexer()
+    streams = [stream_name(symbol, f"kline_{interval}")]
+
+    def handler(stream, event):
+        if event.kline.is_closed:
+            subscription.put(stream, event.kline)
+
+    def on_reconnect():
+        subscription.put(streams[0], None)
+
+    last_open_time = None if start_time is None else start_time - step
+    try:
+        await multiplexer.subscribe(streams, handler, KLINE_DECODER, on_reconnect)
+        if last_open_time is not None:
+            subscription.put(streams[0], None)
+        while True:
+            kline = await subscription.get()
+            if kline is None:
+                if last_open_time is None:
+                    continue
+                klines = await _backfill_klines(symbol, interval, last_open_time + step)
+            elif last_open_time is not None and kline.open_time > last_open_time + step:
+                klines = await _backfill_klines(symbol, interval, last_open_time + step, kline.open_time - step) + [kline]
+            else:
+                klines = [kline]
+            for kline in klines:
+                if last_open_time is None or kline.open_time > last_open_time:
+                    last_open_time = kline.open_time
+                    yield kline
+    finally:
+        await multiplexer.unsubscribe(streams, handler)
+
+
+async def _backfill_klines(symbol: str, interval: str, start_time: int, end_time: int | None = None, limit: int = 1000) -> list[Kline]:
+    """Closed klines opened from start_time to end_time (or now), fetched page by page.
+    Requests failing on a connection error, a rate limit (418/429) or a server error (5xx) are retried with backoff,
+    up to BACKFILL_RETRIES times in a row. Other errors, such as a 400 for an invalid symbol, are raised right away.
+    """
+    klines = []
+    delay = RECONNECT_DELAY
+    retries = 0
+    while end_time is None or start_time <= end_time:
+        try:
+            page = await get_klines_async(
+                symbol,
+                interval,
+                _milliseconds_to_datetime_str(start_time),
+                None if end_time is None else _milliseconds_to_datetime_str(end_time),
+                limit,
+            )
+        except (OSError, asyncio.TimeoutError, aiohttp.ClientError) as e:
+            if not _is_transient(e) or retries >= BACKFILL_RETRIES:
+                raise
+            retries += 1
+            logging.warning("Backfilling %s %s klines failed, retrying in %s s: %s", symbol, interval, delay, e)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+            continue
+        delay, retries = RECONNECT_DELAY, 0
+        now = time() * 1000
+        klines += [_rest_kline_to_kline(symbol, interval, kline) for kline in page if kline[6] < now]
+        if len(page) < limit:
+            break
+        start_time = page[-1][6] + 1
+    return klines
+
+
+def _is_transient(error: Exception) -> bool:
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status in RATE_LIMITED_STATUS_CODES or error.status >= 500
+    return True
+
+
+def _rest_kline_to_kline(symbol: str, interval: str, kline: list) -> Kline:
+    return Kline(
+        open_time=kline[0],
+        close_time=kline[6],
+        symbol=symbol,
+        interval=interval,
+        first_trade_id=-1,
+        last_trade_id=-1,
+        open=float(kline[1]),
+        high=float(kline[2]),
+        low=float(kline[3]),
+        close=float(kline[4]),
+        volume=float(kline[5]),
+        number_of_trades=kline[8],
+        is_closed=True,
+        quote_asset_volume=float(kline[7]),
+        taker_buy_base_asset_volume=float(kline[9]),
+        taker_buy_quote_asset_volume=float(kline[10]),
+    )
+
+
+def _milliseconds_to_datetime_str(milliseconds: int) -> str:
+    return datetime.fromtimestamp(milliseconds // 1000, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _as_list(symbols: str | list[str]) -> list[str]:
+    return [symbols] if isinstance(symbols, str) else list(symbols)
@@ -0,0 +1,652 @@
+import json
+import asyncio
+from time import time
+from functools import partial
+
+import msgspec
+import pytest
+from aiohttp import ClientConnectionError, ClientResponseError, RequestInfo
+from yarl import URL
+
+from binance_stream import (
+    StreamMultiplexer,
+    StreamError,
+    Subscription,
+    Trade,
+    Kline,
+    AvgPrice,
+    TRADE_DECODER,
+    stream_name,
+    subscribe_events,
+    trades,
+    klines,
+    average_prices,
+    continuous_klines,
+    shared_multiplexer,
+    BACKFILL_RETRIES,
+    _backfill_klines,
+)
+from metrics import MetricsRegistry
+from testing import TRADE, KLINE, kline_message, run_with_fake_binance, until
+
+
+AVG_PRICE = {"e": "avgPrice", "E": 1693907033000, "s": "BTCUSDT", "i": "5m", "w": "25776.86000000", "T": 1693907032213}
+
+
+def test_stream_name():
+    assert stream_name("BTCUSDT", "kline_1m") == "btcusdt@kline_1m"
+
+
+def test_subscribe_and_route_messages():
+    async def test(binance, uri):
+        received = []
+        async with StreamMultiplexer(uri, control_messages_per_second=100) as multiplexer:
+            await multiplexer.subscribe(["btcusdt@trade", "ethusdt@trade"], lambda stream, data: received.append((stream, data)))
+            await binance.push("btcusdt@trade", {"p": "1"})
+            await binance.push("ethusdt@trade", {"p": "2"})
+            await until(lambda: len(received) == 2)
+            assert multiplexer.num_connections == 1
+        assert received == [("btcusdt@trade", {"p": "1"}), ("ethusdt@trade", {"p": "2"})]
+        assert binance.control_messages == [{"method": "SUBSCRIBE", "params": ["btcusdt@trade", "ethusdt@trade"], "id": 1}]
+
+    run_with_fake_binance(test)
+
+
+def test_messages_are_routed_to_their_handlers_only():
+    async def test(binance, uri):
+        trades, klines = [], []
+        async with StreamMultiplexer(uri, control_messages_per_second=100) as multiplexer:
+            await multiplexer.subscribe(["btcusdt@trade"], lambda stream, data: trades.append(data))
+            await multiplexer.subscribe(["btcusdt@kline_1m", "btcusdt@trade"], lambda stream, data: klines.append(data))
+            await binance.push("btcusdt@kline_1m", {"k": 1})
+            await binance.push("btcusdt@trade", {"t": 1})
+            await until(lambda: len(klines) == 2)
+        assert trades == [{"t": 1}]
+        assert klines == [{"k": 1}, {"t": 1}]
+        assert [message["params"] for message in binance.control_messages] == [["btcusdt@trade"], ["btcusdt@kline_1m"]]
+
+    run_with_fake_binance(test)
+
+
+def test_shards_streams_across_connections():
+    async def test(binance, uri):
+        streams = [stream_name(f"SYM{i}USDT", "trade") for i in range(7)]
+        received = []
+        async with StreamMultiplexer(uri, max_streams_per_connection=3, control_messages_per_second=100) as multiplexer:
+            await multiplexer.subscribe(streams, lambda stream, data: received.append(stream))
+            assert multiplexer.num_connections == 3
+            assert sorted(len(subscribed) for subscribed in binance.connections.values()) == [1, 3, 3]
+            for stream in streams:
+                await binance.push(stream, {})
+            await until(lambda: len(received) == 7)
+            await multiplexer.subscribe(["extra@trade"], lambda stream, data: None)
+            assert multiplexer.num_connections == 3
+            assert sorted(len(subscribed) for subscribed in binance.connections.values()) == [2, 3, 3]
+        assert sorted(received) == sorted(streams)
+
+    run_with_fake_binance(test)
+
+
+def test_unsubscribe():
+    async def test(binance, uri):
+        received = []
+        handler = lambda stream, data: received.append(stream)
+        async with StreamMultiplexer(uri, max_streams_per_connection=2, control_messages_per_second=100) as multiplexer:
+            await multiplexer.subscribe(["a@trade", "b@trade", "c@trade"], handler)
+            assert multiplexer.num_connections == 2
+            await multiplexer.unsubscribe(["b@trade"], handler)
+            assert binance.control_messages[-1]["method"] == "UNSUBSCRIBE"
+            assert binance.control_messages[-1]["params"] == ["b@trade"]
+            await multiplexer.unsubscribe(["c@trade"])
+            assert multiplexer.num_connections == 1
+            assert multiplexer.streams == ["a@trade"]
+            await until(lambda: len(binance.connections) == 1)
+            await binance.push("a@trade", {})
+            await binance.push("b@trade", {})
+            await until(lambda: len(received) == 1)
+            await asyncio.sleep(0.05)
+        assert received == ["a@trade"]
+
+    run_with_fake_binance(test)
+
+
+def test_stream_is_kept_while_another_handler_listens():
+    async def test(binance, uri):
+        first, second = [], []
+        first_handler = lambda stream, data: first.append(data)
+        async with StreamMultiplexer(uri, control_messages_per_second=100) as multiplexer:
+            await multiplexer.subscribe(["a@trade"], first_handler)
+            await multiplexer.subscribe(["a@trade"], lambda stream, data: second.append(data))
+            await multiplexer.unsubscribe(["a@trade"], first_handler)
+            assert [message["method"] for message in binance.control_messages] == ["SUBSCRIBE"]
+            await binance.push("a@trade", {"x": 1})
+            await until(lambda: second)
+        assert first == []
+
+    run_with_fake_binance(test)
+
+
+def test_failing_handler_does_not_stop_routing():
+    async def test(binance, uri):
+        received = []
+
+        def failing(stream, data):
+            raise RuntimeError("boom")
+
+        async with StreamMultiplexer(uri, control_messages_per_second=100) as multiplexer:
+            await multiplexer.subscribe(["a@trade"], failing)
+            await multiplexer.subscribe(["a@trade"], lambda stream, data: received.append(data))
+            await binance.push("a@trade", {"x": 1})
+            await binance.push("a@trade", {"x": 2})
+            await until(lambda: len(received) == 2)
+
+    run_with_fake_binance(test)
+
+
+def test_subscribe_error():
+    async def test(binance, uri):
+        async with StreamMultiplexer(uri, control_messages_per_second=100) as multiplexer:
+            with pytest.raises(StreamError):
+                await multiplexer.subscribe(["btcusdt@invalid"], lambda stream, data: None)
+            assert multiplexer.streams == []
+
+    run_with_fake_binance(test)
+
+
+def test_subscribe_error_rolls_back_the_batches_subscribed_before():
+    async def test(binance, uri):
+        async with StreamMultiplexer(uri, max_streams_per_connection=2, control_messages_per_second=100) as multiplexer:
+            handler = lambda stream, data: None
+            await multiplexer.subscribe(["x@trade"], handler)
+            # a@trade fills the first connection, b@invalid fails on a second one
+            with pytest.raises(StreamError):
+                await multiplexer.subscribe(["x@trade", "a@trade", "b@invalid"], lambda stream, data: None)
+            assert multiplexer.streams == ["x@trade"]
+            assert [subscribed for subscribed, _, _ in multiplexer._handlers["x@trade"]] == [handler]
+            assert multiplexer.num_connections == 1
+            assert multiplexer._connections[0].streams == {"x@trade"}
+            await multiplexer.subscribe(["c@trade"], handler)
+            assert multiplexer.num_connections == 1
+
+    run_with_fake_binance(test)
+
+
+def test_control_messages_are_rate_limited():
+    async def test(binance, uri):
+        async with StreamMultiplexer(uri, control_messages_per_second=20) as multiplexer:
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            for i in range(5):
+                await multiplexer.subscribe([f"s{i}@trade"], lambda stream, data: None)
+            assert loop.time() - start >= 4 / 20 - 0.01
+
+    run_with_fake_binance(test)
+
+
+def test_decode_trade():
+    trade = TRADE_DECODER.decode(json.dumps(TRADE))
+    assert trade == Trade(event_time=1672515782136, symbol="BNBBTC", trade_id=12345, price=0.001, quantity=100.0, trade_time=1672515782136, buyer_is_maker=True)
+    assert not hasattr(trade, "__dict__")
+
+
+def test_trades():
+    async def test(binance, uri):
+        async with StreamMultiplexer(uri, control_messages_per_second=100) as multiplexer:
+            stream = trades(["BNBBTC", "ETHBTC"], multiplexer)
+            first = asyncio.ensure_future(anext(stream))
+            await until(lambda: binance.connections and any(binance.connections.values()))
+            await binance.push("bnbbtc@trade", TRADE)
+            await binance.push("ethbtc@trade", {**TRADE, "s": "ETHBTC", "p": "0.05"})
+            assert (await first).price == 0.001
+            second = await anext(stream)
+            assert (second.symbol, second.price) == ("ETHBTC", 0.05)
+            await stream.aclose()
+            assert multiplexer.streams == []
+
+    run_with_fake_binance(test)
+
+
+def test_klines():
+    async def test(binance, uri):
+        async with StreamMultiplexer(uri, control_messages_per_second=100) as multiplexer:
+            stream = klines("BNBBTC", "1m", multiplexer)
+            first = asyncio.ensure_future(anext(stream))
+            await until(lambda: binance.connections and any(binance.connections.values()))
+            assert binance.control_messages[0]["params"] == ["bnbbtc@kline_1m"]
+            await binance.push("bnbbtc@kline_1m", KLINE)
+            kline = await first
+            await stream.aclose()
+        assert isinstance(kline, Kline)
+        assert (kline.open_time, kline.close_time, kline.interval) == (1672515780000, 1672515839999, "1m")
+        assert (kline.open, kline.high, kline.low, kline.close, kline.volume) == (0.001, 0.0025, 0.0015, 0.002, 1000.0)
+        assert kline.number_of_trades == 100
+        assert not kline.is_closed
+
+    run_with_fake_binance(test)
+
+
+def test_average_prices():
+    async def test(binance, uri):
+        async with StreamMultiplexer(uri, control_messages_per_second=100) as multiplexer:
+            stream = average_prices("BTCUSDT", multiplexer)
+            first = asyncio.ensure_future(anext(stream))
+            await until(lambda: binance.connections and any(binance.connections.values()))
+            await binance.push("btcusdt@avgPrice", AVG_PRICE)
+            assert await first == AvgPrice(event_time=1693907033000, symbol="BTCUSDT", interval="5m", price=25776.86, last_trade_time=1693907032213)
+            await stream.aclose()
+
+    run_with_fake_binance(test)
+
+
+def test_handlers_sharing_a_stream_get_their_own_types():
+    async def test(binance, uri):
+        received = []
+        async with StreamMultiplexer(uri, control_messages_per_second=100) as multiplexer:
+            stream = trades("BNBBTC", multiplexer)
+            first = asyncio.ensure_future(anext(stream))
+            await until(lambda: binance.connections and any(binance.connections.values()))
+            await multiplexer.subscribe(["bnbbtc@trade"], lambda stream, data: received.append(data))
+            await binance.push("bnbbtc@trade", TRADE)
+            assert isinstance(await first, Trade)
+            await until(lambda: received)
+            await stream.aclose()
+        assert received == [TRADE]
+
+    run_with_fake_binance(test)
+
+
+def test_subscribe_events_with_shared_multiplexer(monkeypatch):
+    async def test(binance, uri):
+        monkeypatch.setattr("binance_stream.StreamMultiplexer", partial(StreamMultiplexer, uri, control_messages_per_second=100))
+        first_stream, second_stream = subscribe_events(["bnbbtc@trade"]), trades("BNBBTC")
+        first, second = asyncio.ensure_future(anext(first_stream)), asyncio.ensure_future(anext(second_stream))
+        await until(lambda: any(binance.connections.values()) and len(shared_multiplexer()._handlers.get("bnbbtc@trade", ())) == 2)
+        assert shared_multiplexer().num_connections == 1
+        await binance.push("bnbbtc@trade", TRADE)
+        assert await first == TRADE
+        assert (await second).price == 0.001
+        await first_stream.aclose()
+        await second_stream.aclose()
+        await until(lambda: not binance.connections)
+
+    run_with_fake_binance(test)
+
+
+def test_subscription_drop_oldest():
+    async def test():
+        subscription = Subscription(2, "drop_oldest")
+        for i in range(4):
+            assert subscription.put("a@trade", i) is None
+        assert (subscription.dropped, subscription.qsize()) == (2, 2)
+        assert [await subscription.get(), await subscription.get()] == [2, 3]
+
+    asyncio.run(test())
+
+
+def test_subscription_conflate():
+    async def test():
+        subscription = Subscription(1, "conflate")
+        for stream, message in [("a@trade", 1), ("b@trade", 2), ("a@trade", 3), ("a@trade", 4)]:
+            assert subscription.put(stream, message) is None
+        assert subscription.dropped == 2
+        # a@trade keeps its place in the queue with its latest message
+        assert [await subscription.get(), await subscription.get()] == [4, 2]
+        subscription.put("a@trade", 5)
+        assert await subscription.get() == 5
+
+    asyncio.run(test())
+
+
+def test_subscription_block():
+    async def test():
+        subscription = Subscription(1, "block")
+        assert subscription.put("a@trade", 1) is None
+        waiting = asyncio.ensure_future(subscription.put("a@trade", 2))
+        await asyncio.sleep(0.01)
+        assert not waiting.done()
+        assert await subscription.get() == 1
+        await waiting
+        assert await subscription.get() == 2
+        assert subscription.dropped == 0
+
+    asyncio.run(test())
+
+
+def test_invalid_subscription():
+    with pytest.raises(ValueError):
+        Subscription(10, "drop_newest")
+    with pytest.raises(ValueError):
+        Subscription(0)
+
+
+def test_slow_consumer_with_block_holds_back_its_connection():
+    async def test(binance, uri):
+        received = []
+        async with StreamMultiplexer(uri, control_messages_per_second=100) as multiplexer:
+            await multiplexer.subscribe(["ethbtc@trade"], lambda stream, data: received.append(data["t"]))
+            slow = trades("BNBBTC", multiplexer, maxsize=1, overflow="block")
+            first = asyncio.ensure_future(anext(slow))
+            await until(lambda: any(len(streams) == 2 for streams in binance.connections.values()))
+            for i in range(3):
+                await binance.push("bnbbtc@trade", {**TRADE, "t": i})
+            await binance.push("ethbtc@trade", {**TRADE, "t": 10})
+            assert (await first).trade_id == 0
+            await asyncio.sleep(0.05)
+            # trade 1 waits in the queue and trade 2 blocks the reader, so ethbtc@trade is not read yet
+            assert received == []
+            assert [(await anext(slow)).trade_id for _ in range(2)] == [1, 2]
+            await until(lambda: received == [10])
+            await slow.aclose()
+
+    run_with_fake_binance(test)
+
+
+def test_slow_consumer_by_default_drops_oldest_and_does_not_hold_back_its_connection():
+    async def test(binance, uri):
+        received = []
+        async with StreamMultiplexer(uri, control_messages_per_second=100) as multiplexer:
+            await multiplexer.subscribe(["ethbtc@trade"], lambda stream, data: received.append(data["t"]))
+            slow = trades("BNBBTC", multiplexer, maxsize=1)
+            first = asyncio.ensure_future(anext(slow))
+            await until(lambda: any(len(streams) == 2 for streams in binance.connections.values()))
+            await binance.push("bnbbtc@trade", {**TRADE, "t": 0})
+            assert (await first).trade_id == 0
+            for i in range(1, 4):
+                await binance.push("bnbbtc@trade", {**TRADE, "t": i})
+            await binance.push("ethbtc@trade", {**TRADE, "t": 10})
+            await until(lambda: received == [10])
+            assert (await anext(slow)).trade_id == 3
+            await slow.aclose()
+
+    run_with_fake_binance(test)
+
+
+def test_stream_metrics():
+    async def test(binance, uri):
+        registry = MetricsRegistry()
+        async with StreamMultiplexer(uri, control_messages_per_second=100, metrics=registry, latency_sample_interval=1) as multiplexer:
+            stream = trades("BNBBTC", multiplexer)
+            first = asyncio.ensure_future(anext(stream))
+            await until(lambda: any(binance.connections.values()))
+            assert registry.snapshot("queue_depth")[0]["labels"]["streams"] == "bnbbtc@trade"
+            for i in range(3):
+                await binance.push("bnbbtc@trade", {**TRADE, "E": int(time() * 1000) - 50, "t": i})
+            await first
+            await until(lambda: registry.counter("stream_messages", stream="bnbbtc@trade").value == 3)
+            assert registry.gauge("queue_depth", **registry.snapshot("queue_depth")[0]["labels"]).value == 2
+            latencies = {metric["labels"]["stage"]: metric for metric in registry.snapshot("stream_latency_ms")}
+            assert latencies["exchange_to_socket"]["count"] == 3
+            assert 50 <= latencies["exchange_to_socket"]["min"] < 1000
+            assert latencies["socket_to_decoded"]["count"] == latencies["decoded_to_handled"]["count"] == 3
+            assert 0 <= latencies["socket_to_decoded"]["max"] < latencies["exchange_to_socket"]["min"]
+            await stream.aclose()
+            assert registry.snapshot("queue_depth") == []
+
+    run_with_fake_binance(test)
+
+
+def test_stream_latencies_are_sampled():
+    registry = MetricsRegistry()
+    multiplexer = StreamMultiplexer(metrics=registry, latency_sample_interval=4)
+    received = []
+    multiplexer._handlers["bnbbtc@trade"] = [(lambda stream, data: received.append(data), TRADE_DECODER, None)]
+    for i in range(10):
+        multiplexer._dispatch("bnbbtc@trade", msgspec.json.encode({**TRADE, "t": i}), time())
+    assert len(received) == registry.counter("stream_messages", stream="bnbbtc@trade").value == 10
+    # the first message of the stream and every 4th after it
+    for metric in registry.snapshot("stream_latency_ms"):
+        assert metric["count"] == 3
+
+
+def test_stream_metrics_are_removed_with_the_last_handler():
+    async def test(binance, uri):
+        registry = MetricsRegistry()
+        async with StreamMultiplexer(uri, control_messages_per_second=100, metrics=registry, latency_sample_interval=1) as multiplexer:
+            first, second = (lambda stream, data: None), (lambda stream, data: None)
+            await multiplexer.subscribe(["a@trade", "b@trade"], first)
+            await multiplexer.subscribe(["a@trade"], second)
+            for stream in ("a@trade", "b@trade"):
+                multiplexer._dispatch(stream, msgspec.json.encode(TRADE), time())
+            assert len(registry.snapshot()) == 8
+            await multiplexer.unsubscribe(["a@trade", "b@trade"], first)
+            assert {metric["labels"]["stream"] for metric in registry.snapshot()} == {"a@trade"}
+            await multiplexer.unsubscribe(["a@trade"], second)
+            # a message read before the unsubscription does not bring the series back
+            multiplexer._dispatch("a@trade", msgspec.json.encode(TRADE), time())
+            assert registry.snapshot() == []
+            await multiplexer.subscribe(["c@trade"], first)
+            multiplexer._dispatch("c@trade", msgspec.json.encode(TRADE), time())
+        assert registry.snapshot() == []
+
+    run_with_fake_binance(test)
+
+
+def test_stream_metrics_disabled():
+    async def test(binance, uri):
+        async with StreamMultiplexer(uri, control_messages_per_second=100, metrics=None) as multiplexer:
+            received = []
+            await multiplexer.subscribe(["bnbbtc@trade"], lambda stream, data: received.append(data))
+            await binance.push("bnbbtc@trade", TRADE)
+            await until(lambda: received)
+            assert multiplexer._stream_metrics == {}
+
+    run_with_fake_binance(test)
+
+
+def test_reconnects_and_resubscribes_dropped_connections():
+    async def test(binance, uri):
+        received, reconnects = [], []
+        async with StreamMultiplexer(uri, max_streams_per_connection=2, control_messages_per_second=100, reconnect_delay=0.01) as multiplexer:
+            await multiplexer.subscribe(["a@trade", "b@trade", "c@trade"], lambda stream, data: received.append(stream), on_reconnect=lambda: reconnects.append(1))
+            await binance.drop_connections()
+            await until(lambda: len(reconnects) == 2)
+            assert multiplexer.num_connections == 2
+            assert sorted(sorted(streams) for streams in binance.connections.values()) == [["a@trade", "b@trade"], ["c@trade"]]
+            for stream in ("a@trade", "b@trade", "c@trade"):
+                await binance.push(stream, {})
+            await until(lambda: len(received) == 3)
+
+    run_with_fake_binance(test)
+
+
+def test_reconnect_retries_with_backoff(monkeypatch):
+    async def test(binance, uri):
+        delays = []
+        sleep = asyncio.sleep
+
+        async def record_sleep(delay):
+            if 1 <= delay <= 3:
+                delays.append(delay)
+            await sleep(0)
+
+        async with StreamMultiplexer(uri, control_messages_per_second=100, reconnect_delay=1, max_reconnect_delay=3) as multiplexer:
+            await multiplexer.subscribe(["a@trade"], lambda stream, data: None)
+            connect = multiplexer._connect
+            attempts = []
+
+            async def failing_connect():
+                attempts.append(1)
+                if len(attempts) <= 3:
+                    raise OSError("connection refused")
+                return await connect()
+
+            monkeypatch.setattr(multiplexer, "_connect", failing_connect)
+            monkeypatch.setattr("binance_stream.asyncio.sleep", record_sleep)
+            await binance.drop_connections()
+            await until(lambda: len(attempts) == 4 and any(binance.connections.values()))
+            monkeypatch.setattr("binance_stream.asyncio.sleep", sleep)
+        assert delays == [1, 2, 3, 3]
+
+    run_with_fake_binance(test)
+
+
+def test_reconnect_does_not_hold_back_other_subscriptions(monkeypatch):
+    async def test(binance, uri):
+        async with StreamMultiplexer(uri, max_streams_per_connection=1, control_messages_per_second=100, reconnect_delay=0.01) as multiplexer:
+            received = []
+            await multiplexer.subscribe(["a@trade", "b@trade"], lambda stream, data: received.append(stream))
+            connect = multiplexer._connect
+            attempts, reachable = [], asyncio.Event()
+
+            async def slow_connect():
+                attempts.append(1)
+                # the two reconnections hang until the server is reachable again
+                if len(attempts) <= 2:
+                    await reachable.wait()
+                return await connect()
+
+            monkeypatch.setattr(multiplexer, "_connect", slow_connect)
+            await binance.drop_connections()
+            await until(lambda: len(attempts) == 2)
+            await asyncio.wait_for(multiplexer.subscribe(["c@trade"], lambda stream, data: received.append(stream)), 1)
+            await multiplexer.unsubscribe(["b@trade"])
+            reachable.set()
+            await until(lambda: multiplexer.num_connections == 2 and all(not connection.closed for connection in multiplexer._connections))
+            await until(lambda: sorted(stream for streams in binance.connections.values() for stream in streams) == ["a@trade", "c@trade"])
+            for stream in ("a@trade", "b@trade", "c@trade"):
+                await binance.push(stream, {})
+            await until(lambda: sorted(received) == ["a@trade", "c@trade"])
+
+    run_with_fake_binance(test)
+
+
+async def _take(stream, n):
+    return [await anext(stream) for _ in range(n)]
+
+
+def test_continuous_klines_backfills_after_reconnect(rest_klines):
+    start, requests = rest_klines
+
+    async def test(binance, uri):
+        async with StreamMultiplexer(uri, control_messages_per_second=100, reconnect_delay=0.01) as multiplexer:
+            stream = continuous_klines("BTCUSDT", "1m", multiplexer=multiplexer)
+            received = asyncio.ensure_future(_take(stream, 5))
+            await until(lambda: any(binance.connections.values()))
+            await binance.push("btcusdt@kline_1m", kline_message(start + 60_000, is_closed=False))
+            await binance.push("btcusdt@kline_1m", kline_message(start))
+            await binance.drop_connections()
+            await until(lambda: requests)
+            await until(lambda: any(binance.connections.values()))
+            await binance.push("btcusdt@kline_1m", kline_message(start + 9 * 60_000, close=9.0))
+            klines = await received
+            await stream.aclose()
+        return klines
+
+    async def run(binance, uri):
+        klines = await test(binance, uri)
+        assert [kline.open_time for kline in klines] == [start + i * 60_000 for i in range(5)]
+        assert klines[0].close == 1.0
+        assert klines[1].close == 1.5
+        assert klines[1].first_trade_id == -1
+        assert requests[0] == ("2023-01-01 00:01:00", None)
+
+    run_with_fake_binance(run)
+
+
+def _response_error(status):
+    url = URL("https://api.binance.com/api/v3/klines")
+    return ClientResponseError(RequestInfo(url, "GET", {}, url), (), status=status)
+
+
+@pytest.mark.parametrize("errors", [[_response_error(503), _response_error(429), ClientConnectionError()]])
+def test_backfill_klines_retries_transient_errors(monkeypatch, errors):
+    calls = []
+
+    async def get_klines_async(symbol, interval, start_time=None, end_time=None, limit=500):
+        calls.append(start_time)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return [[0, "1.0", "2.0", "0.5", "1.5", "10.0", 59_999, "15.0", 7, "5.0", "7.5", "0"]]
+
+    monkeypatch.setattr("binance_stream.get_klines_async", get_klines_async)
+    monkeypatch.setattr("binance_stream.RECONNECT_DELAY", 0)
+    klines = asyncio.run(_backfill_klines("BTCUSDT", "1m", 0))
+    assert len(calls) == 4
+    assert [kline.open_time for kline in klines] == [0]
+
+
+@pytest.mark.parametrize("error, calls", [(_response_error(400), 1), (ClientConnectionError(), BACKFILL_RETRIES + 1)])
+def test_backfill_klines_raises_client_errors_and_gives_up(monkeypatch, error, calls):
+    requests = []
+
+    async def get_klines_async(symbol, interval, start_time=None, end_time=None, limit=500):
+        requests.append(start_time)
+        raise error
+
+    monkeypatch.setattr("binance_stream.get_klines_async", get_klines_async)
+    monkeypatch.setattr("binance_stream.RECONNECT_DELAY", 0)
+    with pytest.raises(type(error)):
+        asyncio.run(_backfill_klines("INVALID", "1m", 0))
+    assert len(requests) == calls
+
+
+def test_continuous_klines_fills_missed_candles_and_deduplicates(rest_klines):
+    start, requests = rest_klines
+
+    async def test(binance, uri):
+        async with StreamMultiplexer(uri, control_messages_per_second=100) as multiplexer:
+            stream = continuous_klines("BTCUSDT", "1m", multiplexer=multiplexer)
+            received = asyncio.ensure_future(_take(stream, 5))
+            await until(lambda: any(binance.connections.values()))
+            for open_time in (start, start, start + 3 * 60_000, start + 2 * 60_000, start + 4 * 60_000):
+                await binance.push("btcusdt@kline_1m", kline_message(open_time, close=9.0))
+            klines = await received
+            await stream.aclose()
+        assert [kline.open_time for kline in klines] == [start + i * 60_000 for i in range(5)]
+        assert [kline.close for kline in klines] == [9.0, 1.5, 1.5, 9.0, 9.0]
+        assert requests == [("2023-01-01 00:01:00", "2023-01-01 00:02:00")]
+
+    run_with_fake_binance(test)
+
+
+def test_continuous_klines_backfills_the_klines_a_slow_consumer_lost(rest_klines):
+    start, requests = rest_klines
+
+    async def test(binance, uri):
+        received = []
+        async with StreamMultiplexer(uri, control_messages_per_second=100) as multiplexer:
+            await multiplexer.subscribe(["ethbtc@trade"], lambda stream, data: received.append(data["t"]))
+            stream = continuous_klines("BTCUSDT", "1m", multiplexer=multiplexer, maxsize=1)
+            first = asyncio.ensure_future(anext(stream))
+            await until(lambda: any(len(streams) == 2 for streams in binance.connections.values()))
+            await binance.push("btcusdt@kline_1m", kline_message(start, close=9.0))
+            assert (await first).open_time == start
+            for i in range(1, 4):
+                await binance.push("btcusdt@kline_1m", kline_message(start + i * 60_000, close=9.0))
+            await binance.push("ethbtc@trade", {**TRADE, "t": 10})
+            await until(lambda: received == [10])
+            # only the last kline was kept, the two before it are backfilled
+            klines = await _take(stream, 3)
+            await stream.aclose()
+        assert [kline.open_time for kline in klines] == [start + i * 60_000 for i in range(1, 4)]
+        assert [kline.close for kline in klines] == [1.5, 1.5, 9.0]
+        assert requests == [("2023-01-01 00:01:00", "2023-01-01 00:02:00")]
+
+    run_with_fake_binance(test)
+
+
+def test_continuous_klines_from_start_time(rest_klines):
+    start, requests = rest_klines
+
+    async def test(binance, uri):
+        async with StreamMultiplexer(uri, control_messages_per_second=100) as multiplexer:
+            stream = continuous_klines("BTCUSDT", "1m", start_time=start + 7 * 60_000, multiplexer=multiplexer)
+            received = asyncio.ensure_future(_take(stream, 4))
+            await until(lambda: any(binance.connections.values()))
+            await until(lambda: requests)
+            await binance.push("btcusdt@kline_1m", kline_message(start + 9 * 60_000, close=9.0))
+            await binance.push("btcusdt@kline_1m", kline_message(start + 10 * 60_000, close=10.0))
+            klines = await received
+            await stream.aclose()
+        assert [kline.open_time for kline in klines] == [start + i * 60_000 for i in range(7, 11)]
+        assert klines[-1].close == 10.0
+
+    run_with_fake_binance(test)
+
+
+def test_continuous_klines_invalid_interval():
+    with pytest.raises(ValueError):
+        asyncio.run(anext(continuous_klines("BTCUSDT", "7m")))
+    # monthly candles have no fixed length to backfill with
+    with pytest.raises(ValueError, match="Invalid interval: 1M"):
+        asyncio.run(anext(continuous_klines("BTCUSDT", "1M")))
@@ -1,7 +1,17 @@
+import os
+import re
+import time
+import threading
+from functools import partial
 from unittest.mock import patch
-from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
 
 import pytest
+import numpy as np
+import pandas as pd
+from aiohttp import ClientResponseError
+from aioresponses import aioresponses
 from requests import HTTPError
 
 from binance import (
@@ -23,15 +33,62 @@ from binance import (
     get_order_book_ticker_for_symbols,
     get_rolling_ticker_for_symbol,
     get_rolling_ticker_for_symbols,
+    get_order_book,
     get_klines,
     get_klines_for_year,
     get_account_info,
+    klines_to_df,
+    load_klines,
+    append_klines,
+    read_last_open_time,
+    update_klines,
+    klines_df_check,
+    find_gaps,
+    get_klines_for_gaps,
+    repair_klines,
+    KLINE_COLUMNS,
+    JOURNAL_SUFFIX,
+    ping_async,
+    get_server_time_async,
+    get_average_price_async,
+    get_latest_price_async,
+    get_exchange_info_async,
+    get_exchange_info_for_symbol_async,
+    get_exchange_info_for_symbols_async,
+    get_24hr_ticker_async,
+    get_24hr_ticker_for_symbol_async,
+    get_24hr_ticker_for_symbols_async,
+    get_trading_day_ticker_for_symbol_async,
+    get_trading_day_ticker_for_symbols_async,
+    get_price_ticker_for_symbol_async,
+    get_price_ticker_for_symbols_async,
+    get_order_book_ticker_for_symbol_async,
+    get_order_book_ticker_for_symbols_async,
+    get_rolling_ticker_for_symbol_async,
+    get_rolling_ticker_for_symbols_async,
+    get_account_info_async,
+    get_order_book_async,
+    get_klines_async,
+    get_klines_for_year_async,
+    ASYNC_CLIENT,
+    CLIENT,
+    RATE_LIMITER,
+    WeightRateLimiter,
     _generate_signature,
     _datetime_str_to_utc_milliseconds,
     _interval_str_to_timedelta,
     _timedelta_to_interval_str,
     _generate_timeframes,
+    _cache_lock,
+    _tail_offset,
+    _apply_journal,
 )
+from testing import FrozenDatetime, hourly_klines, run_closing
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limiter():
+    RATE_LIMITER.reset()
 
 
 HEADERS = {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/56.0.2924.87 Safari/537.36", "Accept-Encoding": "gzip, deflate", "Accept": "application/json", "Connection": "keep-alive"}
@@ -478,6 +535,39 @@ class TestGetRollingTicker:
             get_rolling_ticker_for_symbols(["BNBBTC", "BTCUSDT"], window_size="invalid")
 
 
+class TestGetOrderBook:
+    URL = "https://api.binance.com/api/v3/depth"
+
+    def test_get_order_book(self, requests_mock):
+        mock_response = {"lastUpdateId": 1027024, "bids": [["4.00000000", "431.00000000"]], "asks": [["4.00000200", "12.00000000"]]}
+        requests_mock.get(self.URL, json=mock_response)
+        assert get_order_book("BNBBTC") == mock_response
+        assert requests_mock.called_once
+        assert requests_mock.last_request.url == self.URL + "?symbol=BNBBTC&limit=100"
+        assert requests_mock.last_request.method == "GET"
+        assert requests_mock.last_request.headers == HEADERS
+
+    @pytest.mark.parametrize(("limit", "weight"), [(1, 5), (100, 5), (101, 25), (500, 25), (1000, 50), (5000, 250)])
+    def test_get_order_book_weight(self, requests_mock, limit, weight):
+        requests_mock.get(self.URL, json={})
+        with patch.object(RATE_LIMITER, "reserve", wraps=RATE_LIMITER.reserve) as reserve_mock:
+            get_order_book("BNBBTC", limit)
+        reserve_mock.assert_called_once_with(weight)
+        assert requests_mock.last_request.qs["limit"] == [str(limit)]
+
+    @pytest.mark.parametrize("limit", [0, 5001])
+    def test_get_order_book_invalid_limit(self, requests_mock, limit):
+        with pytest.raises(ValueError):
+            get_order_book("BNBBTC", limit)
+        assert not requests_mock.called
+
+    @pytest.mark.parametrize("status_code", [400, 403, 500])
+    def test_get_order_book_failure(self, requests_mock, status_code):
+        requests_mock.get(self.URL, status_code=status_code)
+        with pytest.raises(HTTPError):
+            get_order_book("BNBBTC")
+
+
 class TestGetKlines:
     URL = "https://api.binance.com/api/v3/klines"
 
@@ -571,8 +661,7 @@ class TestGetKlines:
 class TestGetKlinesForYear:
     URL = "https://api.binance.com/api/v3/klines"
 
-    @patch("binance.sleep", autospec=True)
-    def test_get_klines_for_year_with_daily_interval(self, sleep_mock, requests_mock):
+    def test_get_klines_for_year_with_daily_interval(self, requests_mock):
         mock_response = [[] for _ in range(365)]
         requests_mock.get(self.URL, json=mock_response)
         assert get_klines_for_year("BTCUSDT", 2023, "1d") == mock_response
@@ -580,25 +669,354 @@ class TestGetKlinesForYear:
         assert requests_mock.last_request.url == f"{self.URL}?symbol=BTCUSDT&interval=1d&limit=500&startTime=1672531200000&endTime=1704063600000"
         assert requests_mock.last_request.method == "GET"
         assert requests_mock.last_request.headers == HEADERS
-        sleep_mock.assert_called_once_with(1)
 
-    @patch("binance.sleep", autospec=True)
+    @patch("http_client.sleep", autospec=True)
     def test_get_klines_for_year_with_hourly_interval(self, sleep_mock, requests_mock):
         requests_mock.get(self.URL, json=[])
         assert get_klines_for_year("BTCUSDT", 2023, "1h") == []
         assert requests_mock.called
         assert requests_mock.call_count == 18
-        sleep_mock.assert_called_with(1)
-        assert sleep_mock.call_count == 18
+        sleep_mock.assert_not_called()
 
-    @patch("binance.sleep", autospec=True)
+    @patch("http_client.sleep", autospec=True)
     def test_get_klines_for_year_with_minute_interval(self, sleep_mock, requests_mock):
         requests_mock.get(self.URL, json=[])
         assert get_klines_for_year("BTCUSDT", 2023, "1m") == []
         assert requests_mock.called
         assert requests_mock.call_count == 1052
-        sleep_mock.assert_called_with(1)
-        assert sleep_mock.call_count == 1052
+        sleep_mock.assert_not_called()
+
+    @patch("http_client.sleep", autospec=True)
+    def test_get_klines_for_year_waits_when_weight_limit_is_reached(self, sleep_mock, requests_mock):
+        requests_mock.get(self.URL, json=[], headers={"X-MBX-USED-WEIGHT-1M": "5990"})
+        with patch("binance.time", return_value=1_699_999_990.0):
+            sleep_mock.side_effect = lambda _: RATE_LIMITER.reset()
+            assert get_klines_for_year("BTCUSDT", 2023, "1h") == []
+        assert requests_mock.call_count == 18
+        sleep_mock.assert_called_with(50.0)
+        assert sleep_mock.call_count == 17
+
+    @pytest.mark.parametrize("max_workers", [1, 4, 32])
+    def test_get_klines_for_year_concurrently_keeps_page_order(self, requests_mock, max_workers):
+        def page(request, context):
+            start_time = int(request.qs["starttime"][0])
+            time.sleep(0.001 * (hash(start_time) % 5))
+            return [[start_time]]
+
+        requests_mock.get(self.URL, json=page)
+        klines = get_klines_for_year("BTCUSDT", 2023, "1h", max_workers=max_workers)
+        assert requests_mock.call_count == 18
+        assert klines == sorted(klines)
+        assert klines[0] == [1672531200000]
+        assert len(klines) == 18
+
+    def test_get_klines_for_year_concurrently_uses_multiple_threads(self):
+        threads = set()
+        barrier = threading.Barrier(4, timeout=5)
+
+        def page(symbol, interval, start_time, end_time):
+            threads.add(threading.get_ident())
+            barrier.wait()
+            return []
+
+        with patch("binance.get_klines", side_effect=page), patch("binance._generate_timeframes", return_value=[("2023-01-01 00:00:00", "2023-01-01 01:00:00")] * 4):
+            assert get_klines_for_year("BTCUSDT", 2023, "1h", max_workers=4) == []
+        assert len(threads) == 4
+
+    def test_get_klines_for_year_threads_do_not_exceed_the_connection_pool(self, requests_mock):
+        requests_mock.get(self.URL, json=[])
+        with patch("binance.ThreadPoolExecutor", wraps=ThreadPoolExecutor) as executor_mock:
+            get_klines_for_year("BTCUSDT", 2023, "1h", max_workers=32)
+        executor_mock.assert_called_once_with(max_workers=CLIENT.pool_maxsize)
+
+
+class TestWeightRateLimiter:
+
+    @pytest.fixture
+    def now(self):
+        with patch("binance.time", return_value=1_699_999_990.0) as time_mock:
+            yield time_mock
+
+    def test_reserve_below_limit(self, now):
+        limiter = WeightRateLimiter(weight_limit=100, max_usage=1.0)
+        assert limiter.reserve(60) == 0
+        assert limiter.reserve(40) == 0
+        assert limiter.used_weight == 100
+
+    def test_reserve_above_limit_waits_for_next_minute(self, now):
+        limiter = WeightRateLimiter(weight_limit=100, max_usage=1.0)
+        assert limiter.reserve(60) == 0
+        assert limiter.reserve(41) == 50.0
+        assert limiter.used_weight == 60
+        now.return_value = 1_700_000_060.0
+        assert limiter.reserve(41) == 0
+        assert limiter.used_weight == 41
+
+    def test_reserve_respects_max_usage(self, now):
+        limiter = WeightRateLimiter(weight_limit=100, max_usage=0.5)
+        assert limiter.reserve(50) == 0
+        assert limiter.reserve(1) == 50.0
+
+    def test_reserve_always_allows_a_request_in_an_empty_window(self, now):
+        limiter = WeightRateLimiter(weight_limit=10)
+        assert limiter.reserve(20) == 0
+
+    def test_update_from_used_weight_header(self, now):
+        limiter = WeightRateLimiter(weight_limit=6000)
+        limiter.reserve(2)
+        limiter.update(200, {"X-MBX-USED-WEIGHT-1M": "5800"})
+        assert limiter.used_weight == 5800
+        limiter.update(200, {"X-MBX-USED-WEIGHT-1M": "10"})
+        assert limiter.used_weight == 5800
+        assert limiter.reserve(2) == 50.0
+
+    @pytest.mark.parametrize("status_code", [418, 429])
+    def test_update_with_retry_after(self, now, status_code):
+        limiter = WeightRateLimiter()
+        limiter.update(status_code, {"Retry-After": "120"})
+        assert limiter.reserve(1) == 120.0
+        now.return_value += 120
+        assert limiter.reserve(1) == 0
+
+    def test_update_without_retry_after_header(self, now):
+        limiter = WeightRateLimiter()
+        limiter.update(429, {})
+        assert limiter.reserve(1) == 60.0
+
+    @patch("http_client.sleep", autospec=True)
+    def test_client_retries_after_retry_after(self, sleep_mock, requests_mock, now):
+        requests_mock.get(
+            "https://api.binance.com/api/v3/ping",
+            [{"status_code": 429, "headers": {"Retry-After": "3"}}, {"json": {}}],
+        )
+        sleep_mock.side_effect = lambda seconds: setattr(now, "return_value", now.return_value + seconds)
+        assert ping() == {}
+        assert requests_mock.call_count == 2
+        sleep_mock.assert_called_once_with(3.0)
+
+    @patch("http_client.sleep", autospec=True)
+    def test_client_gives_up_after_retries(self, sleep_mock, requests_mock, now):
+        requests_mock.get("https://api.binance.com/api/v3/ping", status_code=418, headers={"Retry-After": "1"})
+        sleep_mock.side_effect = lambda seconds: setattr(now, "return_value", now.return_value + seconds)
+        with pytest.raises(HTTPError):
+            ping()
+        assert requests_mock.call_count == 4
+
+    def test_async_client_retries_after_retry_after(self, now):
+        with aioresponses() as mocked, patch("asyncio.sleep", autospec=True) as sleep_mock:
+            mocked.get("https://api.binance.com/api/v3/ping", status=429, headers={"Retry-After": "3"})
+            mocked.get("https://api.binance.com/api/v3/ping", payload={})
+            sleep_mock.side_effect = lambda seconds: setattr(now, "return_value", now.return_value + seconds)
+            assert _run(ping_async()) == {}
+            sleep_mock.assert_called_once_with(3.0)
+
+
+class TestKlinesToDf:
+    KLINES = [
+        [1704067200000, "42283.58000000", "42554.57000000", "42261.02000000", "42475.23000000", "1271.68108000", 1704070799999, "53957248.97378900", 47134, "682.57581000", "28957416.81964500", "0"],
+        [1704070800000, "42475.23000000", "42775.00000000", "42431.65000000", "42613.56000000", "1196.37856000", 1704074399999, "50984893.34814160", 50396, "712.32227000", "30355645.34827640", "0"],
+    ]
+
+    def test_klines_to_df(self):
+        df = klines_to_df(self.KLINES)
+        assert list(df.columns) == list(KLINE_COLUMNS[1:-1])
+        assert df.index.name == "Open Time"
+        assert list(df.index) == [pd.Timestamp("2024-01-01 00:00:00", tz="UTC"), pd.Timestamp("2024-01-01 01:00:00", tz="UTC")]
+        assert list(df["Close Time"]) == [pd.Timestamp("2024-01-01 00:59:59.999", tz="UTC"), pd.Timestamp("2024-01-01 01:59:59.999", tz="UTC")]
+        assert df["Open"].tolist() == [42283.58, 42475.23]
+        assert df["Taker Buy Quote Asset Volume"].tolist() == [28957416.819645, 30355645.3482764]
+        assert df["Number of Trades"].tolist() == [47134, 50396]
+
+    def test_klines_to_df_dtypes(self):
+        df = klines_to_df(self.KLINES)
+        assert str(df.index.dtype) == "datetime64[ms, UTC]"
+        assert str(df["Close Time"].dtype) == "datetime64[ms, UTC]"
+        assert df["Number of Trades"].dtype == np.int64
+        assert all(df[column].dtype == np.float64 for column in KLINE_COLUMNS[1:6])
+
+    def test_klines_to_df_empty(self):
+        df = klines_to_df([])
+        assert df.empty
+        assert list(df.columns) == list(KLINE_COLUMNS[1:-1])
+
+
+class TestUpdateKlines:
+    URL = "https://api.binance.com/api/v3/klines"
+
+    @pytest.fixture
+    def csv_filepath(self, tmp_path):
+        csv_filepath = str(tmp_path / "BTCUSDT-2024-1h.csv")
+        klines_to_df(hourly_klines(0, 3)).to_csv(csv_filepath, index_label="Open Time")
+        return csv_filepath
+
+    @patch("binance.datetime", FrozenDatetime)
+    def test_update_klines_replaces_last_candle_and_appends(self, requests_mock, csv_filepath):
+        with open(csv_filepath, "rb") as f:
+            head = f.read().split(b"\n")[:3]
+        requests_mock.get(self.URL, json=hourly_klines(2, 3, close_offset=0.5))
+        df = update_klines(csv_filepath, "BTCUSDT", "1h")
+        expected = klines_to_df(hourly_klines(0, 2) + hourly_klines(2, 3, close_offset=0.5))
+        with open(csv_filepath, "rb") as f:
+            content = f.read()
+        assert content == expected.to_csv(index_label="Open Time").encode()
+        assert content.split(b"\n")[:3] == head
+        assert df.index.equals(klines_to_df(hourly_klines(2, 3)).index)
+        assert df["Close"].tolist() == [103.5, 104.5, 105.5]
+        assert load_klines(csv_filepath)["Close"].tolist() == [101.0, 102.0, 103.5, 104.5, 105.5]
+        assert requests_mock.last_request.qs["starttime"] == ["1704074400000"]
+
+    @patch("binance.datetime", FrozenDatetime)
+    def test_update_klines_does_not_rewrite_history(self, requests_mock, csv_filepath):
+        requests_mock.get(self.URL, json=hourly_klines(2, 3))
+        with patch("pandas.DataFrame.to_csv", autospec=True, side_effect=pd.DataFrame.to_csv) as to_csv_mock:
+            update_klines(csv_filepath, "BTCUSDT", "1h")
+        assert [len(call.args[0]) for call in to_csv_mock.call_args_list] == [3]
+
+    def test_update_klines_up_to_date(self, requests_mock, csv_filepath):
+        class JustAfter(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return cls(2024, 1, 1, 2, 30, tzinfo=timezone.utc)
+
+        with patch("binance.datetime", JustAfter):
+            df = update_klines(csv_filepath, "BTCUSDT", "1h")
+        assert not requests_mock.called
+        assert df.empty
+
+    def test_append_klines_ignores_empty_frame(self, csv_filepath):
+        with open(csv_filepath, "rb") as f:
+            before = f.read()
+        append_klines(csv_filepath, klines_to_df([]))
+        with open(csv_filepath, "rb") as f:
+            assert f.read() == before
+
+    def test_append_klines_across_read_blocks(self, tmp_path):
+        csv_filepath = str(tmp_path / "BTCUSDT-2024-1h.csv")
+        klines_to_df(hourly_klines(0, 2000)).to_csv(csv_filepath, index_label="Open Time")
+        append_klines(csv_filepath, klines_to_df(hourly_klines(1990, 20, close_offset=0.5)))
+        df = load_klines(csv_filepath)
+        assert len(df) == 2010
+        assert df.index.is_unique and df.index.is_monotonic_increasing
+        assert df["Close"].iloc[1989] == 2090.0
+        assert df["Close"].iloc[1990] == 2091.5
+
+    def test_interrupted_append_is_completed_on_load(self, csv_filepath):
+        new_rows = klines_to_df(hourly_klines(2, 2, close_offset=0.5))
+        with open(csv_filepath, "rb") as f:
+            content = f.read()
+        offset = content.index(b"2024-01-01 02:00:00")
+        with open(csv_filepath + JOURNAL_SUFFIX, "wb") as f:
+            f.write(offset.to_bytes(8, "little") + new_rows.to_csv(header=False).encode())
+        with open(csv_filepath, "r+b") as f:
+            f.truncate(offset + 10)
+        df = load_klines(csv_filepath)
+        assert df["Close"].tolist() == [101.0, 102.0, 103.5, 104.5]
+        assert not os.path.exists(csv_filepath + JOURNAL_SUFFIX)
+
+    def test_reading_does_not_create_a_lock_file(self, tmp_path):
+        csv_filepath = str(tmp_path / "BTCUSDT-2024-1h.csv")
+        with pytest.raises(FileNotFoundError):
+            load_klines(csv_filepath)
+        klines_to_df(hourly_klines(0, 2)).to_csv(csv_filepath, index_label="Open Time")
+        assert len(load_klines(csv_filepath)) == 2
+        assert read_last_open_time(csv_filepath) == pd.Timestamp("2024-01-01 01:00", tz="UTC")
+        assert os.listdir(tmp_path) == ["BTCUSDT-2024-1h.csv"]
+
+    def test_load_klines_waits_for_a_running_append(self, csv_filepath):
+        new_rows = klines_to_df(hourly_klines(2, 2, close_offset=0.5))
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            with _cache_lock(csv_filepath):
+                offset = _tail_offset(csv_filepath, new_rows.index[0])
+                with open(csv_filepath + JOURNAL_SUFFIX, "wb") as f:
+                    f.write(offset.to_bytes(8, "little") + new_rows.to_csv(header=False).encode())
+                future = executor.submit(load_klines, csv_filepath)
+                # the reader neither completes the journal of a live append nor reads its torn tail
+                with pytest.raises(TimeoutError):
+                    future.result(timeout=0.2)
+                assert os.path.exists(csv_filepath + JOURNAL_SUFFIX)
+                _apply_journal(csv_filepath, csv_filepath + JOURNAL_SUFFIX)
+            assert future.result(timeout=5)["Close"].tolist() == [101.0, 102.0, 103.5, 104.5]
+
+
+class TestFindGaps:
+
+    def test_find_gaps(self):
+        index = pd.DatetimeIndex(["2024-01-01 00:00", "2024-01-01 01:00", "2024-01-01 04:00", "2024-01-01 05:00", "2024-01-01 07:00"], tz="UTC")
+        assert find_gaps(index, "1h") == [
+            (pd.Timestamp("2024-01-01 02:00", tz="UTC"), pd.Timestamp("2024-01-01 03:00", tz="UTC")),
+            (pd.Timestamp("2024-01-01 06:00", tz="UTC"), pd.Timestamp("2024-01-01 06:00", tz="UTC")),
+        ]
+
+    def test_find_gaps_with_timedelta(self):
+        index = pd.DatetimeIndex(["2024-01-01 00:00", "2024-01-01 00:01", "2024-01-01 00:05"], tz="UTC")
+        assert find_gaps(index, timedelta(minutes=1)) == [(pd.Timestamp("2024-01-01 00:02", tz="UTC"), pd.Timestamp("2024-01-01 00:04", tz="UTC"))]
+
+    def test_find_gaps_without_gaps(self):
+        assert find_gaps(pd.date_range("2024-01-01", periods=48, freq="1h", tz="UTC"), "1h") == []
+        assert find_gaps(pd.DatetimeIndex([], tz="UTC"), "1h") == []
+
+    def test_find_gaps_any_index_unit(self):
+        index = pd.DatetimeIndex(["2024-01-01 00:00", "2024-01-01 03:00"], tz="UTC").as_unit("ns")
+        assert find_gaps(index, "1h") == [(pd.Timestamp("2024-01-01 01:00", tz="UTC"), pd.Timestamp("2024-01-01 02:00", tz="UTC"))]
+
+    def test_klines_df_check_warns_about_gaps(self):
+        df = klines_to_df(hourly_klines(0, 2) + hourly_klines(4, 2))
+        with pytest.warns(UserWarning, match="missing entries. 2024-01-01 02:00:00\\+00:00 to 2024-01-01 03:00:00\\+00:00"):
+            klines_df_check(df)
+
+    def test_klines_df_check_complete(self, recwarn):
+        klines_df_check(klines_to_df(hourly_klines(0, 24)))
+        assert len(recwarn) == 0
+
+
+class TestRepairKlines:
+    URL = "https://api.binance.com/api/v3/klines"
+
+    @pytest.fixture
+    def csv_filepath(self, tmp_path):
+        csv_filepath = str(tmp_path / "BTCUSDT-2024-1h.csv")
+        klines_to_df(hourly_klines(0, 2) + hourly_klines(4, 2) + hourly_klines(7, 1)).to_csv(csv_filepath, index_label="Open Time")
+        return csv_filepath
+
+    def test_get_klines_for_gaps_requests_only_the_gaps(self, requests_mock):
+        requests_mock.get(self.URL, json=lambda request, context: hourly_klines((int(request.qs["starttime"][0]) - 1704067200000) // 3600000, 3))
+        gaps = [(pd.Timestamp("2024-01-01 02:00", tz="UTC"), pd.Timestamp("2024-01-01 03:00", tz="UTC"))]
+        df = get_klines_for_gaps("BTCUSDT", "1h", gaps)
+        assert requests_mock.call_count == 1
+        assert requests_mock.last_request.qs["starttime"] == ["1704074400000"]
+        assert requests_mock.last_request.qs["endtime"] == ["1704081600000"]
+        assert list(df.index) == [pd.Timestamp("2024-01-01 02:00", tz="UTC"), pd.Timestamp("2024-01-01 03:00", tz="UTC")]
+
+    def test_repair_klines(self, requests_mock, csv_filepath):
+        requests_mock.get(self.URL, json=lambda request, context: hourly_klines((int(request.qs["starttime"][0]) - 1704067200000) // 3600000, 2, close_offset=0.5))
+        df = repair_klines(csv_filepath, "BTCUSDT", "1h")
+        assert requests_mock.call_count == 2
+        assert df.index.equals(pd.date_range("2024-01-01", periods=8, freq="1h", tz="UTC"))
+        assert df["Close"].tolist() == [101.0, 102.0, 103.5, 104.5, 105.0, 106.0, 107.5, 108.0]
+        assert load_klines(csv_filepath).index.equals(df.index)
+
+    def test_repair_klines_keeps_candles_appended_during_the_download(self, requests_mock, csv_filepath):
+        def respond(request, context):
+            # a sink lands the next candle while the gaps are downloaded
+            append_klines(csv_filepath, klines_to_df(hourly_klines(8, 1)))
+            return hourly_klines((int(request.qs["starttime"][0]) - 1704067200000) // 3600000, 2, close_offset=0.5)
+
+        requests_mock.get(self.URL, json=respond)
+        df = repair_klines(csv_filepath, "BTCUSDT", "1h")
+        assert df.index.equals(pd.date_range("2024-01-01", periods=9, freq="1h", tz="UTC"))
+        assert df["Close"].tolist() == [101.0, 102.0, 103.5, 104.5, 105.0, 106.0, 107.5, 108.0, 109.0]
+
+    def test_repair_klines_without_gaps(self, requests_mock, tmp_path):
+        csv_filepath = str(tmp_path / "BTCUSDT-2024-1h.csv")
+        klines_to_df(hourly_klines(0, 24)).to_csv(csv_filepath, index_label="Open Time")
+        assert len(repair_klines(csv_filepath, "BTCUSDT", "1h")) == 24
+        assert not requests_mock.called
+
+    def test_repair_klines_keeps_gaps_without_exchange_data(self, requests_mock, csv_filepath, caplog):
+        requests_mock.get(self.URL, json=[])
+        df = repair_klines(csv_filepath, "BTCUSDT", "1h")
+        assert len(df) == 5
+        assert "No data available" in caplog.text
 
 
 class TestGetAccountInfo:
@@ -745,3 +1163,119 @@ class TestTimedeltaToIntervalStr:
 )
 def test_generate_time_frames(start_time, end_time, interval, limit, expected_time_frames):
     assert _generate_timeframes(start_time, end_time, interval, limit) == expected_time_frames
+
+
+_run = partial(run_closing, client=ASYNC_CLIENT)
+
+
+class TestAsyncRestFunctions:
+    URL = "https://api.binance.com/api/v3/"
+
+    @pytest.mark.parametrize(
+        ("func", "args", "expected_url"),
+        (
+            pytest.param(ping_async, (), f"{URL}ping", id="ping_async"),
+            pytest.param(get_server_time_async, (), f"{URL}time", id="get_server_time_async"),
+            pytest.param(get_average_price_async, ("BNBBTC",), f"{URL}avgPrice?symbol=BNBBTC", id="get_average_price_async"),
+            pytest.param(get_latest_price_async, ("BTCUSDT",), f"{URL}ticker/price?symbol=BTCUSDT", id="get_latest_price_async"),
+            pytest.param(get_exchange_info_async, (), f"{URL}exchangeInfo", id="get_exchange_info_async"),
+            pytest.param(get_exchange_info_for_symbol_async, ("BNBBTC",), f"{URL}exchangeInfo?symbol=BNBBTC", id="get_exchange_info_for_symbol_async"),
+            pytest.param(
+                get_exchange_info_for_symbols_async,
+                (["BNBBTC", "BTCUSDT"],),
+                f"{URL}exchangeInfo?symbols=%5B%22BNBBTC%22,%22BTCUSDT%22%5D",
+                id="get_exchange_info_for_symbols_async",
+            ),
+            pytest.param(get_24hr_ticker_async, ("FULL",), f"{URL}ticker/24hr?type=FULL", id="get_24hr_ticker_async"),
+            pytest.param(get_24hr_ticker_for_symbol_async, ("BNBBTC",), f"{URL}ticker/24hr?type=MINI&symbol=BNBBTC", id="get_24hr_ticker_for_symbol_async"),
+            pytest.param(
+                get_24hr_ticker_for_symbols_async,
+                (["BTCUSDT", "BNBUSDT"],),
+                f"{URL}ticker/24hr?type=MINI&symbols=%5B%22BTCUSDT%22,%22BNBUSDT%22%5D",
+                id="get_24hr_ticker_for_symbols_async",
+            ),
+            pytest.param(
+                get_trading_day_ticker_for_symbol_async,
+                ("BNBBTC", "FULL"),
+                f"{URL}ticker/tradingDay?type=FULL&symbol=BNBBTC",
+                id="get_trading_day_ticker_for_symbol_async",
+            ),
+            pytest.param(
+                get_trading_day_ticker_for_symbols_async,
+                (["BTCUSDT", "BNBUSDT"],),
+                f"{URL}ticker/tradingDay?type=MINI&symbols=%5B%22BTCUSDT%22,%22BNBUSDT%22%5D",
+                id="get_trading_day_ticker_for_symbols_async",
+            ),
+            pytest.param(get_price_ticker_for_symbol_async, ("LTCBTC",), f"{URL}ticker/price?symbol=LTCBTC", id="get_price_ticker_for_symbol_async"),
+            pytest.param(
+                get_price_ticker_for_symbols_async,
+                (["BTCUSDT", "BNBUSDT"],),
+                f"{URL}ticker/price?symbols=%5B%22BTCUSDT%22,%22BNBUSDT%22%5D",
+                id="get_price_ticker_for_symbols_async",
+            ),
+            pytest.param(get_order_book_async, ("BNBBTC", 5000), f"{URL}depth?symbol=BNBBTC&limit=5000", id="get_order_book_async"),
+            pytest.param(get_order_book_ticker_for_symbol_async, ("LTCBTC",), f"{URL}ticker/bookTicker?symbol=LTCBTC", id="get_order_book_ticker_for_symbol_async"),
+            pytest.param(
+                get_order_book_ticker_for_symbols_async,
+                (["BTCUSDT", "BNBUSDT"],),
+                f"{URL}ticker/bookTicker?symbols=%5B%22BTCUSDT%22,%22BNBUSDT%22%5D",
+                id="get_order_book_ticker_for_symbols_async",
+            ),
+            pytest.param(
+                get_rolling_ticker_for_symbol_async,
+                ("BNBBTC", "1h"),
+                f"{URL}ticker?type=MINI&symbol=BNBBTC&windowSize=1h",
+                id="get_rolling_ticker_for_symbol_async",
+            ),
+            pytest.param(
+                get_rolling_ticker_for_symbols_async,
+                (["BTCUSDT", "BNBUSDT"], "1d", "FULL"),
+                f"{URL}ticker?type=FULL&symbols=%5B%22BTCUSDT%22,%22BNBUSDT%22%5D&windowSize=1d",
+                id="get_rolling_ticker_for_symbols_async",
+            ),
+            pytest.param(
+                get_klines_async,
+                ("BTCUSDT", "1h", "2023-01-01 00:00:00", "2023-01-02 00:00:00"),
+                f"{URL}klines?symbol=BTCUSDT&interval=1h&limit=500&startTime=1672531200000&endTime=1672617600000",
+                id="get_klines_async",
+            ),
+        ),
+    )
+    def test_async_function(self, func, args, expected_url):
+        with aioresponses() as mocked:
+            mocked.get(expected_url, payload={})
+            assert _run(func(*args)) == {}
+            mocked.assert_called_once()
+
+    def test_async_function_http_failure(self):
+        with aioresponses() as mocked:
+            mocked.get(f"{self.URL}ping", status=500)
+            with pytest.raises(ClientResponseError):
+                _run(ping_async())
+
+    def test_get_account_info_async(self):
+        with aioresponses() as mocked:
+            mocked.get(re.compile(rf"^{self.URL}account\?"), payload={})
+            assert _run(get_account_info_async("api_key", "shh")) == {}
+            request = next(iter(mocked.requests.values()))[0]
+            assert request.kwargs["headers"]["X-MBX-APIKEY"] == "api_key"
+            assert set(request.kwargs["params"]) == {"omitZeroBalances", "timestamp", "signature"}
+
+    @pytest.mark.parametrize(
+        ("func", "args", "kwargs"),
+        (
+            pytest.param(get_24hr_ticker_async, (), {"request_type": "invalid"}, id="invalid request type"),
+            pytest.param(get_rolling_ticker_for_symbol_async, ("BNBBTC",), {"window_size": "invalid"}, id="invalid window size"),
+            pytest.param(get_klines_async, ("BTCUSDT",), {"interval": "invalid"}, id="invalid interval"),
+            pytest.param(get_klines_async, ("BTCUSDT",), {"limit": 1001}, id="invalid limit"),
+        ),
+    )
+    def test_async_function_validation(self, func, args, kwargs):
+        with pytest.raises(ValueError):
+            _run(func(*args, **kwargs))
+
+    def test_get_klines_for_year_async(self):
+        with aioresponses() as mocked:
+            mocked.get(re.compile(rf"^{self.URL}klines\?"), payload=[[0]], repeat=True)
+            assert _run(get_klines_for_year_async("BTCUSDT", 2023, "1h")) == [[0]] * 18
+            assert sum(len(requests) for requests in mocked.requests.values()) == 18
@@ -1,59 +1,47 @@
-import requests
+from http_client import HttpClient, AsyncHttpClient
 
 
 HEADERS = {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/56.0.2924.87 Safari/537.36", "Accept-Encoding": "gzip, deflate", "Accept": "application/json", "Connection": "keep-alive"}
+CLIENT = HttpClient(headers=HEADERS)
+ASYNC_CLIENT = AsyncHttpClient(headers=HEADERS)
 
 
 def get_server_time() -> dict:
     """Test connectivity to the Rest API and get the current server time."""
-    response = requests.get(url="https://api.coinbase.com/v2/time", headers=HEADERS, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    return CLIENT.get("https://api.coinbase.com/v2/time").json()
 
 
 def list_currencies() -> dict:
     """Get a list of all known currencies."""
-    response = requests.get(url="https://api.coinbase.com/v2/currencies", headers=HEADERS, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    return CLIENT.get("https://api.coinbase.com/v2/currencies").json()
 
 
 def get_currency(currency_id: str) -> dict:
     """Get a currency by ID."""
     params = {"currency_id": currency_id}
-    response = requests.get(url="https://api.coinbase.com/v2/currencies", headers=HEADERS, params=params, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    return CLIENT.get("https://api.coinbase.com/v2/currencies", params=params).json()
 
 
 def get_single_product_pairs(product_id: str) -> dict:
     """Get a list of available currency pairs for trading."""
     params = {"product_id": product_id}
-    response = requests.get(url="https://api.coinbase.com/v2/products", headers=HEADERS, params=params, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    return CLIENT.get("https://api.coinbase.com/v2/products", params=params).json()
 
 
 def list_trading_pairs() -> dict:
     """Get a list of available currency pairs for trading."""
-    response = requests.get(url="https://api.exchange.coinbase.com/products", headers=HEADERS, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    return CLIENT.get("https://api.exchange.coinbase.com/products").json()
 
 
 def get_all_product_volume() -> dict:
     """Gets 30day and 24hour volume for all products and market types."""
-    response = requests.get(url="https://api.exchange.coinbase.com/products/volume-summary", headers=HEADERS, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    return CLIENT.get("https://api.exchange.coinbase.com/products/volume-summary").json()
 
 
 def get_single_product_info(product_id: str) -> dict:
     """Get information on a single product."""
     params = {"product_id": product_id}
-    response = requests.get(url="https://api.exchange.coinbase.com/products", headers=HEADERS, params=params, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    return CLIENT.get("https://api.exchange.coinbase.com/products", params=params).json()
 
 
 def get_product_candles(product_id: str, granularity: int | None = None, start: str | None = None, end: str | None = None) -> dict:
@@ -84,47 +72,103 @@ def get_product_candles(product_id: str, granularity: int | None = None, start:
         To retrieve fine granularity data over a larger time range, you must make multiple requests with new start/end ranges.
     """
 
-    if granularity and granularity not in [60, 300, 900, 3600, 21600, 86400]:
-        raise ValueError("Granularity must be 60, 300, 900, 3600, 21600, or 86400")
-
-    params = {}
-
-    if granularity:
-        params["granularity"] = granularity
-
-    if start:
-        params["start"] = start
-
-    if end:
-        params["end"] = end
-
-    response = requests.get(url=f"https://api.exchange.coinbase.com/products/{product_id}/candles", headers=HEADERS, params=params, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    params = _product_candles_params(granularity, start, end)
+    return CLIENT.get(f"https://api.exchange.coinbase.com/products/{product_id}/candles", params=params).json()
 
 
 def get_product_stats(product_id: str) -> dict:
     """Gets 30day and 24hour stats for a product.
     product_id : str - Example: "BTC-USD"
     """
-    response = requests.get(url=f"https://api.exchange.coinbase.com/products/{product_id}/stats", headers=HEADERS, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    return CLIENT.get(f"https://api.exchange.coinbase.com/products/{product_id}/stats").json()
 
 
 def get_product_ticker(product_id: str) -> dict:
     """Gets snapshot information about the last trade (tick), best bid/ask and 24h volume.
     product_id : str - Example: "BTC-USD"
     """
-    response = requests.get(url=f"https://api.exchange.coinbase.com/products/{product_id}/ticker", headers=HEADERS, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    return CLIENT.get(f"https://api.exchange.coinbase.com/products/{product_id}/ticker").json()
 
 
 def get_product_trades(product_id: str) -> dict:
     """Gets a list of the latest trades for a product.
     product_id : str - Example: "BTC-USD"
     """
-    response = requests.get(url=f"https://api.exchange.coinbase.com/products/{product_id}/trades", headers=HEADERS, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    return CLIENT.get(f"https://api.exchange.coinbase.com/products/{product_id}/trades").json()
+
+
+async def get_server_time_async() -> dict:
+    """Test connectivity to the Rest API and get the current server time."""
+    return await ASYNC_CLIENT.get_json("https://api.coinbase.com/v2/time")
+
+
+async def list_currencies_async() -> dict:
+    """Get a list of all known currencies."""
+    return await ASYNC_CLIENT.get_json("https://api.coinbase.com/v2/currencies")
+
+
+async def get_currency_async(currency_id: str) -> dict:
+    """Get a currency by ID."""
+    params = {"currency_id": currency_id}
+    return await ASYNC_CLIENT.get_json("https://api.coinbase.com/v2/currencies", params=params)
+
+
+async def get_single_product_pairs_async(product_id: str) -> dict:
+    """Get a list of available currency pairs for trading."""
+    params = {"product_id": product_id}
+    return await ASYNC_CLIENT.get_json("https://api.coinbase.com/v2/products", params=params)
+
+
+async def list_trading_pairs_async() -> dict:
+    """Get a list of available currency pairs for trading."""
+    return await ASYNC_CLIENT.get_json("https://api.exchange.coinbase.com/products")
+
+
+async def get_all_product_volume_async() -> dict:
+    """Gets 30day and 24hour volume for all products and market types."""
+    return await ASYNC_CLIENT.get_json("https://api.exchange.coinbase.com/products/volume-summary")
+
+
+async def get_single_product_info_async(product_id: str) -> dict:
+    """Get information on a single product."""
+    params = {"product_id": product_id}
+    return await ASYNC_CLIENT.get_json("https://api.exchange.coinbase.com/products", params=params)
+
+
+async def get_product_candles_async(product_id: str, granularity: int | None = None, start: str | None = None, end: str | None = None) -> dict:
+    """Historic rates for a product."""
+    params = _product_candles_params(granularity, start, end)
+    return await ASYNC_CLIENT.get_json(f"https://api.exchange.coinbase.com/products/{product_id}/candles", params=params)
+
+
+async def get_product_stats_async(product_id: str) -> dict:
+    """Gets 30day and 24hour stats for a product."""
+    return await ASYNC_CLIENT.get_json(f"https://api.exchange.coinbase.com/products/{product_id}/stats")
+
+
+async def get_product_ticker_async(product_id: str) -> dict:
+    """Gets snapshot information about the last trade (tick), best bid/ask and 24h volume."""
+    return await ASYNC_CLIENT.get_json(f"https://api.exchange.coinbase.com/products/{product_id}/ticker")
+
+
+async def get_product_trades_async(product_id: str) -> dict:
+    """Gets a list of the latest trades for a product."""
+    return await ASYNC_CLIENT.get_json(f"https://api.exchange.coinbase.com/products/{product_id}/trades")
+
+
+def _product_candles_params(granularity: int | None, start: str | None, end: str | None) -> dict:
+    if granularity and granularity not in [60, 300, 900, 3600, 21600, 86400]:
+        raise ValueError("Granularity must be 60, 300, 900, 3600, 21600, or 86400")
+
+    params = {}
+
+    if granularity:
+        params["granularity"] = granularity
+
+    if start:
+        params["start"] = start
+
+    if end:
+        params["end"] = end
+
+    return params
@@ -1,4 +1,8 @@
+from functools import partial
+
 import pytest
+from aiohttp import ClientResponseError
+from aioresponses import aioresponses
 from requests import HTTPError
 
 from coinbase import (
@@ -13,7 +17,20 @@ from coinbase import (
     get_product_stats,
     get_product_ticker,
     get_product_trades,
+    get_server_time_async,
+    list_currencies_async,
+    get_currency_async,
+    get_single_product_pairs_async,
+    list_trading_pairs_async,
+    get_all_product_volume_async,
+    get_single_product_info_async,
+    get_product_candles_async,
+    get_product_stats_async,
+    get_product_ticker_async,
+    get_product_trades_async,
+    ASYNC_CLIENT,
 )
+from testing import run_closing
 
 
 HEADERS = {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/56.0.2924.87 Safari/537.36", "Accept-Encoding": "gzip, deflate", "Accept": "application/json", "Connection": "keep-alive"}
@@ -369,3 +386,46 @@ class TestGetProductTrades:
         assert requests_mock.last_request.url == self.URL + "/BTC-USD/trades"
         assert requests_mock.last_request.method == "GET"
         assert requests_mock.last_request.headers == HEADERS
+
+
+_run = partial(run_closing, client=ASYNC_CLIENT)
+
+
+class TestAsyncRestFunctions:
+
+    @pytest.mark.parametrize(
+        ("func", "args", "expected_url"),
+        (
+            pytest.param(get_server_time_async, (), "https://api.coinbase.com/v2/time", id="get_server_time_async"),
+            pytest.param(list_currencies_async, (), "https://api.coinbase.com/v2/currencies", id="list_currencies_async"),
+            pytest.param(get_currency_async, ("BTC",), "https://api.coinbase.com/v2/currencies?currency_id=BTC", id="get_currency_async"),
+            pytest.param(get_single_product_pairs_async, ("BTC-USD",), "https://api.coinbase.com/v2/products?product_id=BTC-USD", id="get_single_product_pairs_async"),
+            pytest.param(list_trading_pairs_async, (), "https://api.exchange.coinbase.com/products", id="list_trading_pairs_async"),
+            pytest.param(get_all_product_volume_async, (), "https://api.exchange.coinbase.com/products/volume-summary", id="get_all_product_volume_async"),
+            pytest.param(get_single_product_info_async, ("BTC-USD",), "https://api.exchange.coinbase.com/products?product_id=BTC-USD", id="get_single_product_info_async"),
+            pytest.param(
+                get_product_candles_async,
+                ("BTC-USD", 3600, "2024-01-01T00:00:00Z", "2024-01-02T00:00:00Z"),
+                "https://api.exchange.coinbase.com/products/BTC-USD/candles?granularity=3600&start=2024-01-01T00:00:00Z&end=2024-01-02T00:00:00Z",
+                id="get_product_candles_async",
+            ),
+            pytest.param(get_product_stats_async, ("BTC-USD",), "https://api.exchange.coinbase.com/products/BTC-USD/stats", id="get_product_stats_async"),
+            pytest.param(get_product_ticker_async, ("BTC-USD",), "https://api.exchange.coinbase.com/products/BTC-USD/ticker", id="get_product_ticker_async"),
+            pytest.param(get_product_trades_async, ("BTC-USD",), "https://api.exchange.coinbase.com/products/BTC-USD/trades", id="get_product_trades_async"),
+        ),
+    )
+    def test_async_function(self, func, args, expected_url):
+        with aioresponses() as mocked:
+            mocked.get(expected_url, payload={})
+            assert _run(func(*args)) == {}
+            mocked.assert_called_once()
+
+    def test_async_function_http_failure(self):
+        with aioresponses() as mocked:
+            mocked.get("https://api.coinbase.com/v2/time", status=500)
+            with pytest.raises(ClientResponseError):
+                _run(get_server_time_async())
+
+    def test_get_product_candles_async_with_invalid_granularity(self):
+        with pytest.raises(ValueError):
+            _run(get_product_candles_async("BTC-USD", granularity=120))
@@ -0,0 +1,21 @@
+import pytest
+
+from binance import _datetime_str_to_utc_milliseconds
+from testing import minute_klines
+
+
+@pytest.fixture
+def rest_klines(monkeypatch):
+    """Serve closed 1m klines of 2023-01-01 00:00 to 00:09 through a fake get_klines_async."""
+    start = _datetime_str_to_utc_milliseconds("2023-01-01 00:00:00")
+    stored = minute_klines([start + i * 60_000 for i in range(10)])
+    requests = []
+
+    async def get_klines_async(symbol, interval, start_time=None, end_time=None, limit=500):
+        requests.append((start_time, end_time))
+        start_ms = _datetime_str_to_utc_milliseconds(start_time)
+        end_ms = float("inf") if end_time is None else _datetime_str_to_utc_milliseconds(end_time)
+        return [kline for kline in stored if start_ms <= kline[0] <= end_ms][:limit]
+
+    monkeypatch.setattr("binance_stream.get_klines_async", get_klines_async)
+    return start, requests
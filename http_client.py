@@ -0,0 +1,187 @@
+import asyncio
+from time import sleep
+from typing import Protocol
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+
+
+RATE_LIMITED_STATUS_CODES = (418, 429)
+
+
+class RateLimiter(Protocol):
+    """Interface the clients use to throttle requests.
+
+    reserve(weight) returns the number of seconds to wait before the request may be sent, or 0 once
+    the weight has been reserved. update(status_code, headers) is called with every response.
+    """
+
+    def reserve(self, weight: int) -> float: ...
+
+    def update(self, status_code: int, headers) -> None: ...
+
+
+class HttpClient:
+    """Pooled, keep-alive HTTP client for a REST API.
+
+    Owns a single requests.Session so that sequential calls reuse the same TCP/TLS connections
+    instead of paying a new handshake for every request.
+
+    base_url : string - Prefix for every request path. Leave empty to pass full URLs.
+    headers : dict - Default headers sent with every request.
+    pool_connections : integer - Number of host pools to cache.
+    pool_maxsize : integer - Maximum number of connections kept alive per host.
+    timeout : float or (connect, read) tuple - Default timeout in seconds.
+    rate_limiter : RateLimiter (optional) - Throttles requests and retries them when the server answers 418/429.
+    rate_limit_retries : integer - Maximum number of retries of a rate limited request.
+    """
+
+    def __init__(
+        self,
+        base_url: str = "",
+        headers: dict | None = None,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        timeout: float | tuple[float, float] = 10,
+        rate_limiter: RateLimiter | None = None,
+        rate_limit_retries: int = 3,
+    ):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.pool_maxsize = pool_maxsize
+        self.rate_limiter = rate_limiter
+        self.rate_limit_retries = rate_limit_retries
+        self.session = requests.Session()
+        if headers:
+            self.session.headers.update(headers)
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, path: str, params: dict | str | None = None, headers: dict | None = None, weight: int = 1) -> requests.Response:
+        """Send a GET request to base_url + path and raise an HTTPError for 4xx/5xx responses.
+        weight is the cost of the request as counted by the rate limiter.
+        """
+        for _ in range(self.rate_limit_retries + 1):
+            if self.rate_limiter is not None:
+                while (delay := self.rate_limiter.reserve(weight)) > 0:
+                    sleep(delay)
+            response = self.session.get(url=self.base_url + path, headers=headers, params=params, timeout=self.timeout)
+            if self.rate_limiter is None:
+                break
+            self.rate_limiter.update(response.status_code, response.headers)
+            if response.status_code not in RATE_LIMITED_STATUS_CODES:
+                break
+        response.raise_for_status()
+        return response
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class AsyncHttpClient:
+    """Pooled, keep-alive asyncio HTTP client for a REST API.
+
+    Owns one aiohttp.ClientSession per event loop, created lazily inside the running loop, so that
+    many concurrent requests on one loop share the same connection pool. A session is closed when its loop
+    cancels the tasks it has left, as asyncio.run does before closing the loop, so a module level client
+    used by successive asyncio.run calls leaves no session open.
+
+    base_url : string - Prefix for every request path. Leave empty to pass full URLs.
+    headers : dict - Default headers sent with every request.
+    pool_maxsize : integer - Maximum number of simultaneous connections (0 for no limit).
+    pool_maxsize_per_host : integer - Maximum number of simultaneous connections per host (0 for no limit).
+    timeout : float - Total timeout in seconds for a single request.
+    rate_limiter : RateLimiter (optional) - Throttles requests and retries them when the server answers 418/429.
+    rate_limit_retries : integer - Maximum number of retries of a rate limited request.
+    """
+
+    def __init__(
+        self,
+        base_url: str = "",
+        headers: dict | None = None,
+        pool_maxsize: int = 100,
+        pool_maxsize_per_host: int = 0,
+        timeout: float = 10,
+        rate_limiter: RateLimiter | None = None,
+        rate_limit_retries: int = 3,
+    ):
+        self.base_url = base_url
+        self.headers = dict(headers or {})
+        self.pool_maxsize = pool_maxsize
+        self.pool_maxsize_per_host = pool_maxsize_per_host
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.rate_limit_retries = rate_limit_retries
+        self._sessions: dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+        self._closers: dict[asyncio.AbstractEventLoop, asyncio.Task] = {}
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """The session of the running event loop, created on first use."""
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            self._forget_closed_loops()
+            connector = aiohttp.TCPConnector(limit=self.pool_maxsize, limit_per_host=self.pool_maxsize_per_host)
+            session = self._sessions[loop] = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            self._closers[loop] = loop.create_task(self._close_when_cancelled(loop, session))
+        return session
+
+    async def get_json(self, path: str, params: dict | None = None, headers: dict | None = None, weight: int = 1):
+        """Send a GET request to base_url + path, raise a ClientResponseError for 4xx/5xx responses and return the decoded JSON body.
+        weight is the cost of the request as counted by the rate limiter.
+        """
+        for attempt in range(self.rate_limit_retries + 1):
+            if self.rate_limiter is not None:
+                while (delay := self.rate_limiter.reserve(weight)) > 0:
+                    await asyncio.sleep(delay)
+            async with self.session.get(self.base_url + path, params=params, headers=headers) as response:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.update(response.status, response.headers)
+                    if response.status in RATE_LIMITED_STATUS_CODES and attempt < self.rate_limit_retries:
+                        continue
+                response.raise_for_status()
+                return await response.json(content_type=None)
+
+    async def close(self):
+        """Close the session of the running event loop."""
+        loop = asyncio.get_running_loop()
+        session, closer = self._sessions.pop(loop, None), self._closers.pop(loop, None)
+        if closer is not None:
+            closer.cancel()
+        if session is not None and not session.closed:
+            await session.close()
+
+    async def _close_when_cancelled(self, loop: asyncio.AbstractEventLoop, session: aiohttp.ClientSession):
+        try:
+            await loop.create_future()
+        finally:
+            if self._sessions.get(loop) is session:
+                del self._sessions[loop], self._closers[loop]
+            await session.close()
+
+    def _forget_closed_loops(self):
+        # a loop closed without cancelling its tasks never ran their closers, its sessions can only be detached
+        for loop in [loop for loop in self._sessions if loop.is_closed()]:
+            session = self._sessions.pop(loop)
+            self._closers.pop(loop, None)
+            if not session.closed:
+                session.detach()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
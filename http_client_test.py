@@ -0,0 +1,217 @@
+import time
+import asyncio
+import threading
+from unittest.mock import patch
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from aiohttp import web, ClientResponseError
+from aioresponses import aioresponses
+from requests import HTTPError
+
+from http_client import HttpClient, AsyncHttpClient
+
+
+HEADERS = {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/56.0.2924.87 Safari/537.36", "Accept": "application/json"}
+
+
+class TestHttpClient:
+    BASE_URL = "https://api.example.com/v1/"
+
+    def test_get_joins_base_url_and_path(self, requests_mock):
+        requests_mock.get(self.BASE_URL + "ping", json={})
+        client = HttpClient(self.BASE_URL, HEADERS)
+        assert client.get("ping").json() == {}
+        assert requests_mock.called_once
+        assert requests_mock.last_request.url == self.BASE_URL + "ping"
+
+    def test_get_with_full_url(self, requests_mock):
+        requests_mock.get("https://other.example.com/time", json={"epoch": 1})
+        client = HttpClient(headers=HEADERS)
+        assert client.get("https://other.example.com/time").json() == {"epoch": 1}
+
+    def test_get_sends_default_and_extra_headers(self, requests_mock):
+        requests_mock.get(self.BASE_URL + "account", json={})
+        client = HttpClient(self.BASE_URL, HEADERS)
+        client.get("account", headers={"X-MBX-APIKEY": "key"})
+        assert requests_mock.last_request.headers["User-Agent"] == HEADERS["User-Agent"]
+        assert requests_mock.last_request.headers["Accept"] == "application/json"
+        assert requests_mock.last_request.headers["Connection"] == "keep-alive"
+        assert requests_mock.last_request.headers["X-MBX-APIKEY"] == "key"
+
+    def test_get_with_params(self, requests_mock):
+        requests_mock.get(self.BASE_URL + "klines", json=[])
+        client = HttpClient(self.BASE_URL, HEADERS)
+        client.get("klines", params={"symbol": "BTCUSDT", "limit": 500})
+        assert requests_mock.last_request.url == self.BASE_URL + "klines?symbol=BTCUSDT&limit=500"
+
+    @pytest.mark.parametrize("timeout", [10, 2.5, (3.05, 27)])
+    def test_get_uses_timeout(self, requests_mock, timeout):
+        requests_mock.get(self.BASE_URL + "ping", json={})
+        client = HttpClient(self.BASE_URL, HEADERS, timeout=timeout)
+        client.get("ping")
+        assert requests_mock.last_request.timeout == timeout
+
+    @pytest.mark.parametrize("status_code", [400, 403, 500])
+    def test_get_http_failure(self, requests_mock, status_code):
+        requests_mock.get(self.BASE_URL + "ping", status_code=status_code)
+        client = HttpClient(self.BASE_URL, HEADERS)
+        with pytest.raises(HTTPError):
+            client.get("ping")
+
+    def test_pool_configuration(self):
+        client = HttpClient(self.BASE_URL, HEADERS, pool_connections=4, pool_maxsize=32)
+        adapter = client.session.get_adapter(self.BASE_URL)
+        assert adapter._pool_connections == 4
+        assert adapter._pool_maxsize == 32
+
+    def test_context_manager_closes_session(self):
+        with patch("requests.Session.close", autospec=True) as close_mock:
+            with HttpClient(self.BASE_URL, HEADERS) as client:
+                pass
+        close_mock.assert_called_once_with(client.session)
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.server.client_ports.add(self.client_address[1])
+        body = b"{}"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    server.client_ports = set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_sequential_requests_reuse_connection(local_server):
+    client = HttpClient(f"http://127.0.0.1:{local_server.server_address[1]}/")
+    for _ in range(200):
+        assert client.get("ping").json() == {}
+    client.close()
+    assert len(local_server.client_ports) == 1
+
+
+class TestAsyncHttpClient:
+    BASE_URL = "https://api.example.com/v1/"
+
+    def test_get_json(self):
+        client = AsyncHttpClient(self.BASE_URL, HEADERS)
+
+        async def main():
+            with aioresponses() as mocked:
+                mocked.get(self.BASE_URL + "klines?symbol=BTCUSDT&limit=500", payload=[[1, "2"]])
+                result = await client.get_json("klines", params={"symbol": "BTCUSDT", "limit": 500})
+                mocked.assert_called_once()
+            await client.close()
+            return result
+
+        assert asyncio.run(main()) == [[1, "2"]]
+
+    @pytest.mark.parametrize("status_code", [400, 403, 500])
+    def test_get_json_http_failure(self, status_code):
+        client = AsyncHttpClient(self.BASE_URL, HEADERS)
+
+        async def main():
+            with aioresponses() as mocked:
+                mocked.get(self.BASE_URL + "ping", status=status_code)
+                try:
+                    await client.get_json("ping")
+                finally:
+                    await client.close()
+
+        with pytest.raises(ClientResponseError):
+            asyncio.run(main())
+
+    def test_session_uses_default_headers(self):
+        client = AsyncHttpClient(self.BASE_URL, HEADERS)
+
+        async def main():
+            session = client.session
+            headers = dict(session.headers)
+            await client.close()
+            return headers
+
+        assert asyncio.run(main()) == HEADERS
+
+    def test_session_is_shared_within_a_loop_and_recreated_for_a_new_loop(self):
+        client = AsyncHttpClient(self.BASE_URL, HEADERS)
+
+        async def main():
+            return client.session, client.session
+
+        first, second = asyncio.run(main())
+        assert first is second
+        third, _ = asyncio.run(main())
+        assert third is not first
+
+
+@pytest.fixture
+def slow_local_server():
+    async def handler(request):
+        await asyncio.sleep(0.2)
+        return web.json_response({"path": request.path})
+
+    async def start():
+        runner = web.AppRunner(web.Application())
+        runner.app.router.add_get("/{name}", handler)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        return runner, site._server.sockets[0].getsockname()[1]
+
+    loop = asyncio.new_event_loop()
+    runner, port = loop.run_until_complete(start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{port}/"
+    asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def test_sessions_are_closed_when_their_loop_shuts_down(slow_local_server):
+    client = AsyncHttpClient(slow_local_server)
+    sessions = []
+
+    async def main():
+        sessions.append(client.session)
+        return await client.get_json("ping")
+
+    # a module level client used by successive asyncio.run calls, without closing it
+    assert asyncio.run(main()) == asyncio.run(main()) == {"path": "/ping"}
+    assert sessions[0] is not sessions[1]
+    assert all(session.closed for session in sessions)
+    assert client._sessions == {}
+
+
+def test_concurrent_requests_take_about_one_round_trip(slow_local_server):
+    client = AsyncHttpClient(slow_local_server)
+
+    async def main():
+        start = time.perf_counter()
+        results = await asyncio.gather(*(client.get_json(f"symbol{i}") for i in range(20)))
+        elapsed = time.perf_counter() - start
+        await client.close()
+        return results, elapsed
+
+    results, elapsed = asyncio.run(main())
+    assert results == [{"path": f"/symbol{i}"} for i in range(20)]
+    assert elapsed < 1.0
@@ -0,0 +1,448 @@
+"""Technical indicators over kline DataFrames, computed on contiguous float64 arrays.
+
+The indicators match the ta package with fillna=False: SMA, EMA, MACD, PSAR, RSI and TSI give the same values,
+NaN where ta gives NaN. Recursive indicators (EMA and the Wilder average of RSI, PSAR) run as numba compiled
+loops and SMA as a loop-free cumulative sum. Indicators computes each indicator on demand and caches every
+intermediate array, so the EMAs of an EMA crossover are the ones MACD uses and RSI and TSI share one price change
+series, instead of every ta indicator recomputing its inputs over the whole series.
+
+The Streaming classes keep the state of one indicator and update it in constant time per candle, for live klines.
+They can be seeded from the cached history and give bit for bit the values of the batch computation.
+
+Usage:
+    indicators = Indicators(load_klines(csv_filepath))
+    indicators.macd()["macd"].iloc[-1] > indicators.macd()["signal"].iloc[-1]
+    df = indicators.frame()
+
+    rsi = StreamingRSI(14).seed(load_klines(csv_filepath))
+    rsi.update_kline(kline)
+"""
+
+from abc import ABC, abstractmethod
+from collections import deque
+
+import numpy as np
+import pandas as pd
+from numba import njit
+
+
+@njit(cache=True)
+def _ewm(values: np.ndarray, alpha: float, min_periods: int) -> np.ndarray:
+    """Exponentially weighted mean with pandas ewm(adjust=False) semantics: it starts at the first non-NaN value,
+    is NaN until min_periods values have been seen, and holds its last value over NaN inputs."""
+    out = np.full(values.shape[0], np.nan)
+    mean = np.nan
+    seen = 0
+    for i in range(values.shape[0]):
+        value = values[i]
+        if not np.isnan(value):
+            mean = value if seen == 0 else mean + alpha * (value - mean)
+            seen += 1
+        if seen >= min_periods and seen > 0:
+            out[i] = mean
+    return out
+
+
+@njit(cache=True)
+def _psar(high: np.ndarray, low: np.ndarray, close: np.ndarray, step: float, max_step: float):
+    """Parabolic SAR, step for step the algorithm of ta.trend.PSARIndicator."""
+    n = close.shape[0]
+    psar = close.copy()
+    psar_up = np.full(n, np.nan)
+    psar_down = np.full(n, np.nan)
+    if n == 0:
+        return psar, psar_up, psar_down
+    up_trend = True
+    acceleration_factor = step
+    up_trend_high = high[0]
+    down_trend_low = low[0]
+    for i in range(2, n):
+        reversal = False
+        max_high = high[i]
+        min_low = low[i]
+        if up_trend:
+            psar[i] = psar[i - 1] + acceleration_factor * (up_trend_high - psar[i - 1])
+            if min_low < psar[i]:
+                reversal = True
+                psar[i] = up_trend_high
+                down_trend_low = min_low
+                acceleration_factor = step
+            else:
+                if max_high > up_trend_high:
+                    up_trend_high = max_high
+                    acceleration_factor = min(acceleration_factor + step, max_step)
+                if low[i - 2] < psar[i]:
+                    psar[i] = low[i - 2]
+                elif low[i - 1] < psar[i]:
+                    psar[i] = low[i - 1]
+        else:
+            psar[i] = psar[i - 1] - acceleration_factor * (psar[i - 1] - down_trend_low)
+            if max_high > psar[i]:
+                reversal = True
+                psar[i] = down_trend_low
+                up_trend_high = max_high
+                acceleration_factor = step
+            else:
+                if min_low < down_trend_low:
+                    down_trend_low = min_low
+                    acceleration_factor = min(acceleration_factor + step, max_step)
+                if high[i - 2] > psar[i]:
+                    psar[i] = high[i - 2]
+                elif high[i - 1] > psar[i]:
+                    psar[i] = high[i - 1]
+        up_trend = up_trend != reversal
+        if up_trend:
+            psar_up[i] = psar[i]
+        else:
+            psar_down[i] = psar[i]
+    return psar, psar_up, psar_down
+
+
+def sma(values: np.ndarray, window: int) -> np.ndarray:
+    """Simple moving average, NaN for the first window - 1 values."""
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        cumulative = np.cumsum(np.concatenate(([0.0], values)))
+        out[window - 1 :] = (cumulative[window:] - cumulative[:-window]) / window
+    return out
+
+
+def ema(values: np.ndarray, window: int) -> np.ndarray:
+    """Exponential moving average of span window, NaN until window values have been seen."""
+    return _ewm(np.ascontiguousarray(values, dtype=np.float64), 2 / (window + 1), window)
+
+
+def wilder_average(values: np.ndarray, window: int) -> np.ndarray:
+    """Wilder's smoothing (alpha = 1 / window), as used by RSI."""
+    return _ewm(np.ascontiguousarray(values, dtype=np.float64), 1 / window, window)
+
+
+def psar(high: np.ndarray, low: np.ndarray, close: np.ndarray, step: float = 0.02, max_step: float = 0.2) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(psar, psar_up, psar_down). psar_up holds the SAR of up trend candles and NaN elsewhere, psar_down the opposite."""
+    arrays = (np.ascontiguousarray(values, dtype=np.float64) for values in (high, low, close))
+    return _psar(*arrays, step, max_step)
+
+
+class Indicators:
+    """Indicators of a kline DataFrame (as returned by load_klines or klines_to_df), returned as Series on its index.
+
+    The price columns are copied once into contiguous float64 arrays and every computed array is cached by
+    indicator and parameters, so asking for an indicator twice, or for one built on another, costs nothing more.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.index = df.index
+        self.high = np.ascontiguousarray(df["High"], dtype=np.float64)
+        self.low = np.ascontiguousarray(df["Low"], dtype=np.float64)
+        self.close = np.ascontiguousarray(df["Close"], dtype=np.float64)
+        self._cache: dict[tuple, np.ndarray | tuple] = {}
+
+    def sma(self, window: int) -> pd.Series:
+        return self._series(self._sma(window), f"sma_{window}")
+
+    def ema(self, window: int) -> pd.Series:
+        return self._series(self._ema(window), f"ema_{window}")
+
+    def macd(self, window_fast: int = 12, window_slow: int = 26, window_sign: int = 9) -> pd.DataFrame:
+        """Columns macd, signal and diff, like ta.trend.MACD macd, macd_signal and macd_diff."""
+        line, signal, diff = self._cached(("macd", window_fast, window_slow, window_sign), self._macd, window_fast, window_slow, window_sign)
+        return pd.DataFrame({"macd": line, "signal": signal, "diff": diff}, index=self.index, copy=False)
+
+    def psar(self, step: float = 0.02, max_step: float = 0.2) -> pd.DataFrame:
+        """Columns psar, up and down, like ta.trend.PSARIndicator psar, psar_up and psar_down."""
+        values, up, down = self._cached(("psar", step, max_step), psar, self.high, self.low, self.close, step, max_step)
+        return pd.DataFrame({"psar": values, "up": up, "down": down}, index=self.index, copy=False)
+
+    def rsi(self, window: int = 14) -> pd.Series:
+        return self._series(self._cached(("rsi", window), self._rsi, window), f"rsi_{window}")
+
+    def tsi(self, window_slow: int = 25, window_fast: int = 13) -> pd.Series:
+        return self._series(self._cached(("tsi", window_slow, window_fast), self._tsi, window_slow, window_fast), f"tsi_{window_slow}_{window_fast}")
+
+    def frame(self) -> pd.DataFrame:
+        """The indicators of the btcusdt notebook with its parameters, as one DataFrame."""
+        macd = self.macd(12, 26, 9)
+        psar_df = self.psar(0.02, 0.2)
+        columns = {
+            "sma_12": self._sma(12),
+            "sma_26": self._sma(26),
+            "ema_12": self._ema(12),
+            "ema_26": self._ema(26),
+            "macd": macd["macd"].to_numpy(),
+            "macd_signal": macd["signal"].to_numpy(),
+            "macd_diff": macd["diff"].to_numpy(),
+            "psar": psar_df["psar"].to_numpy(),
+            "psar_up": psar_df["up"].to_numpy(),
+            "psar_down": psar_df["down"].to_numpy(),
+            "rsi_14": self.rsi(14).to_numpy(),
+            "tsi_25_13": self.tsi(25, 13).to_numpy(),
+        }
+        return pd.DataFrame(columns, index=self.index, copy=False)
+
+    def _sma(self, window: int) -> np.ndarray:
+        return self._cached(("sma", window), sma, self.close, window)
+
+    def _ema(self, window: int) -> np.ndarray:
+        return self._cached(("ema", window), ema, self.close, window)
+
+    def _diff(self) -> np.ndarray:
+        return self._cached(("diff",), lambda: np.concatenate(([np.nan], np.diff(self.close)))[: len(self.close)])
+
+    def _macd(self, window_fast: int, window_slow: int, window_sign: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        line = self._ema(window_fast) - self._ema(window_slow)
+        signal = ema(line, window_sign)
+        return line, signal, line - signal
+
+    def _rsi(self, window: int) -> np.ndarray:
+        diff = self._diff()
+        # like ta, the undefined first change counts as no move
+        up = np.where(diff > 0, diff, 0.0)
+        down = np.where(diff < 0, -diff, 0.0)
+        average_up, average_down = wilder_average(up, window), wilder_average(down, window)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(average_down == 0, 100.0, 100 - 100 / (1 + average_up / average_down))
+
+    def _tsi(self, window_slow: int, window_fast: int) -> np.ndarray:
+        diff = self._diff()
+        smoothed = ema(ema(diff, window_slow), window_fast)
+        smoothed_abs = ema(ema(np.abs(diff), window_slow), window_fast)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return smoothed / smoothed_abs * 100
+
+    def _cached(self, key: tuple, function, *args):
+        if key not in self._cache:
+            self._cache[key] = function(*args)
+        return self._cache[key]
+
+    def _series(self, values: np.ndarray, name: str) -> pd.Series:
+        return pd.Series(values, index=self.index, name=name, copy=False)
+
+
+def _ewm_step(state: tuple[float, int], value: float, alpha: float) -> tuple[float, int]:
+    """One step of _ewm on (mean, seen), with the same floating point operations."""
+    mean, seen = state
+    if value == value:
+        mean = value if seen == 0 else mean + alpha * (value - mean)
+        seen += 1
+    return mean, seen
+
+
+def _ewm_value(state: tuple[float, int], min_periods: int) -> float:
+    mean, seen = state
+    return mean if seen >= min_periods and seen > 0 else np.nan
+
+
+def _divide(numerator: float, denominator: float) -> float:
+    """numerator / denominator with numpy semantics, NaN or infinite instead of ZeroDivisionError."""
+    if denominator == 0:
+        return np.nan if numerator == 0 or numerator != numerator else np.copysign(np.inf, numerator)
+    return numerator / denominator
+
+
+class _StreamingIndicator(ABC):
+    """Indicator updated one candle at a time in constant time and memory.
+
+    The state of the candles before the current one is kept apart from the current candle, so updating the current
+    candle again, as the live kline stream does until it closes, replaces it instead of adding it twice. The values
+    are bit for bit those of the batch functions over the same candles.
+    """
+
+    def __init__(self):
+        self.open_time: int | None = None
+        self.value = np.nan
+        self._pending = None
+
+    def update(self, open_time: int, high: float, low: float, close: float):
+        """Apply the candle opening at open_time (epoch milliseconds) and return the indicator value."""
+        if open_time != self.open_time:
+            if self.open_time is not None:
+                if open_time < self.open_time:
+                    raise ValueError(f"Candle {open_time} opens before the current candle {self.open_time}")
+                self._commit(self._pending)
+            self.open_time = open_time
+        self._pending, self.value = self._step(high, low, close)
+        return self.value
+
+    def update_kline(self, kline):
+        """Apply a binance_stream Kline, closed or not."""
+        return self.update(kline.open_time, kline.high, kline.low, kline.close)
+
+    def seed(self, df: pd.DataFrame):
+        """Apply the candles of a kline DataFrame (as returned by load_klines or klines_to_df) in order."""
+        open_times = df.index.as_unit("ms").asi8.tolist()
+        for candle in zip(open_times, df["High"].tolist(), df["Low"].tolist(), df["Close"].tolist()):
+            self.update(*candle)
+        return self
+
+    @abstractmethod
+    def _step(self, high: float, low: float, close: float) -> tuple:
+        """(state after the current candle, value) from the state before it."""
+
+    @abstractmethod
+    def _commit(self, state):
+        """Make the state after a candle the state before the next one."""
+
+
+class StreamingSMA(_StreamingIndicator):
+    """Simple moving average of the close, as sma."""
+
+    def __init__(self, window: int):
+        super().__init__()
+        self.window = window
+        # cumulative sums of the close up to each of the last window candles, like the cumsum of sma
+        self._cumulatives = deque([0.0], maxlen=window)
+
+    def _step(self, high, low, close):
+        cumulative = self._cumulatives[-1] + close
+        if len(self._cumulatives) < self.window:
+            return cumulative, np.nan
+        return cumulative, (cumulative - self._cumulatives[0]) / self.window
+
+    def _commit(self, cumulative):
+        self._cumulatives.append(cumulative)
+
+
+class StreamingEMA(_StreamingIndicator):
+    """Exponential moving average of the close, as ema."""
+
+    def __init__(self, window: int):
+        super().__init__()
+        self.window = window
+        self._alpha = 2 / (window + 1)
+        self._state = (np.nan, 0)
+
+    def _step(self, high, low, close):
+        state = _ewm_step(self._state, close, self._alpha)
+        return state, _ewm_value(state, self.window)
+
+    def _commit(self, state):
+        self._state = state
+
+
+class StreamingMACD(_StreamingIndicator):
+    """(macd, signal, diff) of the close, as Indicators.macd."""
+
+    def __init__(self, window_fast: int = 12, window_slow: int = 26, window_sign: int = 9):
+        super().__init__()
+        self.value = (np.nan, np.nan, np.nan)
+        self.windows = (window_fast, window_slow, window_sign)
+        self._alphas = tuple(2 / (window + 1) for window in self.windows)
+        self._state = ((np.nan, 0),) * 3
+
+    def _step(self, high, low, close):
+        (fast, slow, sign), (alpha_fast, alpha_slow, alpha_sign) = self._state, self._alphas
+        window_fast, window_slow, window_sign = self.windows
+        fast, slow = _ewm_step(fast, close, alpha_fast), _ewm_step(slow, close, alpha_slow)
+        line = _ewm_value(fast, window_fast) - _ewm_value(slow, window_slow)
+        sign = _ewm_step(sign, line, alpha_sign)
+        signal = _ewm_value(sign, window_sign)
+        return (fast, slow, sign), (line, signal, line - signal)
+
+    def _commit(self, state):
+        self._state = state
+
+
+class StreamingRSI(_StreamingIndicator):
+    """Relative strength index of the close, as Indicators.rsi."""
+
+    def __init__(self, window: int = 14):
+        super().__init__()
+        self.window = window
+        self._state = (None, (np.nan, 0), (np.nan, 0))
+
+    def _step(self, high, low, close):
+        previous_close, up, down = self._state
+        diff = np.nan if previous_close is None else close - previous_close
+        up = _ewm_step(up, diff if diff > 0 else 0.0, 1 / self.window)
+        down = _ewm_step(down, -diff if diff < 0 else 0.0, 1 / self.window)
+        average_up, average_down = _ewm_value(up, self.window), _ewm_value(down, self.window)
+        value = 100.0 if average_down == 0 else 100 - 100 / (1 + average_up / average_down)
+        return (close, up, down), value
+
+    def _commit(self, state):
+        self._state = state
+
+
+class StreamingTSI(_StreamingIndicator):
+    """True strength index of the close, as Indicators.tsi."""
+
+    def __init__(self, window_slow: int = 25, window_fast: int = 13):
+        super().__init__()
+        self.window_slow = window_slow
+        self.window_fast = window_fast
+        self._state = (None,) + ((np.nan, 0),) * 4
+
+    def _step(self, high, low, close):
+        previous_close, slow, fast, slow_abs, fast_abs = self._state
+        diff = np.nan if previous_close is None else close - previous_close
+        slow, slow_abs = self._smooth_slow(slow, diff), self._smooth_slow(slow_abs, abs(diff))
+        fast, fast_abs = self._smooth_fast(fast, _ewm_value(slow, self.window_slow)), self._smooth_fast(fast_abs, _ewm_value(slow_abs, self.window_slow))
+        value = _divide(_ewm_value(fast, self.window_fast), _ewm_value(fast_abs, self.window_fast)) * 100
+        return (close, slow, fast, slow_abs, fast_abs), value
+
+    def _smooth_slow(self, state, value):
+        return _ewm_step(state, value, 2 / (self.window_slow + 1))
+
+    def _smooth_fast(self, state, value):
+        return _ewm_step(state, value, 2 / (self.window_fast + 1))
+
+    def _commit(self, state):
+        self._state = state
+
+
+class StreamingPSAR(_StreamingIndicator):
+    """(psar, psar_up, psar_down), as psar."""
+
+    def __init__(self, step: float = 0.02, max_step: float = 0.2):
+        super().__init__()
+        self.value = (np.nan, np.nan, np.nan)
+        self.step = step
+        self.max_step = max_step
+        # candles seen, previous psar, up trend, acceleration factor, up trend high, down trend low,
+        # and the highs and lows of the previous two candles, the last one first
+        self._state = (0, np.nan, True, step, np.nan, np.nan, (np.nan, np.nan), (np.nan, np.nan))
+
+    def _step(self, high, low, close):
+        count, previous, up_trend, acceleration_factor, up_trend_high, down_trend_low, highs, lows = self._state
+        if count == 0:
+            up_trend_high, down_trend_low = high, low
+        if count < 2:
+            state = (count + 1, close, up_trend, acceleration_factor, up_trend_high, down_trend_low, (high, highs[0]), (low, lows[0]))
+            return state, (close, np.nan, np.nan)
+        reversal = False
+        if up_trend:
+            psar_value = previous + acceleration_factor * (up_trend_high - previous)
+            if low < psar_value:
+                reversal = True
+                psar_value = up_trend_high
+                down_trend_low = low
+                acceleration_factor = self.step
+            else:
+                if high > up_trend_high:
+                    up_trend_high = high
+                    acceleration_factor = min(acceleration_factor + self.step, self.max_step)
+                if lows[1] < psar_value:
+                    psar_value = lows[1]
+                elif lows[0] < psar_value:
+                    psar_value = lows[0]
+        else:
+            psar_value = previous - acceleration_factor * (previous - down_trend_low)
+            if high > psar_value:
+                reversal = True
+                psar_value = down_trend_low
+                up_trend_high = high
+                acceleration_factor = self.step
+            else:
+                if low < down_trend_low:
+                    down_trend_low = low
+                    acceleration_factor = min(acceleration_factor + self.step, self.max_step)
+                if highs[1] > psar_value:
+                    psar_value = highs[1]
+                elif highs[0] > psar_value:
+                    psar_value = highs[0]
+        up_trend = up_trend != reversal
+        state = (count + 1, psar_value, up_trend, acceleration_factor, up_trend_high, down_trend_low, (high, highs[0]), (low, lows[0]))
+        return state, (psar_value, psar_value, np.nan) if up_trend else (psar_value, np.nan, psar_value)
+
+    def _commit(self, state):
+        self._state = state
@@ -0,0 +1,121 @@
+import os
+
+import pytest
+import numpy as np
+import pandas as pd
+from ta.trend import SMAIndicator, EMAIndicator, MACD, PSARIndicator
+from ta.momentum import RSIIndicator, TSIIndicator
+
+from binance import load_klines
+from binance_stream import Kline
+from indicators import Indicators, StreamingEMA, StreamingMACD, StreamingPSAR, StreamingRSI, StreamingSMA, StreamingTSI, ema, psar, sma
+from kline_store import HISTORICAL_DIR
+
+
+@pytest.fixture(scope="module")
+def klines():
+    # ta's PSAR assigns by label in one branch, which is only positional on a RangeIndex
+    return load_klines(os.path.join(HISTORICAL_DIR, "BTCUSDT-2023-1h.csv")).reset_index(drop=True)
+
+
+def _assert_same(actual, expected):
+    np.testing.assert_allclose(np.asarray(actual), np.asarray(expected), rtol=1e-9, atol=1e-8, equal_nan=True)
+
+
+def test_moving_averages_match_ta(klines):
+    indicators = Indicators(klines)
+    for window in (12, 26):
+        _assert_same(indicators.sma(window), SMAIndicator(klines["Close"], window=window).sma_indicator())
+        _assert_same(indicators.ema(window), EMAIndicator(klines["Close"], window=window).ema_indicator())
+
+
+def test_macd_matches_ta(klines):
+    expected = MACD(klines["Close"], window_slow=26, window_fast=12, window_sign=9)
+    actual = Indicators(klines).macd(12, 26, 9)
+    _assert_same(actual["macd"], expected.macd())
+    _assert_same(actual["signal"], expected.macd_signal())
+    _assert_same(actual["diff"], expected.macd_diff())
+
+
+def test_psar_matches_ta(klines):
+    expected = PSARIndicator(klines["High"], klines["Low"], klines["Close"], step=0.02, max_step=0.2)
+    actual = Indicators(klines).psar(0.02, 0.2)
+    _assert_same(actual["psar"], expected.psar())
+    _assert_same(actual["up"], expected.psar_up())
+    _assert_same(actual["down"], expected.psar_down())
+
+
+def test_momentum_matches_ta(klines):
+    indicators = Indicators(klines)
+    _assert_same(indicators.rsi(14), RSIIndicator(klines["Close"], window=14).rsi())
+    _assert_same(indicators.tsi(25, 13), TSIIndicator(klines["Close"], window_slow=25, window_fast=13).tsi())
+
+
+def test_intermediates_are_shared(klines):
+    indicators = Indicators(klines)
+    indicators.macd(12, 26, 9)
+    # the EMAs computed for MACD are the ones returned for the crossover
+    assert np.shares_memory(indicators.ema(12).to_numpy(), indicators._cache[("ema", 12)])
+    indicators.rsi(14)
+    indicators.tsi(25, 13)
+    assert [key for key in indicators._cache if key[0] == "diff"] == [("diff",)]
+
+
+def test_frame(klines):
+    df = Indicators(klines).frame()
+    assert df.index.equals(klines.index)
+    assert list(df.columns) == ["sma_12", "sma_26", "ema_12", "ema_26", "macd", "macd_signal", "macd_diff", "psar", "psar_up", "psar_down", "rsi_14", "tsi_25_13"]
+    assert df.dtypes.eq(np.float64).all()
+
+
+def test_short_and_empty_series():
+    assert np.isnan(sma(np.array([1.0, 2.0]), 3)).all()
+    _assert_same(ema(np.array([np.nan, 1.0, 4.0, np.nan, 7.0]), 2), [np.nan, np.nan, 3.0, 3.0, 17 / 3])
+    assert [len(values) for values in psar(np.array([]), np.array([]), np.array([]))] == [0, 0, 0]
+    empty = pd.DataFrame({"High": [], "Low": [], "Close": []}, dtype=float)
+    assert Indicators(empty).frame().empty
+
+
+STREAMING = [
+    (lambda: StreamingSMA(12), lambda indicators: indicators.sma(12)),
+    (lambda: StreamingEMA(26), lambda indicators: indicators.ema(26)),
+    (lambda: StreamingMACD(12, 26, 9), lambda indicators: indicators.macd(12, 26, 9)),
+    (lambda: StreamingRSI(14), lambda indicators: indicators.rsi(14)),
+    (lambda: StreamingTSI(25, 13), lambda indicators: indicators.tsi(25, 13)),
+    (lambda: StreamingPSAR(0.02, 0.2), lambda indicators: indicators.psar(0.02, 0.2)),
+]
+
+
+@pytest.mark.parametrize("streaming, batch", STREAMING)
+def test_streaming_matches_batch_bit_for_bit(streaming, batch):
+    df = load_klines(os.path.join(HISTORICAL_DIR, "BTCUSDT-2023-1h.csv"))
+    expected = batch(Indicators(df)).to_numpy()
+    indicator = streaming().seed(df.iloc[:1000])
+    values = []
+    open_times = df.index.as_unit("ms").asi8.tolist()
+    for open_time, high, low, close in zip(open_times[1000:], df["High"].tolist()[1000:], df["Low"].tolist()[1000:], df["Close"].tolist()[1000:]):
+        # the live candle is revised before it closes
+        indicator.update(open_time, high * 1.01, low * 0.99, close * 1.01)
+        indicator.update(open_time, high, low * 0.98, close * 0.99)
+        values.append(indicator.update(open_time, high, low, close))
+    np.testing.assert_array_equal(np.array(values).reshape(len(values), -1), expected[1000:].reshape(len(values), -1))
+
+
+def test_streaming_from_the_first_candle():
+    df = load_klines(os.path.join(HISTORICAL_DIR, "BTCUSDT-2023-1h.csv")).iloc[:50]
+    rsi, psar_indicator = StreamingRSI(14), StreamingPSAR()
+    rsi_values, psar_values = [], []
+    for open_time, high, low, close in zip(df.index.as_unit("ms").asi8.tolist(), df["High"], df["Low"], df["Close"]):
+        rsi_values.append(rsi.update(open_time, high, low, close))
+        psar_values.append(psar_indicator.update(open_time, high, low, close))
+    indicators = Indicators(df)
+    np.testing.assert_array_equal(rsi_values, indicators.rsi(14))
+    np.testing.assert_array_equal(psar_values, indicators.psar().to_numpy())
+
+
+def test_streaming_update_kline_and_order():
+    ema_indicator = StreamingEMA(2)
+    assert np.isnan(ema_indicator.update_kline(Kline(0, 59_999, "BTCUSDT", "1m", 1, 2, 1.0, 2.0, 0.5, 1.0, 1.0, 1, False, 1.0, 0.5, 0.5)))
+    assert ema_indicator.update(60_000, 4.0, 4.0, 4.0) == 3.0
+    with pytest.raises(ValueError):
+        ema_indicator.update(0, 1.0, 1.0, 1.0)
@@ -0,0 +1,203 @@
+"""Higher interval candles built live from a single fine-grained kline stream.
+
+Instead of subscribing to @kline_5m, @kline_1h, @kline_4h... for every symbol, one 1s or 1m stream is consumed and
+every coarser interval of KLINE_INTERVALS is maintained from it. Each base candle updates every interval in constant
+time, and a coarser candle is emitted as soon as the base candle closing its period has been received.
+Buckets follow Binance's alignment: periods start at multiples of the interval since the epoch, weeks start
+on Monday and months on the first day of the month, all in UTC.
+"""
+
+from datetime import datetime, timezone
+from typing import AsyncIterator
+
+from binance import KLINE_INTERVALS, _interval_str_to_timedelta
+from binance_stream import Kline, StreamMultiplexer, continuous_klines
+
+
+DAY = 24 * 60 * 60 * 1000
+WEEK_OFFSET = 4 * DAY  # 1970-01-01 is a Thursday, weeks open on Monday 1970-01-05
+
+
+def _interval_milliseconds(interval: str) -> int | None:
+    """Length of an interval in milliseconds, None for 1M whose length varies."""
+    if interval == "1M":
+        return None
+    return int(_interval_str_to_timedelta(interval).total_seconds() * 1000)
+
+
+def _can_build(interval: str, base_interval: str) -> bool:
+    """Whether every candle of interval opens and closes with a base_interval kline."""
+    base_step, step = _interval_milliseconds(base_interval), _interval_milliseconds(interval)
+    if step is None:
+        return DAY % base_step == 0
+    offset = WEEK_OFFSET if interval == "1w" else 0
+    return step > base_step and step % base_step == 0 and offset % base_step == 0
+
+
+def bucket_bounds(interval: str, open_time: int) -> tuple[int, int]:
+    """(open time, close time) in epoch milliseconds of the interval candle containing open_time."""
+    if interval == "1M":
+        date = datetime.fromtimestamp(open_time // 1000, timezone.utc)
+        start = datetime(date.year, date.month, 1, tzinfo=timezone.utc)
+        end = datetime(date.year + date.month // 12, date.month % 12 + 1, 1, tzinfo=timezone.utc)
+        return int(start.timestamp()) * 1000, int(end.timestamp()) * 1000 - 1
+    step = _interval_milliseconds(interval)
+    offset = WEEK_OFFSET if interval == "1w" else 0
+    start = (open_time - offset) // step * step + offset
+    return start, start + step - 1
+
+
+class _Bucket:
+    __slots__ = (
+        "open_time",
+        "close_time",
+        "first_trade_id",
+        "last_trade_id",
+        "open",
+        "high",
+        "low",
+        "close",
+        "volume",
+        "number_of_trades",
+        "quote_asset_volume",
+        "taker_buy_base_asset_volume",
+        "taker_buy_quote_asset_volume",
+    )
+
+    def __init__(self, open_time: int, close_time: int, kline: Kline):
+        self.open_time = open_time
+        self.close_time = close_time
+        self.first_trade_id = kline.first_trade_id
+        self.last_trade_id = kline.last_trade_id
+        self.open = kline.open
+        self.high = kline.high
+        self.low = kline.low
+        self.close = kline.close
+        self.volume = kline.volume
+        self.number_of_trades = kline.number_of_trades
+        self.quote_asset_volume = kline.quote_asset_volume
+        self.taker_buy_base_asset_volume = kline.taker_buy_base_asset_volume
+        self.taker_buy_quote_asset_volume = kline.taker_buy_quote_asset_volume
+
+    def add(self, kline: Kline):
+        if self.first_trade_id == -1:
+            self.first_trade_id = kline.first_trade_id
+        if kline.last_trade_id != -1:
+            self.last_trade_id = kline.last_trade_id
+        self.high = max(self.high, kline.high)
+        self.low = min(self.low, kline.low)
+        self.close = kline.close
+        self.volume += kline.volume
+        self.number_of_trades += kline.number_of_trades
+        self.quote_asset_volume += kline.quote_asset_volume
+        self.taker_buy_base_asset_volume += kline.taker_buy_base_asset_volume
+        self.taker_buy_quote_asset_volume += kline.taker_buy_quote_asset_volume
+
+    def to_kline(self, symbol: str, interval: str, is_closed: bool) -> Kline:
+        return Kline(
+            open_time=self.open_time,
+            close_time=self.close_time,
+            symbol=symbol,
+            interval=interval,
+            first_trade_id=self.first_trade_id,
+            last_trade_id=self.last_trade_id,
+            open=self.open,
+            high=self.high,
+            low=self.low,
+            close=self.close,
+            volume=self.volume,
+            number_of_trades=self.number_of_trades,
+            is_closed=is_closed,
+            quote_asset_volume=self.quote_asset_volume,
+            taker_buy_base_asset_volume=self.taker_buy_base_asset_volume,
+            taker_buy_quote_asset_volume=self.taker_buy_quote_asset_volume,
+        )
+
+
+class KlineAggregator:
+    """Maintains candles of coarser intervals from the klines of one symbol at base_interval.
+
+    update takes the base klines in order. Closed base klines are added to the candle of every interval and the
+    candles they complete are returned; an unclosed base kline only refreshes what current returns. The first candle
+    of an interval is incomplete if the first base kline does not open its period.
+
+    symbol : string - Symbol of the aggregated klines.
+    base_interval : string - Interval of the klines fed to update.
+    intervals : list (optional) - Intervals to maintain. Defaults to every interval of KLINE_INTERVALS coarser than
+        base_interval that its klines add up to, e.g. all but 6h for 4h klines and none for 3d klines.
+    """
+
+    def __init__(self, symbol: str, base_interval: str = "1m", intervals: list[str] | None = None):
+        if base_interval not in KLINE_INTERVALS or base_interval == "1M":
+            raise ValueError(f"Invalid base interval: {base_interval}. Supported base intervals: {KLINE_INTERVALS[:-1]}")
+        if intervals is None:
+            intervals = [interval for interval in KLINE_INTERVALS[KLINE_INTERVALS.index(base_interval) + 1 :] if _can_build(interval, base_interval)]
+        for interval in intervals:
+            if interval not in KLINE_INTERVALS:
+                raise ValueError(f"Invalid interval: {interval}. Supported intervals: {KLINE_INTERVALS}")
+            if not _can_build(interval, base_interval):
+                raise ValueError(f"Interval {interval} cannot be built from {base_interval} klines")
+        self.symbol = symbol
+        self.base_interval = base_interval
+        self.intervals = list(intervals)
+        self._buckets: dict[str, _Bucket | None] = dict.fromkeys(self.intervals)
+        self._live: Kline | None = None
+
+    def update(self, kline: Kline) -> list[Kline]:
+        """Add a base kline and return the candles it closes, finest interval first."""
+        if not kline.is_closed:
+            self._live = kline
+            return []
+        self._live = None
+        closed = []
+        for interval in self.intervals:
+            bucket = self._buckets[interval]
+            if bucket is not None and kline.open_time > bucket.close_time:
+                # the base klines closing this candle were never received, emit what was aggregated
+                closed.append(bucket.to_kline(self.symbol, interval, True))
+                bucket = None
+            if bucket is None:
+                bucket = self._buckets[interval] = _Bucket(*bucket_bounds(interval, kline.open_time), kline)
+            else:
+                bucket.add(kline)
+            if kline.close_time >= bucket.close_time:
+                closed.append(bucket.to_kline(self.symbol, interval, True))
+                self._buckets[interval] = None
+        return closed
+
+    def current(self, interval: str) -> Kline | None:
+        """The unclosed candle of interval, including the last unclosed base kline, None between two candles."""
+        bucket = self._buckets[interval]
+        live = self._live
+        if live is not None and (bucket is None or live.open_time <= bucket.close_time):
+            merged = _Bucket(*bucket_bounds(interval, live.open_time), live) if bucket is None else _copy_bucket(bucket)
+            if bucket is not None:
+                merged.add(live)
+            return merged.to_kline(self.symbol, interval, False)
+        return None if bucket is None else bucket.to_kline(self.symbol, interval, False)
+
+
+def _copy_bucket(bucket: _Bucket) -> _Bucket:
+    copy = _Bucket.__new__(_Bucket)
+    for name in _Bucket.__slots__:
+        setattr(copy, name, getattr(bucket, name))
+    return copy
+
+
+async def aggregated_klines(
+    symbol: str,
+    base_interval: str = "1m",
+    intervals: list[str] | None = None,
+    start_time: int | None = None,
+    multiplexer: StreamMultiplexer | None = None,
+) -> AsyncIterator[Kline]:
+    """Yield the closed candles of every interval of intervals, built from the continuous_klines stream of base_interval.
+    start_time should be the open time of a candle of the coarsest interval for its first candle to be complete."""
+    aggregator = KlineAggregator(symbol, base_interval, intervals)
+    stream = continuous_klines(symbol, base_interval, start_time, multiplexer)
+    try:
+        async for kline in stream:
+            for closed in aggregator.update(kline):
+                yield closed
+    finally:
+        await stream.aclose()
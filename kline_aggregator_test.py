@@ -0,0 +1,143 @@
+import os
+import asyncio
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from binance import load_klines
+from binance_stream import Kline
+from kline_aggregator import KlineAggregator, aggregated_klines, bucket_bounds
+from kline_store import HISTORICAL_DIR
+
+
+def _milliseconds(timestamp: str) -> int:
+    return int(pd.Timestamp(timestamp, tz="UTC").value // 10**6)
+
+
+def _kline(open_time: int, step: int = 60_000, is_closed: bool = True, **values) -> Kline:
+    fields = dict(open=1.0, high=2.0, low=0.5, close=1.5, volume=10.0, number_of_trades=3, quote_asset_volume=15.0, taker_buy_base_asset_volume=4.0, taker_buy_quote_asset_volume=6.0)
+    fields.update(values)
+    return Kline(open_time=open_time, close_time=open_time + step - 1, symbol="BTCUSDT", interval="1m", first_trade_id=open_time, last_trade_id=open_time + 1, is_closed=is_closed, **fields)
+
+
+def _cached_klines(filename: str) -> list[Kline]:
+    df = load_klines(os.path.join(HISTORICAL_DIR, filename))
+    open_times = df.index.as_unit("ms").asi8
+    close_times = pd.to_datetime(df["Close Time"]).dt.as_unit("ms").astype("int64").to_numpy()
+    return [
+        Kline(
+            open_time=int(open_time),
+            close_time=int(close_time),
+            symbol="BTCUSDT",
+            interval="1h",
+            first_trade_id=-1,
+            last_trade_id=-1,
+            open=row[0],
+            high=row[1],
+            low=row[2],
+            close=row[3],
+            volume=row[4],
+            number_of_trades=int(row[7]),
+            is_closed=True,
+            quote_asset_volume=row[6],
+            taker_buy_base_asset_volume=row[8],
+            taker_buy_quote_asset_volume=row[9],
+        )
+        for open_time, close_time, row in zip(open_times, close_times, df.itertuples(index=False, name=None))
+    ]
+
+
+@pytest.mark.parametrize(
+    ("interval", "timestamp", "expected"),
+    [
+        ("5m", "2024-01-01 00:07:00", ("2024-01-01 00:05:00", "2024-01-01 00:09:59.999")),
+        ("4h", "2024-01-01 05:00:00", ("2024-01-01 04:00:00", "2024-01-01 07:59:59.999")),
+        ("1d", "2024-03-10 23:59:00", ("2024-03-10", "2024-03-10 23:59:59.999")),
+        ("3d", "2024-01-01 00:00:00", ("2023-12-31", "2024-01-02 23:59:59.999")),
+        ("1w", "2024-01-03 12:00:00", ("2024-01-01", "2024-01-07 23:59:59.999")),
+        ("1M", "2024-02-29 23:00:00", ("2024-02-01", "2024-02-29 23:59:59.999")),
+        ("1M", "2023-12-15 00:00:00", ("2023-12-01", "2023-12-31 23:59:59.999")),
+    ],
+)
+def test_bucket_bounds(interval, timestamp, expected):
+    assert bucket_bounds(interval, _milliseconds(timestamp)) == tuple(_milliseconds(t) for t in expected)
+
+
+def test_default_intervals():
+    assert KlineAggregator("BTCUSDT", "1m").intervals == ["3m", "5m", "15m", "30m", "1h", "2h", "4h", "6h", "8h", "12h", "1d", "3d", "1w", "1M"]
+    assert KlineAggregator("BTCUSDT", "1d").intervals == ["3d", "1w", "1M"]
+    # only the intervals the base klines add up to
+    assert KlineAggregator("BTCUSDT", "4h").intervals == ["8h", "12h", "1d", "3d", "1w", "1M"]
+    assert KlineAggregator("BTCUSDT", "3d").intervals == []
+    assert KlineAggregator("BTCUSDT", "1w").intervals == []
+
+
+@pytest.mark.parametrize(("base_interval", "intervals"), [("1M", None), ("2m", None), ("1h", ["30m"]), ("1h", ["7h"]), ("3d", ["1w"]), ("3d", ["1M"]), ("4h", ["6h"]), ("1w", ["1M"])])
+def test_invalid_intervals(base_interval, intervals):
+    with pytest.raises(ValueError):
+        KlineAggregator("BTCUSDT", base_interval, intervals)
+
+
+def test_update_emits_closed_candles():
+    aggregator = KlineAggregator("BTCUSDT", "1m", ["3m", "5m"])
+    start = _milliseconds("2024-01-01")
+    closed = [aggregator.update(_kline(start + i * 60_000, high=2.0 + i, low=0.5 - i, close=1.5 + i)) for i in range(6)]
+    assert [[kline.interval for kline in klines] for klines in closed] == [[], [], ["3m"], [], ["5m"], ["3m"]]
+    three_minutes = closed[2][0]
+    assert (three_minutes.open_time, three_minutes.close_time) == (start, start + 180_000 - 1)
+    assert (three_minutes.open, three_minutes.high, three_minutes.low, three_minutes.close) == (1.0, 4.0, -1.5, 3.5)
+    assert (three_minutes.volume, three_minutes.number_of_trades, three_minutes.quote_asset_volume) == (30.0, 9, 45.0)
+    assert (three_minutes.first_trade_id, three_minutes.last_trade_id) == (start, start + 120_001)
+    assert three_minutes.is_closed
+    assert three_minutes.symbol == "BTCUSDT"
+
+
+def test_current_includes_unclosed_base_kline():
+    aggregator = KlineAggregator("BTCUSDT", "1m", ["5m"])
+    start = _milliseconds("2024-01-01")
+    assert aggregator.current("5m") is None
+    aggregator.update(_kline(start))
+    assert aggregator.update(_kline(start + 60_000, is_closed=False, high=9.0, close=8.0)) == []
+    current = aggregator.current("5m")
+    assert (current.high, current.close, current.volume, current.is_closed) == (9.0, 8.0, 20.0, False)
+    aggregator.update(_kline(start + 60_000))
+    assert aggregator.current("5m").high == 2.0
+    assert aggregator.current("5m").volume == 20.0
+
+
+def test_missing_base_klines_close_the_candle():
+    aggregator = KlineAggregator("BTCUSDT", "1m", ["5m"])
+    start = _milliseconds("2024-01-01")
+    aggregator.update(_kline(start))
+    closed = aggregator.update(_kline(start + 6 * 60_000))
+    assert [(kline.open_time, kline.volume) for kline in closed] == [(start, 10.0)]
+    assert aggregator.current("5m").open_time == start + 5 * 60_000
+
+
+def test_aggregated_days_match_cached_daily_klines():
+    aggregator = KlineAggregator("BTCUSDT", "1h", ["1d"])
+    days = [closed for kline in _cached_klines("BTCUSDT-2023-1h.csv") for closed in aggregator.update(kline)]
+    expected = load_klines(os.path.join(HISTORICAL_DIR, "BTCUSDT-2023-1d.csv"))
+    assert len(days) == len(expected)
+    assert [day.open_time for day in days] == list(expected.index.as_unit("ms").asi8)
+    for name, column in [("open", "Open"), ("high", "High"), ("low", "Low"), ("close", "Close")]:
+        assert np.array_equal([getattr(day, name) for day in days], expected[column].to_numpy())
+    assert [day.number_of_trades for day in days] == expected["Number of Trades"].tolist()
+    for name, column in [("volume", "Volume"), ("quote_asset_volume", "Quote Asset Volume"), ("taker_buy_base_asset_volume", "Taker Buy Base Asset Volume")]:
+        np.testing.assert_allclose([getattr(day, name) for day in days], expected[column].to_numpy(), rtol=1e-9)
+
+
+def test_aggregated_klines(monkeypatch):
+    start = _milliseconds("2024-01-01")
+
+    async def continuous_klines(symbol, interval, start_time, multiplexer):
+        assert (symbol, interval, start_time) == ("BTCUSDT", "1m", start)
+        for i in range(10):
+            yield _kline(start + i * 60_000)
+
+    async def main():
+        return [(kline.interval, kline.open_time) async for kline in aggregated_klines("BTCUSDT", "1m", ["5m"], start)]
+
+    monkeypatch.setattr("kline_aggregator.continuous_klines", continuous_klines)
+    assert asyncio.run(main()) == [("5m", start), ("5m", start + 300_000)]
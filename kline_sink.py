@@ -0,0 +1,198 @@
+"""Persist closed live klines into the csv kline cache.
+
+The cache holds one file per symbol, interval and year, named like the historical files:
+
+    cache/klines/historical/<SYMBOL>-<year>-<interval>.csv
+
+KlineSink collects closed klines and lands them with append_klines once max_batch_size candles are pending or the
+oldest pending one has waited max_delay seconds, so the files are appended to in small journaled batches and never
+rewritten. sink_klines feeds a sink from continuous_klines: the cache stays current from the websocket alone and
+REST is only used to fill the candles missed before startup or while disconnected.
+"""
+
+import os
+import asyncio
+import logging
+from time import monotonic
+
+import pandas as pd
+
+from binance import append_klines, klines_to_df, read_last_open_time, write_new_cache
+from binance_stream import Kline, StreamMultiplexer, continuous_klines
+from kline_store import CSV_FILENAME_PATTERN, HISTORICAL_DIR
+
+
+SINK_BATCH_SIZE = 60
+SINK_MAX_DELAY = 60.0
+
+
+def cache_path(symbol: str, interval: str, year: int, directory: str = HISTORICAL_DIR) -> str:
+    return os.path.join(directory, f"{symbol}-{year}-{interval}.csv")
+
+
+def stream_klines_to_df(klines: list[Kline]) -> pd.DataFrame:
+    """Convert stream klines to a DataFrame in the klines_to_df layout."""
+    return klines_to_df(
+        [
+            (
+                kline.open_time,
+                kline.open,
+                kline.high,
+                kline.low,
+                kline.close,
+                kline.volume,
+                kline.close_time,
+                kline.quote_asset_volume,
+                kline.number_of_trades,
+                kline.taker_buy_base_asset_volume,
+                kline.taker_buy_quote_asset_volume,
+            )
+            for kline in klines
+        ]
+    )
+
+
+class KlineSink:
+    """Buffers the closed klines of one symbol and interval and appends them to the csv cache in micro-batches.
+
+    symbol : string - Symbol of the klines.
+    interval : string - Interval of the klines.
+    directory : string - Directory of the cache files.
+    max_batch_size : integer - Pending klines that trigger a flush.
+    max_delay : float - Seconds a kline may stay pending before a flush is due.
+
+    Usage:
+        sink = KlineSink("BTCUSDT", "1m")
+        if sink.add(kline):
+            sink.flush()
+    """
+
+    def __init__(self, symbol: str, interval: str, directory: str = HISTORICAL_DIR, max_batch_size: int = SINK_BATCH_SIZE, max_delay: float = SINK_MAX_DELAY):
+        self.symbol = symbol
+        self.interval = interval
+        self.directory = directory
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.written = 0
+        self._pending: list[Kline] = []
+        self._pending_since: float | None = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, kline: Kline) -> bool:
+        """Queue a kline, ignoring unclosed ones. Returns True if a flush is due."""
+        if kline.is_closed:
+            if not self._pending:
+                self._pending_since = monotonic()
+            self._pending.append(kline)
+        return self.due()
+
+    def due(self) -> bool:
+        return bool(self._pending) and (len(self._pending) >= self.max_batch_size or monotonic() - self._pending_since >= self.max_delay)
+
+    def time_to_flush(self) -> float:
+        """Seconds until the pending klines are due, max_delay if none are pending."""
+        if not self._pending:
+            return self.max_delay
+        return max(self._pending_since + self.max_delay - monotonic(), 0.0)
+
+    def flush(self) -> int:
+        """Append the pending klines to the cache files of their years. Returns the number of written klines."""
+        klines = self._take()
+        try:
+            written = self._write(klines)
+        except BaseException:
+            self._restore(klines)
+            raise
+        self.written += written
+        return written
+
+    async def flush_async(self) -> int:
+        """flush writing the files from a worker thread. The pending klines are taken and restored on the event loop,
+        so klines added while the files are written stay pending for the next flush."""
+        klines = self._take()
+        try:
+            written = await asyncio.to_thread(self._write, klines)
+        except BaseException:
+            self._restore(klines)
+            raise
+        self.written += written
+        return written
+
+    def _take(self) -> list[Kline]:
+        klines, self._pending, self._pending_since = self._pending, [], None
+        return klines
+
+    def _restore(self, klines: list[Kline]):
+        # keep the klines for the next flush, ahead of the ones added since
+        self._pending[:0] = klines
+        self._pending_since = monotonic()
+
+    def _write(self, klines: list[Kline]) -> int:
+        if not klines:
+            return 0
+        df = stream_klines_to_df(klines)
+        df = df[~df.index.duplicated(keep="last")].sort_index()
+        for year, year_df in df.groupby(df.index.year, sort=True):
+            csv_filepath = cache_path(self.symbol, self.interval, year, self.directory)
+            if os.path.exists(csv_filepath):
+                append_klines(csv_filepath, year_df)
+            else:
+                write_new_cache(csv_filepath, year_df)
+        return len(df)
+
+    def last_open_time(self) -> int | None:
+        """Open time in epoch milliseconds of the last cached kline, None if nothing is cached."""
+        years = [
+            int(match["year"])
+            for match in map(CSV_FILENAME_PATTERN.match, os.listdir(self.directory) if os.path.isdir(self.directory) else [])
+            if match is not None and match["symbol"] == self.symbol and match["interval"] == self.interval
+        ]
+        if not years:
+            return None
+        csv_filepath = cache_path(self.symbol, self.interval, max(years), self.directory)
+        return int(read_last_open_time(csv_filepath).timestamp() * 1000)
+
+
+async def sink_klines(
+    symbol: str,
+    interval: str = "1m",
+    directory: str = HISTORICAL_DIR,
+    max_batch_size: int = SINK_BATCH_SIZE,
+    max_delay: float = SINK_MAX_DELAY,
+    backfill: bool = True,
+    multiplexer: StreamMultiplexer | None = None,
+):
+    """Append the closed klines of a symbol to the csv cache until cancelled. Pending klines are flushed on exit.
+
+    With backfill, the stream starts at the last cached kline, which may have been stored unclosed, so it and the
+    candles that closed while nothing was running are fetched once from REST. Without it, the cache continues
+    from the first candle closing after startup.
+    Files are written from a worker thread so that disk syncs do not hold back the event loop.
+    """
+    sink = KlineSink(symbol, interval, directory, max_batch_size, max_delay)
+    stream = continuous_klines(symbol, interval, sink.last_open_time() if backfill else None, multiplexer)
+    lock = asyncio.Lock()
+
+    async def flush():
+        async with lock:
+            written = await sink.flush_async()
+        if written:
+            logging.info("Cached %s %s %s klines", written, symbol, interval)
+
+    async def flush_when_due():
+        while True:
+            await asyncio.sleep(sink.time_to_flush())
+            if sink.due():
+                await flush()
+
+    timer = asyncio.create_task(flush_when_due())
+    try:
+        async for kline in stream:
+            if sink.add(kline):
+                await flush()
+    finally:
+        timer.cancel()
+        await stream.aclose()
+        await flush()
@@ -0,0 +1,178 @@
+import json
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import pandas as pd
+
+from binance import klines_to_df, load_klines
+from binance_stream import KLINE_DECODER, StreamMultiplexer, Kline
+import kline_sink
+from kline_sink import KlineSink, cache_path, sink_klines, stream_klines_to_df
+from testing import kline_message, minute_klines, run_with_fake_binance, until
+
+
+START = 1672531200000  # 2023-01-01 00:00:00
+
+
+def _kline(open_time, is_closed=True):
+    return KLINE_DECODER.decode(json.dumps(kline_message(open_time, is_closed))).kline
+
+
+def _cached(directory, year=2023):
+    return load_klines(cache_path("BTCUSDT", "1m", year, str(directory)))
+
+
+def test_stream_klines_to_df_matches_klines_to_df():
+    klines = [Kline(t, t + 59_999, "BTCUSDT", "1m", 1, 2, 1.0, 2.0, 0.5, 1.5, 10.0, 7, True, 15.0, 5.0, 7.5) for t in (START, START + 60_000)]
+    pd.testing.assert_frame_equal(stream_klines_to_df(klines), klines_to_df(minute_klines([START, START + 60_000])))
+
+
+def test_add_ignores_unclosed_klines_and_flushes_by_size(tmp_path):
+    sink = KlineSink("BTCUSDT", "1m", str(tmp_path), max_batch_size=2)
+    assert not sink.add(_kline(START))
+    assert not sink.add(_kline(START + 60_000, is_closed=False))
+    assert sink.add(_kline(START + 60_000))
+    assert sink.flush() == 2
+    assert len(sink) == 0
+    assert sink.flush() == 0
+    assert _cached(tmp_path).index.tolist() == [pd.Timestamp(START, unit="ms", tz="UTC"), pd.Timestamp(START + 60_000, unit="ms", tz="UTC")]
+
+
+def test_flush_by_delay(tmp_path):
+    sink = KlineSink("BTCUSDT", "1m", str(tmp_path), max_delay=0.05)
+    assert sink.time_to_flush() == 0.05
+    assert not sink.add(_kline(START))
+    assert 0 < sink.time_to_flush() <= 0.05
+    time.sleep(0.06)
+    assert sink.due()
+    assert sink.time_to_flush() == 0
+
+
+def test_flush_appends_replaces_and_splits_years(tmp_path):
+    sink = KlineSink("BTCUSDT", "1m", str(tmp_path))
+    for open_time in (START - 120_000, START - 60_000, START):
+        sink.add(_kline(open_time))
+    sink.flush()
+    # the same candle twice in a batch, and a candle already cached: the last one wins
+    sink.add(_kline(START + 60_000))
+    sink.add(KLINE_DECODER.decode(json.dumps(kline_message(START, close=3.0))).kline)
+    sink.add(KLINE_DECODER.decode(json.dumps(kline_message(START, close=4.0))).kline)
+    assert sink.flush() == 2
+    assert sink.written == 5
+    assert len(_cached(tmp_path, 2022)) == 2
+    assert _cached(tmp_path)["Close"].tolist() == [4.0, 1.0]
+    assert sink.last_open_time() == START + 60_000
+
+
+def test_failed_flush_keeps_the_klines(tmp_path, monkeypatch):
+    sink = KlineSink("BTCUSDT", "1m", str(tmp_path))
+    sink.add(_kline(START))
+    sink.flush()
+    sink.add(_kline(START + 60_000))
+
+    def fail(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr("kline_sink.append_klines", fail)
+    with pytest.raises(OSError):
+        sink.flush()
+    assert len(sink) == 1
+    monkeypatch.undo()
+    assert sink.flush() == 1
+    assert len(_cached(tmp_path)) == 2
+
+
+def test_add_while_flush_async_writes(tmp_path, monkeypatch):
+    sink = KlineSink("BTCUSDT", "1m", str(tmp_path), max_delay=60.0)
+    sink.add(_kline(START))
+    sink.flush()
+    writing, release = threading.Event(), threading.Event()
+    append_klines = kline_sink.append_klines
+
+    def slow_append(*args):
+        writing.set()
+        release.wait(5)
+        if fail:
+            raise OSError("disk full")
+        append_klines(*args)
+
+    monkeypatch.setattr("kline_sink.append_klines", slow_append)
+
+    async def test():
+        sink.add(_kline(START + 60_000))
+        flush = asyncio.ensure_future(sink.flush_async())
+        await asyncio.to_thread(writing.wait, 5)
+        assert not sink.add(_kline(START + 120_000))
+        assert 0 < sink.time_to_flush() <= 60.0
+        release.set()
+        return await flush
+
+    fail = False
+    assert asyncio.run(test()) == 1
+    assert len(sink) == 1
+    assert len(_cached(tmp_path)) == 2
+
+    sink.flush()
+    fail = True
+    writing.clear()
+    release.clear()
+    with pytest.raises(OSError):
+        asyncio.run(test())
+    # the klines of the failed write are kept ahead of the one added while it ran
+    assert [kline.open_time for kline in sink._pending] == [START + 60_000, START + 120_000]
+    assert not sink.due()
+
+
+def test_flush_while_the_cache_is_read(tmp_path):
+    sink = KlineSink("BTCUSDT", "1m", str(tmp_path))
+    sink.add(_kline(START))
+    sink.flush()
+
+    def write():
+        for i in range(1, 200):
+            sink.add(_kline(START + i * 60_000))
+            sink.flush()
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        writer = executor.submit(write)
+        while not writer.done():
+            cached = _cached(tmp_path)
+            assert cached.index.is_unique and cached.index.is_monotonic_increasing
+        writer.result()
+    assert len(_cached(tmp_path)) == 200
+
+
+def test_last_open_time_without_cache(tmp_path):
+    assert KlineSink("BTCUSDT", "1m", str(tmp_path / "missing")).last_open_time() is None
+
+
+def test_sink_klines(tmp_path, rest_klines):
+    start, requests = rest_klines
+    sink = KlineSink("BTCUSDT", "1m", str(tmp_path))
+    sink.add(_kline(start))
+    sink.add(_kline(start + 60_000, is_closed=True))
+    sink.flush()
+
+    async def test(binance, uri):
+        async with StreamMultiplexer(uri, control_messages_per_second=100) as multiplexer:
+            task = asyncio.ensure_future(sink_klines("BTCUSDT", "1m", str(tmp_path), max_batch_size=3, multiplexer=multiplexer))
+            await until(lambda: any(binance.connections.values()))
+            # the last cached candle and the ones that closed since, up to 00:09, are backfilled in batches of 3
+            await until(lambda: len(_cached(tmp_path)) == 10)
+            await binance.push("btcusdt@kline_1m", kline_message(start + 10 * 60_000, is_closed=False))
+            await binance.push("btcusdt@kline_1m", kline_message(start + 10 * 60_000, close=2.0))
+            await asyncio.sleep(0.05)
+            assert len(_cached(tmp_path)) == 10
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+    run_with_fake_binance(test)
+    cached = _cached(tmp_path)
+    # the candle pending at cancellation is flushed on exit
+    assert cached.index.tolist() == [pd.Timestamp(start + i * 60_000, unit="ms", tz="UTC") for i in range(11)]
+    assert cached["Close"].tolist() == [1.0] + [1.5] * 9 + [2.0]
+    assert requests[0][0] == "2023-01-01 00:01:00"
@@ -0,0 +1,232 @@
+"""Columnar kline store.
+
+Klines are stored as zstd compressed Parquet files partitioned by symbol, interval and year:
+
+    cache/klines/store/<SYMBOL>/<interval>/<year>.parquet
+
+Timestamps are stored as int64 epoch milliseconds and every other column keeps its KLINE_DTYPES type,
+so loading a partition is a straight column decode with no text parsing. Each partition is split in row groups
+of about a week of candles, whose Open Time statistics let read_klines skip the row groups outside a queried range.
+
+For workloads that scan the same history many times, partitions can also be exported to fixed-width record arrays:
+
+    cache/klines/arrays/<SYMBOL>/<interval>/<year>.npy
+
+These are plain .npy files of RECORD_DTYPE records, opened with np.load(mmap_mode="r"), so loading one does no
+parsing and every process that opens it shares the same pages of the OS page cache.
+"""
+
+import os
+import re
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from binance import KLINE_DTYPES, load_klines, _interval_str_to_timedelta
+
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "klines")
+HISTORICAL_DIR = os.path.join(CACHE_DIR, "historical")
+STORE_DIR = os.path.join(CACHE_DIR, "store")
+ARRAY_DIR = os.path.join(CACHE_DIR, "arrays")
+SCHEMA = pa.schema([(name, pa.int64() if dtype is np.int64 else pa.float64()) for name, dtype in KLINE_DTYPES.items()])
+RECORD_DTYPE = np.dtype([(name, "datetime64[ms]" if name in ("Open Time", "Close Time") else dtype) for name, dtype in KLINE_DTYPES.items()])
+ROW_GROUP_SPAN = timedelta(weeks=1)
+MIN_ROW_GROUP_SIZE = 128
+CSV_FILENAME_PATTERN = re.compile(r"^(?P<symbol>[A-Z0-9]+)-(?P<year>\d{4})-(?P<interval>\w+)\.csv$")
+
+
+def partition_path(symbol: str, interval: str, year: int, root: str = STORE_DIR) -> str:
+    return os.path.join(root, symbol, interval, f"{year}.parquet")
+
+
+def list_years(symbol: str, interval: str, root: str = STORE_DIR) -> list[int]:
+    """Years stored for a symbol and interval, in ascending order."""
+    directory = os.path.join(root, symbol, interval)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(int(name.removesuffix(".parquet")) for name in os.listdir(directory) if re.fullmatch(r"\d{4}\.parquet", name))
+
+
+def df_to_table(df: pd.DataFrame) -> pa.Table:
+    """Convert a klines DataFrame (as returned by klines_to_df or load_klines) to an Arrow table with the store schema."""
+    arrays = {"Open Time": _to_epoch_milliseconds(df.index)}
+    for name, dtype in KLINE_DTYPES.items():
+        if name == "Open Time":
+            continue
+        arrays[name] = _to_epoch_milliseconds(df[name]) if name == "Close Time" else df[name].to_numpy(dtype=dtype)
+    return pa.table(arrays, schema=SCHEMA)
+
+
+def table_to_df(table: pa.Table) -> pd.DataFrame:
+    """Convert an Arrow table read from the store back to a klines DataFrame indexed by open time."""
+    columns = {name: table.column(name).to_numpy() for name in table.column_names}
+    index = pd.DatetimeIndex(columns.pop("Open Time").view("datetime64[ms]"), name="Open Time").tz_localize("UTC")
+    if "Close Time" in columns:
+        columns["Close Time"] = pd.DatetimeIndex(columns["Close Time"].view("datetime64[ms]")).tz_localize("UTC")
+    return pd.DataFrame(columns, index=index, copy=False)
+
+
+def write_klines(df: pd.DataFrame, symbol: str, interval: str, root: str = STORE_DIR) -> list[str]:
+    """Write klines to the store, one partition per year. Rows already stored for those years are kept unless
+    the new data has the same open time, in which case the new row wins. Returns the written file paths."""
+    paths = []
+    for year, year_df in df.groupby(df.index.year, sort=True):
+        path = partition_path(symbol, interval, year, root)
+        table = df_to_table(year_df)
+        if os.path.exists(path):
+            table = _merge_tables(pq.read_table(path), table)
+        _write_table(table, path, _row_group_size(interval))
+        paths.append(path)
+    return paths
+
+
+def read_partition(symbol: str, interval: str, year: int, columns: list[str] | None = None, root: str = STORE_DIR) -> pd.DataFrame:
+    """Read one year of klines. Only the requested columns (plus the Open Time index) are decoded."""
+    if columns is not None:
+        columns = ["Open Time"] + [column for column in columns if column != "Open Time"]
+    return table_to_df(pq.read_table(partition_path(symbol, interval, year, root), columns=columns))
+
+
+def read_klines(
+    symbol: str,
+    interval: str,
+    start: str | datetime | None = None,
+    end: str | datetime | None = None,
+    columns: list[str] | None = None,
+    root: str = STORE_DIR,
+) -> pd.DataFrame:
+    """Read the klines opened in [start, end) across yearly partitions. Naive times are taken as UTC and a
+    missing bound leaves that side open. Only the row groups overlapping the range and the requested columns
+    (plus the Open Time index) are decoded.
+    """
+    if columns is not None:
+        columns = ["Open Time"] + [column for column in columns if column != "Open Time"]
+    start_ms = None if start is None else int(_to_epoch_milliseconds([start])[0])
+    end_ms = None if end is None else int(_to_epoch_milliseconds([end])[0])
+    tables = []
+    for year in list_years(symbol, interval, root):
+        year_start_ms, year_end_ms = _to_epoch_milliseconds([f"{year}-01-01", f"{year + 1}-01-01"])
+        if (end_ms is not None and year_start_ms >= end_ms) or (start_ms is not None and year_end_ms <= start_ms):
+            continue
+        tables.append(_read_range(partition_path(symbol, interval, year, root), start_ms, end_ms, columns))
+    table = pa.concat_tables(tables) if tables else SCHEMA.empty_table()
+    return table_to_df(table if columns is None else table.select(columns))
+
+
+def array_path(symbol: str, interval: str, year: int, root: str = ARRAY_DIR) -> str:
+    return os.path.join(root, symbol, interval, f"{year}.npy")
+
+
+def df_to_records(df: pd.DataFrame) -> np.ndarray:
+    """Convert a klines DataFrame to a structured array of RECORD_DTYPE records."""
+    records = np.empty(len(df), dtype=RECORD_DTYPE)
+    records["Open Time"] = _to_epoch_milliseconds(df.index).view("datetime64[ms]")
+    for name in RECORD_DTYPE.names[1:]:
+        records[name] = _to_epoch_milliseconds(df[name]).view("datetime64[ms]") if name == "Close Time" else df[name].to_numpy()
+    return records
+
+
+def records_to_df(records: np.ndarray, columns: list[str] | None = None) -> pd.DataFrame:
+    """Wrap an array of RECORD_DTYPE records in a klines DataFrame indexed by open time.
+    The numeric columns are views on the records, only the timestamps are copied to build the DatetimeIndex."""
+    records = np.asarray(records)
+    names = [name for name in RECORD_DTYPE.names[1:] if columns is None or name in columns]
+    data = {name: pd.DatetimeIndex(records[name]).tz_localize("UTC") if name == "Close Time" else records[name] for name in names}
+    index = pd.DatetimeIndex(records["Open Time"], name="Open Time").tz_localize("UTC")
+    return pd.DataFrame(data, index=index, copy=False)
+
+
+def write_array(df: pd.DataFrame, symbol: str, interval: str, year: int, root: str = ARRAY_DIR) -> str:
+    """Write one year of klines as a record array, replacing any previous file. Returns the written file path."""
+    path = array_path(symbol, interval, year, root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, df_to_records(df))
+    os.replace(tmp_path, path)
+    return path
+
+
+def open_array(symbol: str, interval: str, year: int, root: str = ARRAY_DIR) -> np.memmap:
+    """Memory-map one year of klines read-only. Fields are accessed by column name, e.g. records["Close"]."""
+    return np.load(array_path(symbol, interval, year, root), mmap_mode="r")
+
+
+def load_array(symbol: str, interval: str, year: int, columns: list[str] | None = None, root: str = ARRAY_DIR) -> pd.DataFrame:
+    """Load one year of klines from its memory-mapped record array, see records_to_df."""
+    return records_to_df(open_array(symbol, interval, year, root), columns)
+
+
+def export_arrays(symbol: str, interval: str, root: str = STORE_DIR, array_root: str = ARRAY_DIR) -> list[str]:
+    """Export every stored year of a symbol and interval to record arrays. Returns the written file paths."""
+    return [write_array(read_partition(symbol, interval, year, root=root), symbol, interval, year, array_root) for year in list_years(symbol, interval, root)]
+
+
+def migrate_csv_cache(csv_dir: str = HISTORICAL_DIR, root: str = STORE_DIR) -> list[str]:
+    """One-shot migration of <SYMBOL>-<year>-<interval>.csv cache files into the store. Returns the written file paths."""
+    paths = []
+    for filename in sorted(os.listdir(csv_dir)):
+        match = CSV_FILENAME_PATTERN.match(filename)
+        if match is None:
+            continue
+        df = load_klines(os.path.join(csv_dir, filename))
+        paths += write_klines(df, match["symbol"], match["interval"], root)
+    return paths
+
+
+def _to_epoch_milliseconds(values) -> np.ndarray:
+    return pd.DatetimeIndex(pd.to_datetime(values, utc=True)).as_unit("ms").asi8
+
+
+def _merge_tables(stored: pa.Table, new: pa.Table) -> pa.Table:
+    open_times = new.column("Open Time").to_numpy()
+    keep = ~np.isin(stored.column("Open Time").to_numpy(), open_times)
+    merged = pa.concat_tables([stored.filter(pa.array(keep)), new])
+    return merged.sort_by("Open Time")
+
+
+def _row_group_size(interval: str) -> int:
+    try:
+        return max(ROW_GROUP_SPAN // _interval_str_to_timedelta(interval), MIN_ROW_GROUP_SIZE)
+    except ValueError:
+        return MIN_ROW_GROUP_SIZE
+
+
+def _row_groups_in_range(metadata: pq.FileMetaData, start_ms: int | None, end_ms: int | None) -> list[int]:
+    """Indices of the row groups whose Open Time statistics overlap [start_ms, end_ms)."""
+    row_groups = []
+    for i in range(metadata.num_row_groups):
+        statistics = metadata.row_group(i).column(0).statistics
+        if statistics is not None and statistics.has_min_max:
+            if (end_ms is not None and statistics.min >= end_ms) or (start_ms is not None and statistics.max < start_ms):
+                continue
+        row_groups.append(i)
+    return row_groups
+
+
+def _read_range(path: str, start_ms: int | None, end_ms: int | None, columns: list[str] | None) -> pa.Table:
+    parquet_file = pq.ParquetFile(path)
+    table = parquet_file.read_row_groups(_row_groups_in_range(parquet_file.metadata, start_ms, end_ms), columns=columns)
+    open_times = table.column("Open Time").to_numpy()
+    mask = np.ones(len(open_times), dtype=bool)
+    if start_ms is not None:
+        mask &= open_times >= start_ms
+    if end_ms is not None:
+        mask &= open_times < end_ms
+    return table if mask.all() else table.filter(pa.array(mask))
+
+
+def _write_table(table: pa.Table, path: str, row_group_size: int):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    pq.write_table(table, tmp_path, compression="zstd", row_group_size=row_group_size)
+    os.replace(tmp_path, path)
+
+
+if __name__ == "__main__":
+    for written_path in migrate_csv_cache():
+        print(written_path)
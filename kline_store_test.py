@@ -0,0 +1,228 @@
+import os
+import shutil
+from unittest.mock import patch
+
+import pytest
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from binance import klines_to_df, load_klines
+from kline_store import (
+    HISTORICAL_DIR,
+    SCHEMA,
+    partition_path,
+    list_years,
+    df_to_table,
+    table_to_df,
+    write_klines,
+    read_partition,
+    read_klines,
+    migrate_csv_cache,
+    RECORD_DTYPE,
+    array_path,
+    df_to_records,
+    records_to_df,
+    write_array,
+    open_array,
+    load_array,
+    export_arrays,
+    _row_group_size,
+    _row_groups_in_range,
+)
+
+
+def _klines(start: str, periods: int, freq: str = "1h") -> pd.DataFrame:
+    open_times = pd.date_range(start, periods=periods, freq=freq, tz="UTC").as_unit("ms").asi8
+    step = int(pd.Timedelta(freq).total_seconds() * 1000)
+    prices = np.arange(periods, dtype=np.float64) + 100
+    return klines_to_df(
+        [[int(t), str(p), str(p + 2), str(p - 1), str(p + 1), "1.5", int(t) + step - 1, "150.0", 10 + i, "0.5", "50.0", "0"] for i, (t, p) in enumerate(zip(open_times, prices))]
+    )
+
+
+def test_partition_path():
+    assert partition_path("BTCUSDT", "1h", 2024, "/store") == os.path.join("/store", "BTCUSDT", "1h", "2024.parquet")
+
+
+def test_table_roundtrip():
+    df = _klines("2024-01-01", 48)
+    table = df_to_table(df)
+    assert table.schema == SCHEMA
+    assert table.column("Open Time")[0].as_py() == 1704067200000
+    pd.testing.assert_frame_equal(table_to_df(table), df)
+
+
+def test_write_and_read_partition(tmp_path):
+    df = _klines("2024-01-01", 48)
+    assert write_klines(df, "BTCUSDT", "1h", str(tmp_path)) == [partition_path("BTCUSDT", "1h", 2024, str(tmp_path))]
+    pd.testing.assert_frame_equal(read_partition("BTCUSDT", "1h", 2024, root=str(tmp_path)), df)
+
+
+def test_write_klines_partitions_by_year(tmp_path):
+    df = _klines("2023-12-31 12:00:00", 24)
+    paths = write_klines(df, "BTCUSDT", "1h", str(tmp_path))
+    assert paths == [partition_path("BTCUSDT", "1h", year, str(tmp_path)) for year in (2023, 2024)]
+    assert list_years("BTCUSDT", "1h", str(tmp_path)) == [2023, 2024]
+    assert len(read_partition("BTCUSDT", "1h", 2023, root=str(tmp_path))) == 12
+    assert len(read_partition("BTCUSDT", "1h", 2024, root=str(tmp_path))) == 12
+
+
+def test_write_klines_merges_with_stored_rows(tmp_path):
+    df = _klines("2024-01-01", 48)
+    write_klines(df.iloc[:30], "BTCUSDT", "1h", str(tmp_path))
+    update = df.iloc[29:].copy()
+    update.loc[update.index[0], "Close"] = 1.0
+    write_klines(update, "BTCUSDT", "1h", str(tmp_path))
+    stored = read_partition("BTCUSDT", "1h", 2024, root=str(tmp_path))
+    assert stored.index.equals(df.index)
+    assert stored["Close"].iloc[29] == 1.0
+    assert stored["Close"].iloc[28] == df["Close"].iloc[28]
+
+
+def test_write_is_atomic(tmp_path):
+    write_klines(_klines("2024-01-01", 24), "BTCUSDT", "1h", str(tmp_path))
+    assert os.listdir(tmp_path / "BTCUSDT" / "1h") == ["2024.parquet"]
+
+
+def test_read_partition_column_projection(tmp_path):
+    write_klines(_klines("2024-01-01", 48), "BTCUSDT", "1h", str(tmp_path))
+    df = read_partition("BTCUSDT", "1h", 2024, columns=["Close"], root=str(tmp_path))
+    assert list(df.columns) == ["Close"]
+    assert df.index.name == "Open Time"
+    assert str(df.index.dtype) == "datetime64[ms, UTC]"
+
+
+def test_stored_types(tmp_path):
+    write_klines(_klines("2024-01-01", 24), "BTCUSDT", "1h", str(tmp_path))
+    parquet_file = pq.ParquetFile(partition_path("BTCUSDT", "1h", 2024, str(tmp_path)))
+    assert parquet_file.schema_arrow == SCHEMA
+    assert parquet_file.metadata.row_group(0).column(0).compression == "ZSTD"
+
+
+@pytest.mark.parametrize("interval, expected", [("1m", 10080), ("1h", 168), ("4h", 128), ("1d", 128), ("1M", 128)])
+def test_row_group_size(interval, expected):
+    assert _row_group_size(interval) == expected
+
+
+def test_partitions_are_split_in_weekly_row_groups(tmp_path):
+    write_klines(_klines("2024-01-01", 24 * 7 * 3), "BTCUSDT", "1h", str(tmp_path))
+    metadata = pq.ParquetFile(partition_path("BTCUSDT", "1h", 2024, str(tmp_path))).metadata
+    assert metadata.num_row_groups == 3
+    start_ms = int(pd.Timestamp("2024-01-15", tz="UTC").value // 10**6)
+    assert _row_groups_in_range(metadata, start_ms, None) == [2]
+    assert _row_groups_in_range(metadata, None, start_ms) == [0, 1]
+
+
+def test_read_klines_range(tmp_path):
+    df = _klines("2024-01-01", 24 * 7 * 3)
+    write_klines(df, "BTCUSDT", "1h", str(tmp_path))
+    result = read_klines("BTCUSDT", "1h", "2024-01-10 12:00:00", "2024-01-12", root=str(tmp_path))
+    pd.testing.assert_frame_equal(result, df.loc["2024-01-10 12:00:00":"2024-01-11 23:00:00"])
+
+
+def test_read_klines_reads_only_overlapping_row_groups(tmp_path):
+    write_klines(_klines("2024-01-01", 24 * 7 * 3), "BTCUSDT", "1h", str(tmp_path))
+    with patch("pyarrow.parquet.ParquetFile.read_row_groups", autospec=True, side_effect=pq.ParquetFile.read_row_groups) as read_mock:
+        df = read_klines("BTCUSDT", "1h", "2024-01-16", root=str(tmp_path))
+    assert read_mock.call_args.args[1] == [2]
+    assert len(df) == 24 * 6
+
+
+def test_read_klines_spans_partitions(tmp_path):
+    df = _klines("2023-12-31", 48)
+    write_klines(df, "BTCUSDT", "1h", str(tmp_path))
+    result = read_klines("BTCUSDT", "1h", "2023-12-31 20:00:00", "2024-01-01 04:00:00", columns=["Close"], root=str(tmp_path))
+    assert list(result.columns) == ["Close"]
+    assert result.index.equals(df.index[20:28])
+    assert result["Close"].tolist() == df["Close"].iloc[20:28].tolist()
+
+
+def test_read_klines_open_range(tmp_path):
+    df = _klines("2023-12-31", 48)
+    write_klines(df, "BTCUSDT", "1h", str(tmp_path))
+    pd.testing.assert_frame_equal(read_klines("BTCUSDT", "1h", root=str(tmp_path)), df)
+
+
+def test_read_klines_timezone_aware_bounds(tmp_path):
+    df = _klines("2024-01-01", 48)
+    write_klines(df, "BTCUSDT", "1h", str(tmp_path))
+    result = read_klines("BTCUSDT", "1h", pd.Timestamp("2024-01-01 03:00", tz="Europe/Paris"), root=str(tmp_path))
+    assert result.index[0] == pd.Timestamp("2024-01-01 02:00", tz="UTC")
+
+
+def test_read_klines_without_data(tmp_path):
+    df = read_klines("BTCUSDT", "1h", "2024-01-01", "2024-02-01", columns=["Close"], root=str(tmp_path))
+    assert df.empty
+    assert list(df.columns) == ["Close"]
+    write_klines(_klines("2024-01-01", 48), "BTCUSDT", "1h", str(tmp_path))
+    assert read_klines("BTCUSDT", "1h", "2024-03-01", "2024-03-02", root=str(tmp_path)).empty
+
+
+def test_list_years_without_data(tmp_path):
+    assert list_years("BTCUSDT", "1h", str(tmp_path)) == []
+
+
+def test_read_missing_partition(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        read_partition("BTCUSDT", "1h", 2024, root=str(tmp_path))
+
+
+def test_migrate_csv_cache(tmp_path):
+    csv_dir = tmp_path / "historical"
+    csv_dir.mkdir()
+    shutil.copy(os.path.join(HISTORICAL_DIR, "BTCUSDT-2023-1d.csv"), csv_dir)
+    (csv_dir / "notes.txt").write_text("not a kline file")
+    paths = migrate_csv_cache(str(csv_dir), str(tmp_path / "store"))
+    assert paths == [partition_path("BTCUSDT", "1d", 2023, str(tmp_path / "store"))]
+    expected = load_klines(os.path.join(HISTORICAL_DIR, "BTCUSDT-2023-1d.csv"))
+    stored = read_partition("BTCUSDT", "1d", 2023, root=str(tmp_path / "store"))
+    assert stored.index.equals(expected.index)
+    assert np.array_equal(stored["Close"].to_numpy(), expected["Close"].to_numpy())
+    assert stored["Close Time"].equals(pd.to_datetime(expected["Close Time"]).dt.as_unit("ms"))
+
+
+def test_record_dtype():
+    assert RECORD_DTYPE.names == tuple(SCHEMA.names)
+    assert RECORD_DTYPE.itemsize == 8 * len(SCHEMA.names)
+    assert RECORD_DTYPE["Open Time"] == np.dtype("datetime64[ms]")
+
+
+def test_records_roundtrip():
+    df = _klines("2024-01-01", 48)
+    records = df_to_records(df)
+    assert records["Open Time"][0] == np.datetime64("2024-01-01T00:00:00.000")
+    pd.testing.assert_frame_equal(records_to_df(records), df)
+
+
+def test_write_and_load_array(tmp_path):
+    df = _klines("2024-01-01", 48)
+    assert write_array(df, "BTCUSDT", "1h", 2024, str(tmp_path)) == array_path("BTCUSDT", "1h", 2024, str(tmp_path))
+    assert os.listdir(tmp_path / "BTCUSDT" / "1h") == ["2024.npy"]
+    pd.testing.assert_frame_equal(load_array("BTCUSDT", "1h", 2024, root=str(tmp_path)), df)
+
+
+def test_open_array_is_a_read_only_memmap(tmp_path):
+    write_array(_klines("2024-01-01", 48), "BTCUSDT", "1h", 2024, str(tmp_path))
+    records = open_array("BTCUSDT", "1h", 2024, str(tmp_path))
+    assert isinstance(records, np.memmap)
+    assert records.dtype == RECORD_DTYPE
+    with pytest.raises(ValueError):
+        records["Close"][0] = 0.0
+
+
+def test_load_array_columns_are_views(tmp_path):
+    write_array(_klines("2024-01-01", 48), "BTCUSDT", "1h", 2024, str(tmp_path))
+    records = open_array("BTCUSDT", "1h", 2024, str(tmp_path))
+    df = records_to_df(records, columns=["Close", "Volume"])
+    assert list(df.columns) == ["Close", "Volume"]
+    assert np.shares_memory(df["Close"].to_numpy(), records)
+    assert np.shares_memory(df["Volume"].to_numpy(), records)
+
+
+def test_export_arrays(tmp_path):
+    df = _klines("2023-12-31", 48)
+    write_klines(df, "BTCUSDT", "1h", str(tmp_path / "store"))
+    paths = export_arrays("BTCUSDT", "1h", str(tmp_path / "store"), str(tmp_path / "arrays"))
+    assert paths == [array_path("BTCUSDT", "1h", year, str(tmp_path / "arrays")) for year in (2023, 2024)]
+    pd.testing.assert_frame_equal(load_array("BTCUSDT", "1h", 2024, root=str(tmp_path / "arrays")), df.iloc[24:])
@@ -1,22 +1,20 @@
-import requests
+from http_client import HttpClient, AsyncHttpClient
 
 
 BASE_URL = "https://api.kraken.com/0/public/"
 HEADERS = {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/56.0.2924.87 Safari/537.36", "Accept": "application/json"}
+CLIENT = HttpClient(BASE_URL, HEADERS)
+ASYNC_CLIENT = AsyncHttpClient(BASE_URL, HEADERS)
 
 
 def get_system_status() -> dict:
     """Get the system status or trading mode."""
-    response = requests.get(url=BASE_URL + "SystemStatus", headers=HEADERS, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    return CLIENT.get("SystemStatus").json()
 
 
 def get_server_time() -> dict:
     """Get the server time."""
-    response = requests.get(url=BASE_URL + "Time", headers=HEADERS, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    return CLIENT.get("Time").json()
 
 
 def get_asset_info(asset: str | None = None, asset_class: str = "currency") -> dict:
@@ -24,13 +22,7 @@ def get_asset_info(asset: str | None = None, asset_class: str = "currency") -> d
     asset : string (optional, default: all available assets). Example: XBT,ETH
     asset_class : string (optional, default: currency)
     """
-    params = {"aclass": asset_class}
-    if asset:
-        params["asset"] = asset
-
-    response = requests.get(url=BASE_URL + "Assets", headers=HEADERS, params=params, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    return CLIENT.get("Assets", params=_asset_info_params(asset, asset_class)).json()
 
 
 def get_tradable_asset_pairs(pair: str | None = None, info: str = "info", country_code: str | None = None) -> dict:
@@ -39,21 +31,7 @@ def get_tradable_asset_pairs(pair: str | None = None, info: str = "info", countr
     info : string (optional, default: info) - Possible values: [info, leverage, fees, margin]
     country_code : string (optional) - Filter for response to only include pairs available in provided countries/regions. Example: US,TX,GB,CA
     """
-    possible_info = ["info", "leverage", "fees", "margin"]
-    if info not in possible_info:
-        raise ValueError(f"Invalid info value. Possible values: {possible_info}")
-
-    params = {"info": info}
-
-    if pair:
-        params["pair"] = pair
-
-    if country_code:
-        params["country_code"] = country_code
-
-    response = requests.get(url=BASE_URL + "AssetPairs", headers=HEADERS, params=params, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    return CLIENT.get("AssetPairs", params=_tradable_asset_pairs_params(pair, info, country_code)).json()
 
 
 def get_ticker_information(pair: str | None = None) -> dict:
@@ -65,13 +43,7 @@ def get_ticker_information(pair: str | None = None) -> dict:
 
     pair: string - Asset pair to get data for (optional, default: all tradeable exchange pairs) - Example: XBTUSD
     """
-    params = {}
-    if pair:
-        params["pair"] = pair
-
-    response = requests.get(url=BASE_URL + "Ticker", headers=HEADERS, params=params, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    return CLIENT.get("Ticker", params=_ticker_information_params(pair)).json()
 
 
 def get_ohlc_data(pair: str | None = None, interval: int = 60, since: int | None = None) -> dict:
@@ -84,6 +56,113 @@ def get_ohlc_data(pair: str | None = None, interval: int = 60, since: int | None
     interval: integer - Time frame interval in minutes (optional, default: 1) - Possible values: 1, 5, 15, 30, 60, 240, 1440, 10080, 21600
     since: integer - Return only data from this timestamp onwards (optional)
     """
+    return CLIENT.get("OHLC", params=_ohlc_data_params(pair, interval, since)).json()
+
+
+def get_order_book(pair: str, count: int = 100) -> dict:
+    """Returns level 2 (L2) order book, which describes the individual price levels in the book with aggregated order quantities at each level.
+    pair: string - Asset pair to get data for (required) - Example: XBTUSD
+    count: integer - Possible values: >= 1 and <= 500 - Default value: 100 - Maximum number of asks/bids
+    """
+    return CLIENT.get("Depth", params=_order_book_params(pair, count)).json()
+
+
+def get_recent_trades(pair: str, count: int = 1000, since: int | None = None) -> dict:
+    """Returns the last 1000 trades by default.
+    pair: string - Asset pair to get data for (required) - Example: XBTUSD
+    since: string - Return trade data since given timestamp (optional) - Example: 1616663618
+    count: integer - Possible values: >= 1 and <= 1000 - Default value: 1000 - Return specific number of trades, up to 1000
+    """
+    return CLIENT.get("Trades", params=_recent_trades_params(pair, count, since)).json()
+
+
+def get_recent_spreads(pair: str, since: int | None = None) -> dict:
+    """Returns the last ~200 top-of-book spreads for a given pair.
+    pair: string - Asset pair to get data for (required) - Example: XBTUSD
+    since: integer - Returns spread data since given timestamp. Optional, intended for incremental updates within available dataset (does not contain all historical spreads).
+        * Example: 1678219570
+    """
+    return CLIENT.get("Spread", params=_recent_spreads_params(pair, since)).json()
+
+
+async def get_system_status_async() -> dict:
+    """Get the system status or trading mode."""
+    return await ASYNC_CLIENT.get_json("SystemStatus")
+
+
+async def get_server_time_async() -> dict:
+    """Get the server time."""
+    return await ASYNC_CLIENT.get_json("Time")
+
+
+async def get_asset_info_async(asset: str | None = None, asset_class: str = "currency") -> dict:
+    """Get information about the assets that are available for deposit, withdrawal, trading and earn."""
+    return await ASYNC_CLIENT.get_json("Assets", params=_asset_info_params(asset, asset_class))
+
+
+async def get_tradable_asset_pairs_async(pair: str | None = None, info: str = "info", country_code: str | None = None) -> dict:
+    """Get tradable asset pairs."""
+    return await ASYNC_CLIENT.get_json("AssetPairs", params=_tradable_asset_pairs_params(pair, info, country_code))
+
+
+async def get_ticker_information_async(pair: str | None = None) -> dict:
+    """Get ticker information for all or requested markets."""
+    return await ASYNC_CLIENT.get_json("Ticker", params=_ticker_information_params(pair))
+
+
+async def get_ohlc_data_async(pair: str | None = None, interval: int = 60, since: int | None = None) -> dict:
+    """Retrieve OHLC market data."""
+    return await ASYNC_CLIENT.get_json("OHLC", params=_ohlc_data_params(pair, interval, since))
+
+
+async def get_order_book_async(pair: str, count: int = 100) -> dict:
+    """Returns level 2 (L2) order book, which describes the individual price levels in the book with aggregated order quantities at each level."""
+    return await ASYNC_CLIENT.get_json("Depth", params=_order_book_params(pair, count))
+
+
+async def get_recent_trades_async(pair: str, count: int = 1000, since: int | None = None) -> dict:
+    """Returns the last 1000 trades by default."""
+    return await ASYNC_CLIENT.get_json("Trades", params=_recent_trades_params(pair, count, since))
+
+
+async def get_recent_spreads_async(pair: str, since: int | None = None) -> dict:
+    """Returns the last ~200 top-of-book spreads for a given pair."""
+    return await ASYNC_CLIENT.get_json("Spread", params=_recent_spreads_params(pair, since))
+
+
+def _asset_info_params(asset: str | None, asset_class: str) -> dict:
+    params = {"aclass": asset_class}
+    if asset:
+        params["asset"] = asset
+
+    return params
+
+
+def _tradable_asset_pairs_params(pair: str | None, info: str, country_code: str | None) -> dict:
+    possible_info = ["info", "leverage", "fees", "margin"]
+    if info not in possible_info:
+        raise ValueError(f"Invalid info value. Possible values: {possible_info}")
+
+    params = {"info": info}
+
+    if pair:
+        params["pair"] = pair
+
+    if country_code:
+        params["country_code"] = country_code
+
+    return params
+
+
+def _ticker_information_params(pair: str | None) -> dict:
+    params = {}
+    if pair:
+        params["pair"] = pair
+
+    return params
+
+
+def _ohlc_data_params(pair: str | None, interval: int, since: int | None) -> dict:
     possible_intervals = [1, 5, 15, 30, 60, 240, 1440, 10080, 21600]
     if interval not in possible_intervals:
         raise ValueError(f"Invalid interval value. Possible values: {possible_intervals}")
@@ -98,32 +177,17 @@ def get_ohlc_data(pair: str | None = None, interval: int = 60, since: int | None
 
     params["interval"] = interval
 
-    response = requests.get(url=BASE_URL + "OHLC", headers=HEADERS, params=params, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    return params
 
 
-def get_order_book(pair: str, count: int = 100) -> dict:
-    """Returns level 2 (L2) order book, which describes the individual price levels in the book with aggregated order quantities at each level.
-    pair: string - Asset pair to get data for (required) - Example: XBTUSD
-    count: integer - Possible values: >= 1 and <= 500 - Default value: 100 - Maximum number of asks/bids
-    """
+def _order_book_params(pair: str, count: int) -> dict:
     if count < 1 or count > 500:
         raise ValueError("Count must be between 1 and 500")
 
-    params = {"pair": pair, "count": count}
+    return {"pair": pair, "count": count}
 
-    response = requests.get(url=BASE_URL + "Depth", headers=HEADERS, params=params, timeout=10)
-    response.raise_for_status()
-    return response.json()
 
-
-def get_recent_trades(pair: str, count: int = 1000, since: int | None = None) -> dict:
-    """Returns the last 1000 trades by default.
-    pair: string - Asset pair to get data for (required) - Example: XBTUSD
-    since: string - Return trade data since given timestamp (optional) - Example: 1616663618
-    count: integer - Possible values: >= 1 and <= 1000 - Default value: 1000 - Return specific number of trades, up to 1000
-    """
+def _recent_trades_params(pair: str, count: int, since: int | None) -> dict:
     if count < 1 or count > 1000:
         raise ValueError("Count must be between 1 and 1000")
 
@@ -132,23 +196,14 @@ def get_recent_trades(pair: str, count: int = 1000, since: int | None = None) ->
     if since:
         params["since"] = since
 
-    response = requests.get(url=BASE_URL + "Trades", headers=HEADERS, params=params, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    return params
 
 
-def get_recent_spreads(pair: str, since: int | None = None) -> dict:
-    """Returns the last ~200 top-of-book spreads for a given pair.
-    pair: string - Asset pair to get data for (required) - Example: XBTUSD
-    since: integer - Returns spread data since given timestamp. Optional, intended for incremental updates within available dataset (does not contain all historical spreads).
-        * Example: 1678219570
-    """
+def _recent_spreads_params(pair: str, since: int | None) -> dict:
     params = {}
     params["pair"] = pair
 
     if since:
         params["since"] = since
 
-    response = requests.get(url=BASE_URL + "Spread", headers=HEADERS, params=params, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    return params
@@ -1,4 +1,8 @@
+from functools import partial
+
 import pytest
+from aiohttp import ClientResponseError
+from aioresponses import aioresponses
 from requests import HTTPError
 
 from kraken import (
@@ -11,7 +15,18 @@ from kraken import (
     get_order_book,
     get_recent_trades,
     get_recent_spreads,
+    get_system_status_async,
+    get_server_time_async,
+    get_asset_info_async,
+    get_tradable_asset_pairs_async,
+    get_ticker_information_async,
+    get_ohlc_data_async,
+    get_order_book_async,
+    get_recent_trades_async,
+    get_recent_spreads_async,
+    ASYNC_CLIENT,
 )
+from testing import run_closing
 
 
 HEADERS = {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/56.0.2924.87 Safari/537.36", "Accept-Encoding": "gzip, deflate", "Accept": "application/json", "Connection": "keep-alive"}
@@ -341,3 +356,49 @@ class TestGetRecentSpreads:
         assert requests_mock.last_request.url == self.URL + "?pair=BTC%2FUSD"
         assert requests_mock.last_request.method == "GET"
         assert requests_mock.last_request.headers == HEADERS
+
+
+_run = partial(run_closing, client=ASYNC_CLIENT)
+
+
+class TestAsyncRestFunctions:
+    URL = "https://api.kraken.com/0/public/"
+
+    @pytest.mark.parametrize(
+        ("func", "args", "expected_url"),
+        (
+            pytest.param(get_system_status_async, (), f"{URL}SystemStatus", id="get_system_status_async"),
+            pytest.param(get_server_time_async, (), f"{URL}Time", id="get_server_time_async"),
+            pytest.param(get_asset_info_async, ("XBT,ETH",), f"{URL}Assets?aclass=currency&asset=XBT,ETH", id="get_asset_info_async"),
+            pytest.param(get_tradable_asset_pairs_async, ("XBTUSD", "fees"), f"{URL}AssetPairs?info=fees&pair=XBTUSD", id="get_tradable_asset_pairs_async"),
+            pytest.param(get_ticker_information_async, ("XBTUSD",), f"{URL}Ticker?pair=XBTUSD", id="get_ticker_information_async"),
+            pytest.param(get_ohlc_data_async, ("XBTUSD", 15, 1616663618), f"{URL}OHLC?pair=XBTUSD&since=1616663618&interval=15", id="get_ohlc_data_async"),
+            pytest.param(get_order_book_async, ("XBTUSD", 10), f"{URL}Depth?pair=XBTUSD&count=10", id="get_order_book_async"),
+            pytest.param(get_recent_trades_async, ("XBTUSD",), f"{URL}Trades?pair=XBTUSD&count=1000", id="get_recent_trades_async"),
+            pytest.param(get_recent_spreads_async, ("XBTUSD", 1678219570), f"{URL}Spread?pair=XBTUSD&since=1678219570", id="get_recent_spreads_async"),
+        ),
+    )
+    def test_async_function(self, func, args, expected_url):
+        with aioresponses() as mocked:
+            mocked.get(expected_url, payload={"error": [], "result": {}})
+            assert _run(func(*args)) == {"error": [], "result": {}}
+            mocked.assert_called_once()
+
+    def test_async_function_http_failure(self):
+        with aioresponses() as mocked:
+            mocked.get(f"{self.URL}Time", status=500)
+            with pytest.raises(ClientResponseError):
+                _run(get_server_time_async())
+
+    @pytest.mark.parametrize(
+        ("func", "args", "kwargs"),
+        (
+            pytest.param(get_tradable_asset_pairs_async, (), {"info": "invalid"}, id="invalid info"),
+            pytest.param(get_ohlc_data_async, ("XBTUSD",), {"interval": 2}, id="invalid interval"),
+            pytest.param(get_order_book_async, ("XBTUSD",), {"count": 501}, id="invalid order book count"),
+            pytest.param(get_recent_trades_async, ("XBTUSD",), {"count": 0}, id="invalid trades count"),
+        ),
+    )
+    def test_async_function_validation(self, func, args, kwargs):
+        with pytest.raises(ValueError):
+            _run(func(*args, **kwargs))
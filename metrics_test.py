@@ -0,0 +1,62 @@
+import pytest
+
+from metrics import Counter, Gauge, Histogram, MetricsRegistry
+
+
+def test_counter():
+    counter = Counter()
+    counter.inc()
+    counter.inc(4)
+    assert counter.value == 5
+    assert counter.rate() > 0
+    assert counter.rate() == 0
+
+
+def test_gauge():
+    gauge = Gauge()
+    gauge.set(3)
+    assert gauge.value == 3
+    assert Gauge(lambda: 7).value == 7
+
+
+def test_histogram():
+    histogram = Histogram()
+    assert histogram.quantile(0.5) is None
+    assert histogram.snapshot() == {"count": 0}
+    for value in range(1, 101):
+        histogram.observe(float(value))
+    assert (histogram.count, histogram.min, histogram.max, histogram.mean()) == (100, 1.0, 100.0, 50.5)
+    # quantiles are bucket upper bounds, within one bucket of the exact value
+    assert 50 <= histogram.quantile(0.5) < 50 * 2**0.25
+    assert 99 <= histogram.quantile(0.99) <= 100
+    assert histogram.quantile(1.0) == 100
+    assert histogram.quantile(0.0) == 1.0
+    histogram.reset()
+    assert histogram.count == 0
+
+
+def test_histogram_out_of_bounds():
+    histogram = Histogram()
+    histogram.observe(-5.0)
+    histogram.observe(1e9)
+    assert histogram.quantile(0.0) == -5.0
+    assert histogram.quantile(1.0) == 1e9
+
+
+def test_registry():
+    registry = MetricsRegistry()
+    counter = registry.counter("messages", stream="a@trade")
+    assert registry.counter("messages", stream="a@trade") is counter
+    assert registry.counter("messages", stream="b@trade") is not counter
+    counter.inc()
+    registry.gauge("depth", lambda: 2, stream="a@trade")
+    registry.histogram("latency", stream="a@trade", stage="x").observe(1.0)
+    assert registry.snapshot("messages") == [{"name": "messages", "labels": {"stream": "a@trade"}, "value": 1}, {"name": "messages", "labels": {"stream": "b@trade"}, "value": 0}]
+    assert registry.snapshot("depth")[0]["value"] == 2
+    assert registry.snapshot("latency")[0]["count"] == 1
+    with pytest.raises(TypeError):
+        registry.histogram("messages", stream="a@trade")
+    registry.remove("depth", stream="a@trade")
+    assert registry.snapshot("depth") == []
+    registry.clear()
+    assert registry.snapshot() == []
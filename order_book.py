@@ -0,0 +1,269 @@
+"""Local Binance order book maintained from a REST depth snapshot and the <symbol>@depth@100ms diff stream.
+
+Each side of the book is a pair of NumPy arrays (prices, quantities) sorted from best to worst price, so reading
+the best level or the n-th level is O(1) and cumulative size queries are a binary search over a cached cumulative
+sum. A diff update is merged into a side in one compiled pass that rewrites its arrays once, however many levels
+the update changes, adds or removes.
+"""
+
+import asyncio
+import logging
+from time import monotonic
+from typing import AsyncIterator
+
+import msgspec
+import numpy as np
+from numba import njit
+
+from binance import get_order_book_async
+from binance_stream import QUEUE_SIZE, StreamMultiplexer, Subscription, shared_multiplexer, stream_name
+
+
+SNAPSHOT_LIMIT = 1000  # request weight 50, against 250 for up to 5000 levels
+RESYNC_DELAY = 1.0
+MAX_RESYNC_DELAY = 60.0
+
+
+class DepthUpdate(msgspec.Struct, frozen=True, gc=False):
+    """Stream Name: <symbol>@depth@100ms. Levels are (price, quantity) pairs, a zero quantity removes the level."""
+
+    event_time: int = msgspec.field(name="E")
+    symbol: str = msgspec.field(name="s")
+    first_update_id: int = msgspec.field(name="U")
+    final_update_id: int = msgspec.field(name="u")
+    bids: list[tuple[float, float]] = msgspec.field(name="b")
+    asks: list[tuple[float, float]] = msgspec.field(name="a")
+
+
+DEPTH_UPDATE_DECODER = msgspec.json.Decoder(DepthUpdate, strict=False)
+
+
+class OrderBookGapError(Exception):
+    """A diff update does not follow the last applied one, the book has to be resynced from a snapshot."""
+
+
+class OrderBookSide:
+    """Price levels of one side of a book, sorted from best to worst price.
+
+    Levels are kept in two parallel float64 arrays; bids are sorted by descending and asks by ascending price.
+    """
+
+    def __init__(self, descending: bool):
+        self.descending = descending
+        self._keys = np.empty(0, dtype=np.float64)
+        self._quantities = np.empty(0, dtype=np.float64)
+        self._cumulative_quantities = None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @property
+    def prices(self) -> np.ndarray:
+        return -self._keys if self.descending else self._keys.copy()
+
+    @property
+    def quantities(self) -> np.ndarray:
+        """Read-only view of the level quantities, best level first."""
+        quantities = self._quantities.view()
+        quantities.flags.writeable = False
+        return quantities
+
+    def set(self, levels: np.ndarray):
+        """Replace every level with an (n, 2) array of (price, quantity) rows."""
+        levels = np.asarray(levels, dtype=np.float64).reshape(-1, 2)
+        levels = levels[levels[:, 1] > 0]
+        keys = self._to_keys(levels[:, 0])
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self._quantities = levels[order, 1].copy()
+        self._cumulative_quantities = None
+
+    def update(self, levels: np.ndarray):
+        """Apply an (n, 2) array of (price, quantity) rows holding the new absolute quantity of each price.
+        A zero quantity removes the level."""
+        levels = np.asarray(levels, dtype=np.float64).reshape(-1, 2)
+        if not len(levels):
+            return
+        keys = self._to_keys(levels[:, 0])
+        order = np.argsort(keys, kind="stable")
+        self._keys, self._quantities = _merge_levels(self._keys, self._quantities, keys[order], levels[order, 1])
+        self._cumulative_quantities = None
+
+    def best(self) -> tuple[float, float] | None:
+        """(price, quantity) of the best level, None if the side is empty."""
+        return self.level(0) if len(self._keys) else None
+
+    def level(self, n: int) -> tuple[float, float]:
+        """(price, quantity) of the n-th best level, starting at 0."""
+        return float(self._to_prices(self._keys[n])), float(self._quantities[n])
+
+    def depth(self, n: int) -> np.ndarray:
+        """(price, quantity) rows of the n best levels."""
+        return np.column_stack((self._to_prices(self._keys[:n]), self._quantities[:n]))
+
+    def cumulative_quantity(self, price: float) -> float:
+        """Total quantity of the levels at price or better."""
+        end = np.searchsorted(self._keys, self._to_keys(price), side="right")
+        return float(self._cumulative()[end - 1]) if end else 0.0
+
+    def price_for_quantity(self, quantity: float) -> float | None:
+        """Worst price reached when taking quantity from the best levels, None if the side holds less."""
+        index = np.searchsorted(self._cumulative(), quantity)
+        return float(self._to_prices(self._keys[index])) if index < len(self._keys) else None
+
+    def _cumulative(self) -> np.ndarray:
+        if self._cumulative_quantities is None:
+            self._cumulative_quantities = np.cumsum(self._quantities)
+        return self._cumulative_quantities
+
+    def _to_keys(self, prices):
+        return -prices if self.descending else prices
+
+    _to_prices = _to_keys
+
+
+@njit(cache=True)
+def _merge_levels(keys: np.ndarray, quantities: np.ndarray, update_keys: np.ndarray, update_quantities: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Merge sorted update levels into sorted levels. The last update of a repeated key wins, a zero quantity removes the level."""
+    n, m = keys.shape[0], update_keys.shape[0]
+    merged_keys = np.empty(n + m)
+    merged_quantities = np.empty(n + m)
+    i = j = k = 0
+    while j < m:
+        key, quantity = update_keys[j], update_quantities[j]
+        j += 1
+        while j < m and update_keys[j] == key:
+            quantity = update_quantities[j]
+            j += 1
+        # the unchanged levels before the updated one are copied as a block
+        end = np.searchsorted(keys, key)
+        _copy_levels(keys, quantities, i, end, merged_keys, merged_quantities, k - i)
+        k += end - i
+        i = end + 1 if end < n and keys[end] == key else end
+        if quantity > 0:
+            merged_keys[k] = key
+            merged_quantities[k] = quantity
+            k += 1
+    _copy_levels(keys, quantities, i, n, merged_keys, merged_quantities, k - i)
+    k += n - i
+    return merged_keys[:k], merged_quantities[:k]
+
+
+@njit(cache=True, inline="always")
+def _copy_levels(keys: np.ndarray, quantities: np.ndarray, start: int, end: int, merged_keys: np.ndarray, merged_quantities: np.ndarray, shift: int):
+    for i in range(start, end):
+        merged_keys[i + shift] = keys[i]
+        merged_quantities[i + shift] = quantities[i]
+
+
+class OrderBook:
+    """Order book of a symbol, updated with apply_snapshot and apply_update."""
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids = OrderBookSide(descending=True)
+        self.asks = OrderBookSide(descending=False)
+        self.last_update_id: int | None = None
+        self.event_time: int | None = None
+
+    def apply_snapshot(self, snapshot: dict):
+        """Reset the book from a get_order_book payload."""
+        self.bids.set(np.array(snapshot["bids"], dtype=np.float64))
+        self.asks.set(np.array(snapshot["asks"], dtype=np.float64))
+        self.last_update_id = snapshot["lastUpdateId"]
+        self.event_time = None
+
+    def apply_update(self, update: DepthUpdate) -> bool:
+        """Apply a diff update. Returns False for an update already contained in the book and raises
+        OrderBookGapError if updates are missing between the book and this one."""
+        if self.last_update_id is None:
+            raise OrderBookGapError(f"{self.symbol} order book has no snapshot")
+        if update.final_update_id <= self.last_update_id:
+            return False
+        if not update.first_update_id <= self.last_update_id + 1:
+            raise OrderBookGapError(f"{self.symbol} order book at update {self.last_update_id} received updates {update.first_update_id}-{update.final_update_id}")
+        self.bids.update(np.array(update.bids, dtype=np.float64))
+        self.asks.update(np.array(update.asks, dtype=np.float64))
+        self.last_update_id = update.final_update_id
+        self.event_time = update.event_time
+        return True
+
+    def best_bid(self) -> tuple[float, float] | None:
+        return self.bids.best()
+
+    def best_ask(self) -> tuple[float, float] | None:
+        return self.asks.best()
+
+    def mid_price(self) -> float | None:
+        if not len(self.bids) or not len(self.asks):
+            return None
+        return (self.bids.level(0)[0] + self.asks.level(0)[0]) / 2
+
+    def spread(self) -> float | None:
+        if not len(self.bids) or not len(self.asks):
+            return None
+        return self.asks.level(0)[0] - self.bids.level(0)[0]
+
+
+async def order_book_stream(
+    symbol: str,
+    multiplexer: StreamMultiplexer | None = None,
+    snapshot_limit: int = SNAPSHOT_LIMIT,
+    maxsize: int = QUEUE_SIZE,
+) -> AsyncIterator[OrderBook]:
+    """Yield the local order book of a symbol every time a diff update has been applied to it.
+
+    The same OrderBook object is yielded every time. Updates are buffered while the REST snapshot is fetched,
+    and the book is resynced from a new snapshot when an update is missing or the stream reconnects. Resyncs after
+    missing updates wait RESYNC_DELAY seconds, doubled up to MAX_RESYNC_DELAY every time the book falls out of sync
+    again within MAX_RESYNC_DELAY seconds of its snapshot, so a feed that keeps dropping updates does not spend the
+    request weight on snapshots.
+
+    snapshot_limit : integer - Levels of the REST snapshot: the book only knows the levels it has been sent since.
+    maxsize : integer - Updates waiting for the consumer in a "drop_oldest" Subscription. A consumer too slow to keep
+        up never holds back the connection: the updates it lost show as a gap and the book is resynced.
+
+    Usage:
+        async for book in order_book_stream("BTCUSDT"):
+            print(book.best_bid(), book.best_ask(), book.asks.price_for_quantity(10))
+    """
+    subscription = Subscription(maxsize, "drop_oldest")
+    if multiplexer is None:
+        multiplexer = shared_multiplexer()
+    streams = [stream_name(symbol, "depth@100ms")]
+    book = OrderBook(symbol)
+
+    def handler(stream, update):
+        subscription.put(stream, update)
+
+    def on_reconnect():
+        subscription.put(streams[0], None)
+
+    try:
+        await multiplexer.subscribe(streams, handler, DEPTH_UPDATE_DECODER, on_reconnect)
+        retry = None
+        delay = resync_delay = 0.0
+        while True:
+            if delay:
+                await asyncio.sleep(delay)
+            book.apply_snapshot(await get_order_book_async(symbol, snapshot_limit))
+            synced_at = monotonic()
+            while True:
+                update, retry = (retry, None) if retry is not None else (await subscription.get(), None)
+                if update is None:
+                    logging.warning("Resyncing %s order book after a reconnection", symbol)
+                    delay = 0.0
+                    break
+                try:
+                    applied = book.apply_update(update)
+                except OrderBookGapError as e:
+                    recent = monotonic() - synced_at < MAX_RESYNC_DELAY
+                    delay = resync_delay = min(resync_delay * 2, MAX_RESYNC_DELAY) if recent and resync_delay else RESYNC_DELAY
+                    # the update may be newer than the next snapshot, it is applied again after the resync
+                    logging.warning("Resyncing %s order book in %s s: %s", symbol, delay, e)
+                    retry = update
+                    break
+                if applied:
+                    yield book
+    finally:
+        await multiplexer.unsubscribe(streams, handler)
@@ -0,0 +1,261 @@
+import asyncio
+
+import pytest
+import numpy as np
+
+from order_book import SNAPSHOT_LIMIT, DepthUpdate, DEPTH_UPDATE_DECODER, OrderBook, OrderBookGapError, OrderBookSide, order_book_stream
+from binance_stream import StreamMultiplexer
+from testing import run_with_fake_binance, until
+
+
+SNAPSHOT = {
+    "lastUpdateId": 100,
+    "bids": [["4.00000000", "431.00000000"], ["3.90000000", "10.00000000"], ["3.80000000", "5.00000000"]],
+    "asks": [["4.10000000", "12.00000000"], ["4.20000000", "3.00000000"], ["4.30000000", "8.00000000"]],
+}
+
+
+def _update(first_update_id, final_update_id, bids=(), asks=()):
+    return DepthUpdate(event_time=1672515782136, symbol="BNBBTC", first_update_id=first_update_id, final_update_id=final_update_id, bids=list(bids), asks=list(asks))
+
+
+def _book():
+    book = OrderBook("BNBBTC")
+    book.apply_snapshot(SNAPSHOT)
+    return book
+
+
+class TestOrderBookSide:
+
+    def test_set_sorts_best_first(self):
+        bids, asks = OrderBookSide(descending=True), OrderBookSide(descending=False)
+        levels = np.array([[3.9, 1.0], [4.0, 2.0], [3.8, 3.0]])
+        bids.set(levels)
+        asks.set(levels)
+        assert bids.prices.tolist() == [4.0, 3.9, 3.8]
+        assert bids.quantities.tolist() == [2.0, 1.0, 3.0]
+        assert asks.prices.tolist() == [3.8, 3.9, 4.0]
+        assert asks.best() == (3.8, 3.0)
+
+    def test_update_changes_adds_and_removes_levels(self):
+        bids = OrderBookSide(descending=True)
+        bids.set(np.array([[4.0, 2.0], [3.9, 1.0], [3.8, 3.0]]))
+        bids.update(np.array([[3.9, 0.0], [3.95, 4.0], [4.0, 2.5], [3.7, 1.0], [4.1, 0.5], [3.6, 0.0]]))
+        assert bids.prices.tolist() == [4.1, 4.0, 3.95, 3.8, 3.7]
+        assert bids.quantities.tolist() == [0.5, 2.5, 4.0, 3.0, 1.0]
+
+    def test_update_matches_a_sorted_dict_reference(self):
+        rng = np.random.default_rng(0)
+        asks = OrderBookSide(descending=False)
+        reference = {}
+        for _ in range(200):
+            prices = rng.choice(np.round(np.arange(100, 101, 0.01), 2), size=20, replace=False)
+            quantities = np.where(rng.random(20) < 0.3, 0.0, rng.integers(1, 100, 20).astype(float))
+            asks.update(np.column_stack((prices, quantities)))
+            for price, quantity in zip(prices, quantities):
+                if quantity:
+                    reference[price] = quantity
+                else:
+                    reference.pop(price, None)
+        assert asks.prices.tolist() == sorted(reference)
+        assert asks.quantities.tolist() == [reference[price] for price in sorted(reference)]
+
+    def test_update_with_a_repeated_price_keeps_the_last_quantity(self):
+        asks = OrderBookSide(descending=False)
+        asks.set(np.array([[4.1, 1.0], [4.2, 2.0]]))
+        asks.update(np.array([[4.3, 1.0], [4.1, 0.0], [4.3, 3.0], [4.0, 5.0], [4.0, 0.0], [4.1, 7.0]]))
+        assert asks.prices.tolist() == [4.1, 4.2, 4.3]
+        assert asks.quantities.tolist() == [7.0, 2.0, 3.0]
+
+    def test_queries(self):
+        asks = OrderBookSide(descending=False)
+        asks.set(np.array([[4.1, 12.0], [4.2, 3.0], [4.3, 8.0]]))
+        assert asks.level(1) == (4.2, 3.0)
+        assert asks.depth(2).tolist() == [[4.1, 12.0], [4.2, 3.0]]
+        assert asks.cumulative_quantity(4.25) == 15.0
+        assert asks.cumulative_quantity(4.3) == 23.0
+        assert asks.cumulative_quantity(4.0) == 0.0
+        assert asks.price_for_quantity(12.0) == 4.1
+        assert asks.price_for_quantity(13.0) == 4.2
+        assert asks.price_for_quantity(24.0) is None
+
+    def test_cumulative_quantity_after_update(self):
+        bids = OrderBookSide(descending=True)
+        bids.set(np.array([[4.0, 2.0], [3.9, 1.0]]))
+        assert bids.cumulative_quantity(3.9) == 3.0
+        bids.update(np.array([[3.95, 4.0]]))
+        assert bids.cumulative_quantity(3.9) == 7.0
+        assert bids.cumulative_quantity(3.95) == 6.0
+
+    def test_empty_side(self):
+        side = OrderBookSide(descending=True)
+        side.update(np.empty((0, 2)))
+        assert side.best() is None
+        assert len(side) == 0
+        assert side.price_for_quantity(1.0) is None
+
+    def test_quantities_are_read_only(self):
+        side = OrderBookSide(descending=False)
+        side.set(np.array([[1.0, 1.0]]))
+        with pytest.raises(ValueError):
+            side.quantities[0] = 2.0
+
+
+class TestOrderBook:
+
+    def test_apply_snapshot(self):
+        book = _book()
+        assert book.last_update_id == 100
+        assert book.best_bid() == (4.0, 431.0)
+        assert book.best_ask() == (4.1, 12.0)
+        assert book.spread() == pytest.approx(0.1)
+        assert book.mid_price() == pytest.approx(4.05)
+
+    def test_apply_update(self):
+        book = _book()
+        assert book.apply_update(_update(95, 101, bids=[(4.0, 0.0), (4.05, 1.0)], asks=[(4.1, 2.0)]))
+        assert book.last_update_id == 101
+        assert book.best_bid() == (4.05, 1.0)
+        assert book.best_ask() == (4.1, 2.0)
+        assert book.apply_update(_update(102, 103, asks=[(4.1, 0.0)]))
+        assert book.best_ask() == (4.2, 3.0)
+
+    def test_stale_update_is_ignored(self):
+        book = _book()
+        assert not book.apply_update(_update(90, 100, bids=[(4.0, 0.0)]))
+        assert book.best_bid() == (4.0, 431.0)
+
+    def test_gap_raises(self):
+        book = _book()
+        with pytest.raises(OrderBookGapError):
+            book.apply_update(_update(102, 105))
+        assert book.last_update_id == 100
+
+    def test_update_without_snapshot_raises(self):
+        with pytest.raises(OrderBookGapError):
+            OrderBook("BNBBTC").apply_update(_update(1, 2))
+
+    def test_decode_depth_update(self):
+        message = b'{"e":"depthUpdate","E":1672515782136,"s":"BNBBTC","U":157,"u":160,"b":[["0.0024","10"]],"a":[["0.0026","100"]]}'
+        assert DEPTH_UPDATE_DECODER.decode(message) == DepthUpdate(1672515782136, "BNBBTC", 157, 160, [(0.0024, 10.0)], [(0.0026, 100.0)])
+
+
+def _depth_message(first_update_id, final_update_id, bids=(), asks=()):
+    return {"e": "depthUpdate", "E": 1672515782136, "s": "BNBBTC", "U": first_update_id, "u": final_update_id, "b": [[str(p), str(q)] for p, q in bids], "a": [[str(p), str(q)] for p, q in asks]}
+
+
+def test_order_book_stream_syncs_and_resyncs(monkeypatch):
+    monkeypatch.setattr("order_book.RESYNC_DELAY", 0.01)
+    snapshots = [SNAPSHOT, {"lastUpdateId": 110, "bids": [["5.0", "1.0"]], "asks": [["5.1", "1.0"]]}]
+    requests = []
+
+    async def get_order_book_async(symbol, limit):
+        requests.append((symbol, limit))
+        while len(requests) > 1 and not resync.is_set():
+            await asyncio.sleep(0.01)
+        return snapshots[len(requests) - 1]
+
+    monkeypatch.setattr("order_book.get_order_book_async", get_order_book_async)
+    resync = asyncio.Event()
+
+    async def test(binance, uri):
+        async with StreamMultiplexer(uri, control_messages_per_second=100) as multiplexer:
+            stream = order_book_stream("BNBBTC", multiplexer)
+            first = asyncio.ensure_future(anext(stream))
+            await until(lambda: any(binance.connections.values()))
+            assert binance.control_messages[0]["params"] == ["bnbbtc@depth@100ms"]
+            await binance.push("bnbbtc@depth@100ms", _depth_message(90, 99, bids=[(4.0, 1.0)]))
+            await binance.push("bnbbtc@depth@100ms", _depth_message(98, 101, bids=[(4.05, 2.0)]))
+            book = await first
+            assert book.last_update_id == 101
+            assert book.best_bid() == (4.05, 2.0)
+            assert book.bids.level(1) == (4.0, 431.0)
+
+            await binance.push("bnbbtc@depth@100ms", _depth_message(102, 102, asks=[(4.1, 0.0)]))
+            assert (await anext(stream)).best_ask() == (4.2, 3.0)
+
+            await binance.push("bnbbtc@depth@100ms", _depth_message(105, 111, asks=[(5.1, 2.0)]))
+            after_gap = asyncio.ensure_future(anext(stream))
+            await until(lambda: len(requests) == 2)
+            resync.set()
+            book = await after_gap
+            assert requests == [("BNBBTC", SNAPSHOT_LIMIT), ("BNBBTC", SNAPSHOT_LIMIT)]
+            assert book.last_update_id == 111
+            assert book.best_bid() == (5.0, 1.0)
+            assert book.best_ask() == (5.1, 2.0)
+            await stream.aclose()
+            assert multiplexer.streams == []
+
+    run_with_fake_binance(test)
+
+
+class _DirectMultiplexer:
+    """Calls the subscribed handler from the test, without a socket."""
+
+    async def subscribe(self, streams, handler, decoder=None, on_reconnect=None):
+        self.handler = handler
+
+    async def unsubscribe(self, streams, handler):
+        pass
+
+
+def test_order_book_stream_backs_off_repeated_resyncs(monkeypatch):
+    multiplexer = _DirectMultiplexer()
+    requests, delays = [], []
+    sleep = asyncio.sleep
+
+    async def get_order_book_async(symbol, limit):
+        requests.append(limit)
+        # the first three snapshots are followed by a gap, the fourth is recent enough
+        if len(requests) < 4:
+            multiplexer.handler("bnbbtc@depth@100ms", _update(200, 201))
+            return SNAPSHOT
+        multiplexer.handler("bnbbtc@depth@100ms", _update(301, 301))
+        return {**SNAPSHOT, "lastUpdateId": 300}
+
+    async def record_sleep(delay):
+        delays.append(delay)
+        await sleep(0)
+
+    monkeypatch.setattr("order_book.get_order_book_async", get_order_book_async)
+    monkeypatch.setattr("order_book.asyncio.sleep", record_sleep)
+
+    async def test():
+        stream = order_book_stream("BNBBTC", multiplexer)
+        book = await anext(stream)
+        await stream.aclose()
+        return book
+
+    book = asyncio.run(asyncio.wait_for(test(), 5))
+    assert book.last_update_id == 301
+    assert requests == [SNAPSHOT_LIMIT] * 4
+    assert delays == [1.0, 2.0, 4.0]
+
+
+def test_order_book_stream_resyncs_after_a_slow_consumer_lost_updates(monkeypatch):
+    multiplexer = _DirectMultiplexer()
+    requests = []
+
+    async def get_order_book_async(symbol, limit):
+        requests.append(limit)
+        if len(requests) == 1:
+            for update_id in (101, 102, 103):
+                multiplexer.handler("bnbbtc@depth@100ms", _update(update_id, update_id))
+            return SNAPSHOT
+        multiplexer.handler("bnbbtc@depth@100ms", _update(104, 104, asks=[(4.1, 1.0)]))
+        return {**SNAPSHOT, "lastUpdateId": 103}
+
+    monkeypatch.setattr("order_book.get_order_book_async", get_order_book_async)
+    monkeypatch.setattr("order_book.RESYNC_DELAY", 0.01)
+
+    async def test():
+        stream = order_book_stream("BNBBTC", multiplexer, maxsize=1)
+        book = await anext(stream)
+        await stream.aclose()
+        return book
+
+    book = asyncio.run(asyncio.wait_for(test(), 5))
+    # updates 101 and 102 were dropped, 103 did not follow the snapshot
+    assert len(requests) == 2
+    assert book.last_update_id == 104
+    assert book.best_ask() == (4.1, 1.0)
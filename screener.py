@@ -0,0 +1,163 @@
+"""Screen every USDT pair with the indicators of the btcusdt notebook.
+
+The klines of each symbol are cached in one csv file per symbol and interval:
+
+    cache/klines/screener/<SYMBOL>-<interval>.csv
+
+refresh_klines downloads the last lookback candles of the symbols without a cache file and brings the others up to
+date with update_klines, from a pool of threads since this is waiting on the network. screen then evaluates the
+rules over the cached files in a pool of processes, each worker loading its files itself so that only file paths
+and boolean results cross process boundaries, and returns one DataFrame with a row per symbol.
+
+Usage:
+    df = screen_usdt_pairs("1h")
+    df[df["macd"] & df["rsi"]].sort_values("priceChangePercent", ascending=False)
+"""
+
+import os
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+import requests
+
+from binance import get_24hr_ticker, get_exchange_info, get_klines, klines_to_df, load_klines, update_klines, write_new_cache
+from indicators import Indicators
+from kline_store import CACHE_DIR
+
+
+SCREENER_DIR = os.path.join(CACHE_DIR, "screener")
+SCREENER_LOOKBACK = 500
+SCREENER_DOWNLOAD_WORKERS = 8
+
+
+def notebook_signals(indicators: Indicators) -> dict[str, bool]:
+    """The indicators dict of the btcusdt notebook: True where the indicator is bullish on the last candle."""
+    close = indicators.close[-1]
+    fast_sma, slow_sma = indicators.sma(12).iloc[-1], indicators.sma(26).iloc[-1]
+    fast_ema, slow_ema = indicators.ema(12).iloc[-1], indicators.ema(26).iloc[-1]
+    macd = indicators.macd(12, 26, 9).iloc[-1]
+    psar_up = indicators.psar(0.02, 0.2)["up"]
+    return {
+        "fast_sma": bool(close > fast_sma),
+        "slow_sma": bool(close > slow_sma),
+        "sma_crossover": bool(fast_sma > slow_sma),
+        "fast_ema": bool(close > fast_ema),
+        "slow_ema": bool(close > slow_ema),
+        "ema_crossover": bool(fast_ema > slow_ema),
+        "macd": bool(macd["macd"] > macd["signal"]),
+        "psar": len(psar_up) > 1 and not pd.isna(psar_up.iloc[-2]),
+        "rsi": bool(indicators.rsi(14).iloc[-1] > 50),
+        "tsi": bool(indicators.tsi(25, 13).iloc[-1] > 0),
+    }
+
+
+def usdt_symbols(exchange_info: dict, quote_asset: str = "USDT") -> list[str]:
+    """Symbols of exchange_info trading against quote_asset."""
+    return [symbol["symbol"] for symbol in exchange_info["symbols"] if symbol["status"] == "TRADING" and symbol["quoteAsset"] == quote_asset]
+
+
+def screener_path(symbol: str, interval: str, directory: str = SCREENER_DIR) -> str:
+    return os.path.join(directory, f"{symbol}-{interval}.csv")
+
+
+def refresh_klines(
+    symbols: list[str],
+    interval: str = "1h",
+    directory: str = SCREENER_DIR,
+    lookback: int = SCREENER_LOOKBACK,
+    max_workers: int = SCREENER_DOWNLOAD_WORKERS,
+) -> dict[str, str]:
+    """Create or update the cache files of symbols. Returns {symbol: csv file path} of the symbols refreshed,
+    symbols whose download failed are logged and left out.
+
+    lookback : integer - Candles downloaded for a symbol without cache file (max 1000).
+    max_workers : integer - Symbols downloaded concurrently.
+    """
+
+    def refresh(symbol: str) -> str | None:
+        csv_filepath = screener_path(symbol, interval, directory)
+        try:
+            if os.path.exists(csv_filepath):
+                update_klines(csv_filepath, symbol, interval)
+            else:
+                df = klines_to_df(get_klines(symbol, interval, limit=lookback))
+                if df.empty:
+                    return None
+                write_new_cache(csv_filepath, df)
+        except requests.RequestException as e:
+            logging.warning("Could not refresh %s %s klines: %s", symbol, interval, e)
+            return None
+        return csv_filepath
+
+    if max_workers <= 1:
+        paths = map(refresh, symbols)
+        return {symbol: path for symbol, path in zip(symbols, paths) if path is not None}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        paths = executor.map(refresh, symbols)
+        return {symbol: path for symbol, path in zip(symbols, paths) if path is not None}
+
+
+def screen(
+    paths: dict[str, str],
+    rules: Callable[[Indicators], dict[str, bool]] = notebook_signals,
+    lookback: int = SCREENER_LOOKBACK,
+    processes: int | None = None,
+) -> pd.DataFrame:
+    """Evaluate rules on the last lookback candles of every cached symbol.
+    Returns a DataFrame indexed by symbol with the open time and close of the last candle, the number of candles
+    and a boolean column per rule.
+
+    paths : dict - {symbol: csv file path}, as returned by refresh_klines.
+    rules : callable - Maps the Indicators of a symbol to {name: bool}. Runs in the worker processes, so it must be
+        picklable: a module level function, not a lambda.
+    processes : integer (optional) - Worker processes, os.cpu_count() by default. With 1, rules run in this process.
+    """
+    symbols = list(paths)
+    tasks = [(paths[symbol], rules, lookback) for symbol in symbols]
+    processes = processes or os.cpu_count() or 1
+    if processes <= 1 or len(tasks) <= 1:
+        results = list(map(_screen_file, tasks))
+    else:
+        # workers fork from a server process that has imported this module, not from a possibly multi-threaded caller
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([__name__])
+        with ProcessPoolExecutor(max_workers=processes, mp_context=context) as executor:
+            results = list(executor.map(_screen_file, tasks, chunksize=max(len(tasks) // (processes * 4), 1)))
+    names = list(results[0][3]) if results else []
+    columns = {
+        "Open Time": pd.to_datetime([open_time for open_time, _, _, _ in results], utc=True),
+        "Close": np.array([close for _, close, _, _ in results], dtype=np.float64),
+        "Candles": np.array([candles for _, _, candles, _ in results], dtype=np.int64),
+    }
+    for name in names:
+        columns[name] = np.array([signals[name] for _, _, _, signals in results], dtype=bool)
+    return pd.DataFrame(columns, index=pd.Index(symbols, name="Symbol"))
+
+
+def screen_usdt_pairs(
+    interval: str = "1h",
+    rules: Callable[[Indicators], dict[str, bool]] = notebook_signals,
+    directory: str = SCREENER_DIR,
+    lookback: int = SCREENER_LOOKBACK,
+    max_workers: int = SCREENER_DOWNLOAD_WORKERS,
+    processes: int | None = None,
+) -> pd.DataFrame:
+    """Refresh and screen every trading USDT pair. The 24 hour priceChangePercent and quoteVolume of each symbol are
+    added to the screen columns and rows are sorted by quoteVolume, most traded first."""
+    ticker = {coin["symbol"]: coin for coin in get_24hr_ticker(request_type="FULL")}
+    symbols = [symbol for symbol in usdt_symbols(get_exchange_info()) if symbol in ticker]
+    df = screen(refresh_klines(symbols, interval, directory, lookback, max_workers), rules, lookback, processes)
+    df["priceChangePercent"] = [float(ticker[symbol]["priceChangePercent"]) for symbol in df.index]
+    df["quoteVolume"] = [float(ticker[symbol]["quoteVolume"]) for symbol in df.index]
+    return df.sort_values("quoteVolume", ascending=False)
+
+
+def _screen_file(task: tuple[str, Callable, int]) -> tuple[pd.Timestamp, float, int, dict[str, bool]]:
+    csv_filepath, rules, lookback = task
+    df = load_klines(csv_filepath).iloc[-lookback:]
+    return df.index[-1], float(df["Close"].iloc[-1]), len(df), rules(Indicators(df))
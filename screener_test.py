@@ -0,0 +1,117 @@
+import os
+import shutil
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from binance import klines_to_df, load_klines
+from testing import FrozenDatetime, hourly_klines
+from indicators import Indicators
+from kline_store import HISTORICAL_DIR
+from screener import notebook_signals, refresh_klines, screen, screen_usdt_pairs, screener_path, usdt_symbols
+
+
+KLINES_URL = "https://api.binance.com/api/v3/klines"
+EXCHANGE_INFO = {
+    "symbols": [
+        {"symbol": "BTCUSDT", "status": "TRADING", "quoteAsset": "USDT"},
+        {"symbol": "ETHUSDT", "status": "TRADING", "quoteAsset": "USDT"},
+        {"symbol": "ETHBTC", "status": "TRADING", "quoteAsset": "BTC"},
+        {"symbol": "LUNAUSDT", "status": "BREAK", "quoteAsset": "USDT"},
+    ]
+}
+
+
+@pytest.fixture
+def cached(tmp_path):
+    """Screener cache files copied from the historical 1h klines."""
+    paths = {}
+    for symbol, filename in (("BTCUSDT", "BTCUSDT-2023-1h.csv"), ("ETHUSDT", "ETHUSDT-2023-1h.csv"), ("BTCUSDT24", "BTCUSDT-2024-1h.csv")):
+        paths[symbol] = screener_path(symbol, "1h", str(tmp_path))
+        shutil.copy(os.path.join(HISTORICAL_DIR, filename), paths[symbol])
+    return paths
+
+
+def _rising(indicators):
+    return {"rising": bool(indicators.close[-1] > indicators.close[-2])}
+
+
+def test_usdt_symbols():
+    assert usdt_symbols(EXCHANGE_INFO) == ["BTCUSDT", "ETHUSDT"]
+    assert usdt_symbols(EXCHANGE_INFO, "BTC") == ["ETHBTC"]
+
+
+def test_notebook_signals():
+    df = load_klines(os.path.join(HISTORICAL_DIR, "BTCUSDT-2023-1h.csv"))
+    indicators = Indicators(df)
+    signals = notebook_signals(indicators)
+    assert list(signals) == ["fast_sma", "slow_sma", "sma_crossover", "fast_ema", "slow_ema", "ema_crossover", "macd", "psar", "rsi", "tsi"]
+    assert all(isinstance(value, bool) for value in signals.values())
+    assert signals["rsi"] == (indicators.rsi(14).iloc[-1] > 50)
+    assert signals["psar"] == (not np.isnan(indicators.psar()["up"].iloc[-2]))
+
+
+def test_screen_in_processes_matches_serial(cached):
+    serial = screen(cached, processes=1)
+    parallel = screen(cached, processes=2)
+    pd.testing.assert_frame_equal(parallel, serial)
+    assert serial.index.tolist() == ["BTCUSDT", "ETHUSDT", "BTCUSDT24"]
+    assert serial["Candles"].tolist() == [500, 500, 500]
+    expected = load_klines(cached["ETHUSDT"])
+    assert serial.loc["ETHUSDT", "Open Time"] == expected.index[-1]
+    assert serial.loc["ETHUSDT", "Close"] == expected["Close"].iloc[-1]
+    assert serial.loc["ETHUSDT", ["macd", "rsi"]].tolist() == [notebook_signals(Indicators(expected.iloc[-500:]))[name] for name in ("macd", "rsi")]
+
+
+def test_screen_custom_rules(cached):
+    df = screen(cached, _rising, lookback=10, processes=1)
+    assert df.columns.tolist() == ["Open Time", "Close", "Candles", "rising"]
+    assert df["Candles"].tolist() == [10, 10, 10]
+    assert df["rising"].dtype == bool
+
+
+def test_screen_nothing():
+    df = screen({})
+    assert df.empty
+    assert df.columns.tolist() == ["Open Time", "Close", "Candles"]
+
+
+@patch("binance.datetime", FrozenDatetime)
+def test_refresh_klines(tmp_path, requests_mock):
+    klines_to_df(hourly_klines(0, 3)).to_csv(screener_path("BTCUSDT", "1h", str(tmp_path)), index_label="Open Time")
+
+    def klines(request, context):
+        if request.qs["symbol"] == ["ethusdt"]:
+            assert request.qs["limit"] == ["24"]
+            return hourly_klines(0, 5)
+        if request.qs["symbol"] == ["btcusdt"]:
+            return hourly_klines(2, 3, close_offset=0.5)
+        context.status_code = 400
+        return {"code": -1121, "msg": "Invalid symbol."}
+
+    requests_mock.get(KLINES_URL, json=klines)
+    paths = refresh_klines(["BTCUSDT", "ETHUSDT", "XYZUSDT"], "1h", str(tmp_path), lookback=24, max_workers=3)
+    assert paths == {symbol: screener_path(symbol, "1h", str(tmp_path)) for symbol in ("BTCUSDT", "ETHUSDT")}
+    assert load_klines(paths["BTCUSDT"])["Close"].tolist() == [101.0, 102.0, 103.5, 104.5, 105.5]
+    assert len(load_klines(paths["ETHUSDT"])) == 5
+    assert not os.path.exists(screener_path("XYZUSDT", "1h", str(tmp_path)))
+
+
+def test_screen_usdt_pairs(tmp_path, requests_mock):
+    requests_mock.get("https://api.binance.com/api/v3/exchangeInfo", json=EXCHANGE_INFO)
+    requests_mock.get(
+        "https://api.binance.com/api/v3/ticker/24hr",
+        json=[
+            {"symbol": "BTCUSDT", "priceChangePercent": "1.5", "quoteVolume": "1000.0"},
+            {"symbol": "ETHUSDT", "priceChangePercent": "-2.0", "quoteVolume": "5000.0"},
+        ],
+    )
+    requests_mock.get(KLINES_URL, json=hourly_klines(0, 40))
+    df = screen_usdt_pairs("1h", directory=str(tmp_path), processes=1)
+    assert df.index.tolist() == ["ETHUSDT", "BTCUSDT"]
+    assert df["priceChangePercent"].tolist() == [-2.0, 1.5]
+    assert df["Candles"].tolist() == [40, 40]
+    # steadily rising closes
+    assert df["sma_crossover"].all() and df["rsi"].all()
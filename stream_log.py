@@ -0,0 +1,192 @@
+"""Record Binance stream messages to a compressed log and replay them offline.
+
+A log is a gzip file of lines "<receive time in microseconds>\t<stream name>\t<raw JSON payload>". Every recording
+session appends a new gzip member, so a log is only ever appended to and concatenated logs are still valid logs.
+
+ReplayMultiplexer plays a log back through the StreamMultiplexer interface, so the trades, klines and
+average_prices generators, order_book_stream, trade_bars and any handler written against a live multiplexer
+consume recorded traffic unchanged, at the recorded pace, N times faster, or as fast as they can.
+
+Usage:
+    await record_streams("btcusdt.log.gz", ["btcusdt@trade", "btcusdt@kline_1m"], duration=3600)
+
+    async with ReplayMultiplexer("btcusdt.log.gz", speed=None) as replay:
+        async for trade in trades("BTCUSDT", replay):
+            ...
+"""
+
+import gzip
+import zlib
+import time
+import asyncio
+import logging
+from typing import Iterator
+
+import msgspec
+
+from binance_stream import StreamMultiplexer, shared_multiplexer
+from metrics import REGISTRY, MetricsRegistry
+
+
+FLUSH_SIZE = 1000
+REPLAY_BATCH_SIZE = 100
+
+
+class _RawDecoder:
+    """Stands for a msgspec decoder and hands payloads to handlers as undecoded bytes."""
+
+    def decode(self, data: msgspec.Raw) -> bytes:
+        return bytes(data)
+
+
+RAW_DECODER = _RawDecoder()
+
+
+class StreamRecorder:
+    """Appends stream messages to a log. Lines are compressed and written every flush_size messages and on close.
+
+    Usage:
+        with StreamRecorder("btcusdt.log.gz") as recorder:
+            await recorder.subscribe(multiplexer, ["btcusdt@trade"])
+            await asyncio.sleep(60)
+    """
+
+    def __init__(self, path: str, flush_size: int = FLUSH_SIZE):
+        self.path = path
+        self.flush_size = flush_size
+        self.count = 0
+        self._lines: list[bytes] = []
+        self._file = gzip.open(path, "ab")
+        # one bound method object, so that the multiplexer recognises it on unsubscribe
+        self._handler = self._record_message
+
+    def record(self, stream: str, data: bytes | str, receive_time: int | None = None):
+        """Add a message. receive_time is in epoch microseconds, the current time if None."""
+        if receive_time is None:
+            receive_time = time.time_ns() // 1000
+        if isinstance(data, str):
+            data = data.encode()
+        # newlines can only be insignificant whitespace in JSON, string values have them escaped
+        self._lines.append(b"%d\t%s\t%s\n" % (receive_time, stream.encode(), data.replace(b"\n", b"")))
+        self.count += 1
+        if len(self._lines) >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        """Write the pending lines and flush the compressor, so that a crash loses nothing written so far."""
+        if self._lines:
+            self._file.write(b"".join(self._lines))
+            self._lines.clear()
+        self._file.flush()
+
+    async def subscribe(self, multiplexer: StreamMultiplexer, streams: list[str]):
+        """Record the messages of streams received by multiplexer."""
+        await multiplexer.subscribe(streams, self._handler, RAW_DECODER)
+
+    async def unsubscribe(self, multiplexer: StreamMultiplexer, streams: list[str]):
+        await multiplexer.unsubscribe(streams, self._handler)
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _record_message(self, stream: str, data: bytes):
+        self.record(stream, data)
+
+
+async def record_streams(path: str, streams: list[str], duration: float | None = None, multiplexer: StreamMultiplexer | None = None) -> int:
+    """Record streams to path for duration seconds, or until cancelled. Returns the number of recorded messages."""
+    if multiplexer is None:
+        multiplexer = shared_multiplexer()
+    with StreamRecorder(path) as recorder:
+        try:
+            await recorder.subscribe(multiplexer, streams)
+            await (asyncio.Event().wait() if duration is None else asyncio.sleep(duration))
+        finally:
+            await recorder.unsubscribe(multiplexer, streams)
+    return recorder.count
+
+
+def read_stream_log(path: str) -> Iterator[tuple[int, str, bytes]]:
+    """Yield the (receive time in microseconds, stream name, raw payload) of the messages of a log.
+    A log cut short by a crash is read up to its last complete line."""
+    with gzip.open(path, "rb") as file:
+        try:
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+                receive_time, stream, data = line[:-1].split(b"\t", 2)
+                yield int(receive_time), stream.decode(), data
+        except (EOFError, zlib.error, gzip.BadGzipFile) as e:
+            logging.warning("Stream log %s is truncated: %s", path, e)
+
+
+class ReplayMultiplexer(StreamMultiplexer):
+    """A StreamMultiplexer fed from a log instead of websocket connections.
+
+    Replay starts in the background when the first stream is subscribed, or when start is called, and delivers
+    the messages of subscribed streams in recorded order. Messages of streams nobody is subscribed to are skipped.
+
+    path : string - Log written by StreamRecorder.
+    speed : float (optional) - Replay speed relative to the recording, 1.0 is real time. None replays as fast as possible.
+    autostart : boolean - Start the replay on the first subscription.
+    metrics : MetricsRegistry (optional) - Registry of the stream metrics. exchange_to_socket is not recorded for replayed messages.
+    """
+
+    def __init__(self, path: str, speed: float | None = 1.0, autostart: bool = True, metrics: MetricsRegistry | None = REGISTRY):
+        super().__init__(uri=path, metrics=metrics)
+        if speed is not None and speed <= 0:
+            raise ValueError(f"Invalid speed: {speed}. The speed must be positive or None")
+        self.path = path
+        self.speed = speed
+        self.autostart = autostart
+        self.count = 0
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._replay())
+
+    async def wait(self) -> int:
+        """Wait until every message of the log has been delivered and return the number of delivered messages."""
+        self.start()
+        await asyncio.shield(self._task)
+        return self.count
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+        await super().close()
+
+    async def _subscribe(self, streams: list[str]):
+        if self.autostart:
+            self.start()
+
+    async def _unsubscribe(self, streams: list[str]):
+        pass
+
+    async def _replay(self):
+        start_time = None
+        handlers = self._handlers
+        for i, (receive_time, stream, data) in enumerate(read_stream_log(self.path)):
+            if self.speed is not None:
+                if start_time is None:
+                    start_time, start_clock = receive_time, time.monotonic()
+                delay = start_clock + (receive_time - start_time) / 1e6 / self.speed - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif i % REPLAY_BATCH_SIZE == 0:
+                # let consumers drain what was delivered so far
+                await asyncio.sleep(0)
+            if stream in handlers:
+                waiting = self._dispatch(stream, msgspec.Raw(data))
+                if waiting is not None:
+                    await waiting
+                self.count += 1
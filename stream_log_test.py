@@ -0,0 +1,104 @@
+import json
+import time
+import asyncio
+
+import pytest
+
+from binance_stream import StreamMultiplexer, trades, klines
+from testing import TRADE, KLINE, run_with_fake_binance, until
+from stream_log import StreamRecorder, ReplayMultiplexer, read_stream_log, record_streams
+
+
+KLINE_JSON = json.dumps(KLINE)
+
+
+def _write_log(path, messages):
+    with StreamRecorder(path) as recorder:
+        for receive_time, stream, data in messages:
+            recorder.record(stream, data, receive_time)
+
+
+def test_record_and_read(tmp_path):
+    path = str(tmp_path / "stream.log.gz")
+    _write_log(path, [(1, "bnbbtc@trade", '{"p": "0.001"}'), (2, "bnbbtc@kline_1m", b'{\n"x": true}')])
+    # a second session appends a new gzip member
+    _write_log(path, [(3, "bnbbtc@trade", b'{"p": "0.002"}')])
+    assert list(read_stream_log(path)) == [
+        (1, "bnbbtc@trade", b'{"p": "0.001"}'),
+        (2, "bnbbtc@kline_1m", b'{"x": true}'),
+        (3, "bnbbtc@trade", b'{"p": "0.002"}'),
+    ]
+
+
+def test_read_truncated_log(tmp_path):
+    path = str(tmp_path / "stream.log.gz")
+    recorder = StreamRecorder(path, flush_size=2)
+    for i in range(5):
+        recorder.record("bnbbtc@trade", b"{}", i)
+    # read before close, as after a crash: the last line was never written and the gzip trailer is missing
+    assert [receive_time for receive_time, _, _ in read_stream_log(path)] == [0, 1, 2, 3]
+    recorder.close()
+
+
+def test_record_streams_from_a_multiplexer(tmp_path):
+    path = str(tmp_path / "stream.log.gz")
+
+    async def test(binance, uri):
+        async with StreamMultiplexer(uri, control_messages_per_second=100) as multiplexer:
+            recording = asyncio.ensure_future(record_streams(path, ["bnbbtc@trade", "bnbbtc@kline_1m"], 0.5, multiplexer))
+            await until(lambda: binance.connections and len(next(iter(binance.connections.values()))) == 2)
+            await binance.push("bnbbtc@trade", TRADE)
+            await binance.push("bnbbtc@kline_1m", KLINE)
+            assert await recording == 2
+            assert multiplexer.streams == []
+
+    run_with_fake_binance(test)
+    messages = list(read_stream_log(path))
+    assert [stream for _, stream, _ in messages] == ["bnbbtc@trade", "bnbbtc@kline_1m"]
+    assert messages[0][0] <= messages[1][0]
+
+
+def test_replay_through_the_consumer_api(tmp_path):
+    path = str(tmp_path / "stream.log.gz")
+    _write_log(
+        path,
+        [(i, "bnbbtc@trade", f'{{"E": 1, "s": "BNBBTC", "t": {i}, "p": "0.00{i}", "q": "1", "T": 1, "m": true}}') for i in range(1, 4)]
+        + [(4, "bnbbtc@kline_1m", '{"e": "kline", "k": {"t": 0, "T": 59999, "s": "BNBBTC", "i": "1m", "f": 1, "L": 3, "o": "1", "c": "2", "h": "2", "l": "1", "v": "3", "n": 3, "x": true, "q": "3", "V": "1", "Q": "1"}}')],
+    )
+
+    async def test():
+        async with ReplayMultiplexer(path, speed=None) as replay:
+            stream = trades("BNBBTC", replay)
+            received = [await anext(stream) for _ in range(3)]
+            # the kline stream had no subscriber
+            assert await replay.wait() == 3
+            await stream.aclose()
+        assert [(trade.trade_id, trade.price) for trade in received] == [(1, 0.001), (2, 0.002), (3, 0.003)]
+
+    asyncio.run(asyncio.wait_for(test(), 10))
+
+
+@pytest.mark.parametrize("speed, expected", [(1.0, 0.3), (3.0, 0.1), (None, 0.0)])
+def test_replay_speed(tmp_path, speed, expected):
+    path = str(tmp_path / "stream.log.gz")
+    _write_log(path, [(1_000_000 + i * 100_000, "bnbbtc@kline_1m", KLINE_JSON) for i in range(4)])
+
+    async def test():
+        async with ReplayMultiplexer(path, speed=speed) as replay:
+            stream = klines("BNBBTC", "1m", replay)
+            first = asyncio.ensure_future(anext(stream))
+            await until(lambda: replay.streams)
+            start = time.monotonic()
+            await replay.wait()
+            elapsed = time.monotonic() - start
+            await first
+            await stream.aclose()
+        assert expected - 0.05 < elapsed < expected + 0.05
+
+    asyncio.run(asyncio.wait_for(test(), 10))
+
+
+def test_invalid_speed(tmp_path):
+    with pytest.raises(ValueError):
+        ReplayMultiplexer(str(tmp_path / "stream.log.gz"), speed=0)
+
@@ -0,0 +1,98 @@
+"""Parameter sweeps of backtest strategies over a process pool.
+
+The klines are published once as a record array file (see kline_store.df_to_records), on /dev/shm when the system
+has it, and every worker memory-maps that file when it starts, so the price history is shared through the page
+cache instead of being pickled to every task. Tasks only carry batches of parameter dicts, and results are yielded
+as each batch completes.
+
+Usage:
+    grid = [params for params in parameter_grid(window_fast=range(5, 30), window_slow=range(20, 100, 5)) if params["window_fast"] < params["window_slow"]]
+    for result in sweep(df, sma_crossover, grid, slippage=0.0005):
+        print(result["window_fast"], result["window_slow"], result["total_return"])
+"""
+
+import os
+import itertools
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Iterator
+
+import numpy as np
+import pandas as pd
+
+from backtest import backtest, summary
+from indicators import Indicators
+from kline_store import df_to_records, records_to_df
+
+
+SHARED_MEMORY_DIR = "/dev/shm"
+SWEEP_BATCHES_PER_PROCESS = 4
+
+_klines: pd.DataFrame | None = None
+
+
+def parameter_grid(**values) -> list[dict]:
+    """Every combination of the given parameter values, as keyword argument dicts."""
+    names = list(values)
+    return [dict(zip(names, combination)) for combination in itertools.product(*values.values())]
+
+
+def sweep(
+    df: pd.DataFrame,
+    strategy: Callable[..., np.ndarray],
+    grid: list[dict],
+    processes: int | None = None,
+    batch_size: int | None = None,
+    **backtest_kwargs,
+) -> Iterator[dict]:
+    """Backtest strategy(Indicators(df), **params) for every params of grid and yield {**params, **summary} as
+    results come in, in no particular order.
+
+    strategy : callable - Signal function such as backtest.sma_crossover. Runs in the worker processes, so it must
+        be picklable: a module level function, not a lambda.
+    grid : list - Keyword arguments of strategy, as returned by parameter_grid.
+    processes : integer (optional) - Worker processes, os.cpu_count() by default. With 1, backtests run in this process.
+    batch_size : integer (optional) - Parameter sets per task, by default enough for SWEEP_BATCHES_PER_PROCESS tasks
+        per process, so that slow and fast parameters even out across workers.
+    backtest_kwargs - Costs and sizing passed to backtest.
+    """
+    processes = processes or os.cpu_count() or 1
+    if processes <= 1 or len(grid) <= 1:
+        for params in grid:
+            yield _run(df, strategy, params, backtest_kwargs)
+        return
+    batch_size = batch_size or max(len(grid) // (processes * SWEEP_BATCHES_PER_PROCESS), 1)
+    batches = [grid[i : i + batch_size] for i in range(0, len(grid), batch_size)]
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload([__name__])
+    with tempfile.TemporaryDirectory(dir=SHARED_MEMORY_DIR if os.path.isdir(SHARED_MEMORY_DIR) else None) as directory:
+        path = os.path.join(directory, "klines.npy")
+        np.save(path, df_to_records(df))
+        with ProcessPoolExecutor(max_workers=processes, mp_context=context, initializer=_open_klines, initargs=(path,)) as executor:
+            futures = [executor.submit(_run_batch, strategy, batch, backtest_kwargs) for batch in batches]
+            try:
+                for future in as_completed(futures):
+                    yield from future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+
+
+def sweep_table(df: pd.DataFrame, strategy: Callable[..., np.ndarray], grid: list[dict], **kwargs) -> pd.DataFrame:
+    """All results of sweep as one DataFrame, sorted by total_return, best first. kwargs are passed to sweep."""
+    results = pd.DataFrame(list(sweep(df, strategy, grid, **kwargs)))
+    return results.sort_values("total_return", ascending=False, ignore_index=True) if len(results) else results
+
+
+def _open_klines(path: str):
+    global _klines
+    _klines = records_to_df(np.load(path, mmap_mode="r"), ["Open", "High", "Low", "Close"])
+
+
+def _run_batch(strategy: Callable[..., np.ndarray], batch: list[dict], backtest_kwargs: dict) -> list[dict]:
+    return [_run(_klines, strategy, params, backtest_kwargs) for params in batch]
+
+
+def _run(df: pd.DataFrame, strategy: Callable[..., np.ndarray], params: dict, backtest_kwargs: dict) -> dict:
+    return {**params, **summary(*backtest(df, strategy(Indicators(df), **params), **backtest_kwargs))}
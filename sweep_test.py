@@ -0,0 +1,47 @@
+import os
+import types
+
+import pytest
+import numpy as np
+
+from backtest import backtest, macd_crossover, sma_crossover, summary
+from binance import load_klines
+from indicators import Indicators
+from kline_store import HISTORICAL_DIR
+from sweep import parameter_grid, sweep, sweep_table
+
+
+@pytest.fixture(scope="module")
+def klines():
+    return load_klines(os.path.join(HISTORICAL_DIR, "BTCUSDT-2023-1h.csv"))
+
+
+def _key(result):
+    return tuple(sorted((name, value) for name, value in result.items() if name.startswith("window")))
+
+
+def test_parameter_grid():
+    assert parameter_grid(window_fast=[5, 10], window_slow=[20]) == [{"window_fast": 5, "window_slow": 20}, {"window_fast": 10, "window_slow": 20}]
+    assert parameter_grid() == [{}]
+
+
+def test_sweep_in_processes_matches_serial(klines):
+    grid = parameter_grid(window_fast=[6, 12], window_slow=[26, 50], window_sign=[9])
+    serial = list(sweep(klines, macd_crossover, grid, processes=1, slippage=0.0005))
+    parallel = sweep(klines, macd_crossover, grid, processes=2, batch_size=1, slippage=0.0005)
+    assert isinstance(parallel, types.GeneratorType)
+    assert sorted(map(_key, parallel)) == sorted(map(_key, serial))
+    parallel = {_key(result): result for result in sweep(klines, macd_crossover, grid, processes=2, slippage=0.0005)}
+    for result in serial:
+        assert parallel[_key(result)] == result
+    expected = summary(*backtest(klines, macd_crossover(Indicators(klines), 12, 50, 9), slippage=0.0005))
+    assert parallel[_key({"window_fast": 12, "window_slow": 50, "window_sign": 9})] == {"window_fast": 12, "window_slow": 50, "window_sign": 9, **expected}
+
+
+def test_sweep_table(klines):
+    grid = [params for params in parameter_grid(window_fast=[5, 12, 30], window_slow=[26, 50]) if params["window_fast"] < params["window_slow"]]
+    df = sweep_table(klines, sma_crossover, grid, processes=2)
+    assert len(df) == 5
+    assert df.columns[:2].tolist() == ["window_fast", "window_slow"]
+    assert np.all(np.diff(df["total_return"]) <= 0)
+    assert sweep_table(klines, sma_crossover, []).empty
@@ -0,0 +1,107 @@
+"""Test data, fakes and runners shared by the test modules."""
+
+import json
+import asyncio
+from datetime import datetime, timezone
+
+from websockets import ConnectionClosed
+from websockets.asyncio.server import serve
+
+
+TRADE = {"e": "trade", "E": 1672515782136, "s": "BNBBTC", "t": 12345, "p": "0.001", "q": "100", "T": 1672515782136, "m": True, "M": True}
+KLINE = {
+    "e": "kline",
+    "E": 1672515782136,
+    "s": "BNBBTC",
+    "k": {
+        "t": 1672515780000, "T": 1672515839999, "s": "BNBBTC", "i": "1m", "f": 100, "L": 200, "o": "0.0010", "c": "0.0020", "h": "0.0025", "l": "0.0015",
+        "v": "1000", "n": 100, "x": False, "q": "1.0000", "V": "500", "Q": "0.500", "B": "123456",
+    },
+}
+
+
+class FakeBinance:
+    """Combined-stream server answering SUBSCRIBE/UNSUBSCRIBE and pushing messages to the connections subscribed to a stream."""
+
+    def __init__(self):
+        self.connections = {}
+        self.control_messages = []
+
+    async def handler(self, websocket):
+        self.connections[websocket] = set()
+        try:
+            async for message in websocket:
+                request = json.loads(message)
+                self.control_messages.append(request)
+                if any("@invalid" in stream for stream in request["params"]):
+                    await websocket.send(json.dumps({"error": {"code": 2, "msg": "Invalid request"}, "id": request["id"]}))
+                    continue
+                if request["method"] == "SUBSCRIBE":
+                    self.connections[websocket].update(request["params"])
+                elif request["method"] == "UNSUBSCRIBE":
+                    self.connections[websocket].difference_update(request["params"])
+                await websocket.send(json.dumps({"result": None, "id": request["id"]}))
+        except ConnectionClosed:
+            pass
+        finally:
+            del self.connections[websocket]
+
+    async def drop_connections(self):
+        for websocket in list(self.connections):
+            await websocket.close(1011, "dropped")
+
+    async def push(self, stream, data):
+        for websocket, streams in list(self.connections.items()):
+            if stream in streams:
+                await websocket.send(json.dumps({"stream": stream, "data": data}))
+
+
+class FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2024, 1, 1, 4, 30, tzinfo=timezone.utc)
+
+
+def run_with_fake_binance(test):
+    """Run test(binance, uri) against a FakeBinance served on a local port."""
+
+    async def main():
+        binance = FakeBinance()
+        async with serve(binance.handler, "127.0.0.1", 0) as server:
+            uri = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}/stream"
+            await test(binance, uri)
+
+    asyncio.run(asyncio.wait_for(main(), 10))
+
+
+def run_closing(coro, client):
+    """Run coro and close the async HTTP client it used, which is bound to the event loop of this run."""
+
+    async def main():
+        try:
+            return await coro
+        finally:
+            await client.close()
+
+    return asyncio.run(main())
+
+
+async def until(condition):
+    while not condition():
+        await asyncio.sleep(0.01)
+
+
+def kline_message(open_time, is_closed=True, close=1.0):
+    return {**KLINE, "k": {**KLINE["k"], "t": open_time, "T": open_time + 59_999, "s": "BTCUSDT", "c": str(close), "x": is_closed}}
+
+
+def minute_klines(open_times):
+    return [[t, "1.0", "2.0", "0.5", "1.5", "10.0", t + 59_999, "15.0", 7, "5.0", "7.5", "0"] for t in open_times]
+
+
+def hourly_klines(start_hour: int, periods: int, close_offset: float = 0.0) -> list[list]:
+    open_time = 1704067200000 + start_hour * 3600000
+    return [
+        [open_time + i * 3600000, "100.0", "102.0", "99.0", f"{101.0 + start_hour + i + close_offset}", "1.5", open_time + (i + 1) * 3600000 - 1, "150.0", 10 + i, "0.5", "50.0", "0"]
+        for i in range(periods)
+    ]